@@ -9,8 +9,19 @@ import sys
 import uvicorn
 import warnings
 import logging
-from fastapi import FastAPI
-from google.adk.cli.fast_api import get_fast_api_app
+from contextlib import contextmanager
+from typing import Any, Dict
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import Response
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, Field
+from google.adk.cli import fast_api as adk_fast_api
+from google.adk.cli.fast_api import AgentRunRequest, get_fast_api_app
+from google.adk.sessions import DatabaseSessionService
+from google.genai import types
+
+from shared_utils.metrics import REGISTRY, CONTENT_TYPE, MetricsMiddleware
+from shared_utils.tracing import current_trace
 
 # Suppress OpenTelemetry context errors (common with ADK + Python 3.13)
 warnings.filterwarnings("ignore", message=".*Failed to detach context.*")
@@ -48,9 +59,91 @@ print(f"Environment: {ENVIRONMENT}")
 print(f"ADK will scan for agent packages in: {BASE_DIR}")
 print(f"Using database URL: {SESSION_DB_URL}")
 
+# Fused route: create the session with its initial state and start the run in one request
+FUSED_RUN_PATH = "/run_sse_with_state"
+
 # This will hold the FastAPI app instance
 app: FastAPI | None = None
 
+class RunWithStateRequest(BaseModel):
+    """Body of the fused create-session-and-run request (ADK's AgentRunRequest plus initial state)"""
+    app_name: str
+    user_id: str
+    session_id: str
+    new_message: types.Content
+    state: Dict[str, Any] = Field(default_factory=dict)
+    streaming: bool = False
+
+class TracedDatabaseSessionService(DatabaseSessionService):
+    """DatabaseSessionService recording each event write (with its state delta) as a span of the run's trace"""
+
+    async def append_event(self, session, event):
+        trace = current_trace(event.invocation_id)
+        if trace is None:
+            return await super().append_event(session, event)
+        parent = trace.open_span("agent", event.author)
+        with trace.span("state", "append_event", parent, author=event.author, stateKeys=len(event.actions.state_delta)):
+            return await super().append_event(session, event)
+
+@contextmanager
+def traced_adk_sessions():
+    """Have get_fast_api_app build a TracedDatabaseSessionService for SESSION_DB_URL.
+
+    ADK constructs its session service inside get_fast_api_app and does not
+    accept one, so its module-level DatabaseSessionService name is swapped
+    for the duration of the call. ADK's routes and FUSED_RUN_PATH then share
+    one traced service (one engine and connection pool on sessions.db).
+    """
+    if getattr(adk_fast_api, "DatabaseSessionService", None) is not DatabaseSessionService:
+        print("ADK does not build DatabaseSessionService by name; state writes will not be traced", file=sys.stderr)
+        yield
+        return
+    adk_fast_api.DatabaseSessionService = TracedDatabaseSessionService
+    try:
+        yield
+    finally:
+        adk_fast_api.DatabaseSessionService = DatabaseSessionService
+
+def _adk_endpoint(app: FastAPI, path: str, method: str):
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.path == path and method in route.methods:
+            return route.endpoint
+    raise RuntimeError(f"ADK route {method} {path} not found")
+
+def add_fused_run_route(app: FastAPI):
+    """Register FUSED_RUN_PATH next to ADK's routes.
+
+    Saves the backend one HTTP round trip per request compared to
+    POST /apps/.../sessions/{id} followed by POST /run_sse.
+    Calls ADK's own route handlers in-process, so the session service and
+    the per-app runners are the ones ADK's routes use.
+    """
+    create_session = _adk_endpoint(app, "/apps/{app_name}/users/{user_id}/sessions/{session_id}", "POST")
+    run_sse = _adk_endpoint(app, "/run_sse", "POST")
+
+    @app.post(FUSED_RUN_PATH)
+    async def run_sse_with_state(req: RunWithStateRequest):
+        try:
+            await create_session(
+                app_name=req.app_name,
+                user_id=req.user_id,
+                session_id=req.session_id,
+                state=req.state
+            )
+        except HTTPException as e:
+            if "already exists" in str(e.detail):
+                raise HTTPException(status_code=409, detail=f"Session already exists: {req.session_id}")
+            raise
+
+        return await run_sse(AgentRunRequest(
+            app_name=req.app_name,
+            user_id=req.user_id,
+            session_id=req.session_id,
+            new_message=req.new_message,
+            streaming=req.streaming
+        ))
+
+
 def create_app():
     """Create and configure the FastAPI app based on environment."""
     global app
@@ -69,7 +162,9 @@ def create_app():
             app_args["trace_to_cloud"] = TRACE_TO_CLOUD
 
         # Initialize ADK app
-        app = get_fast_api_app(**app_args)
+        with traced_adk_sessions():
+            app = get_fast_api_app(**app_args)
+        add_fused_run_route(app)
         
         success_msg = f"Successfully initialized ADK app for {ENVIRONMENT.lower()} deployment"
         print(success_msg)
@@ -91,6 +186,13 @@ def create_app():
                 "environment": ENVIRONMENT
             }
 
+        # Prometheus scrape endpoint; agent metrics appear once the agent package is loaded
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/metrics")
+        async def metrics():
+            return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
     except Exception as adk_init_exception:
         adk_error_message = str(adk_init_exception)
         print(f"Error initializing ADK app: {adk_error_message}", file=sys.stderr)
@@ -0,0 +1,5 @@
+"""
+Performance benchmarks for the STAR Answer Generation system.
+
+Run from the repository root, e.g. ``python -m benchmarks.bench_sse_parser``.
+"""
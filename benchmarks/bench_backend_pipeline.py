@@ -0,0 +1,152 @@
+"""
+Backend pipeline benchmark against a stub agent service.
+
+Runs one backend worker (fastapi_backend.main under uvicorn, auth disabled)
+against benchmarks/stub_agent.py, which streams a canned ADK run of fixed
+duration and payload size. Every request goes through the full backend
+path - SSE parsing, FinalResponse validation, prepare_ui_response_from_model,
+storage (Firestore only with --firestore, e.g. against the emulator via
+FIRESTORE_EMULATOR_HOST) and JSON re-encoding - so the time beyond the stub's
+stream duration is the backend's own cost.
+
+For each concurrency step it reports the backend process's CPU time per
+request and CPU utilization, resident memory after the step and at peak,
+and time-to-final percentiles. The worker's max concurrent streams is the
+highest step without errors whose p95 time-to-final stays within --slowdown
+of the single-stream baseline. CPU and memory are read from /proc (Linux).
+
+Usage:
+    python -m benchmarks.bench_backend_pipeline
+    python -m benchmarks.bench_backend_pipeline --concurrency 1 16 64 256 --stream-seconds 2 --partials 8 --json
+"""
+
+import os
+import sys
+import json
+import asyncio
+import argparse
+import tempfile
+import urllib.request
+from contextlib import ExitStack
+from typing import Any, Dict
+
+from benchmarks.bench_e2e_load import run_step
+from benchmarks.services import Service, free_port, service_env
+
+
+def process_usage(pid: int) -> Dict[str, float]:
+    """CPU seconds (user + system), resident and peak resident memory in MB of a process"""
+    with open(f"/proc/{pid}/stat") as f:
+        # Fields after the parenthesized command name; utime and stime are fields 14 and 15
+        fields = f.read().rsplit(")", 1)[1].split()
+    ticks = os.sysconf("SC_CLK_TCK")
+    usage = {"cpu_s": (int(fields[11]) + int(fields[12])) / ticks}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith(("VmRSS:", "VmHWM:")):
+                key = "rss_mb" if line.startswith("VmRSS") else "peak_rss_mb"
+                usage[key] = int(line.split()[1]) / 1024
+    return usage
+
+
+def fetch_json(url: str) -> Dict[str, Any]:
+    with urllib.request.urlopen(url, timeout=5) as response:
+        return json.loads(response.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", nargs="*", type=int, default=[1, 8, 32, 128])
+    parser.add_argument("--requests-per-worker", type=int, default=4, help="Requests per step = concurrency x this")
+    parser.add_argument("--stream-seconds", type=float, default=2.0, help="Duration of each stub run")
+    parser.add_argument("--partials", type=int, default=8, help="Partial chunks before each sub-agent output")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--resume-chars", type=int, default=10000)
+    parser.add_argument("--jd-chars", type=int, default=15000)
+    parser.add_argument("--slowdown", type=float, default=0.25, help="Allowed p95 increase over the baseline")
+    parser.add_argument("--firestore", action="store_true", help="Store responses in Firestore instead of skipping it")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    log_dir = tempfile.mkdtemp(prefix="bench_backend_")
+    stub_port, backend_port = free_port(), free_port()
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    backend_url = f"http://127.0.0.1:{backend_port}"
+
+    with ExitStack() as stack:
+        stack.enter_context(Service(
+            "stub_agent",
+            [sys.executable, "-m", "benchmarks.stub_agent", "--port", str(stub_port),
+             "--stream-seconds", str(args.stream_seconds), "--partials", str(args.partials),
+             "--iterations", str(args.iterations), "--resume-chars", str(args.resume_chars),
+             "--jd-chars", str(args.jd_chars)],
+            service_env(), f"{stub_url}/health", log_dir
+        ))
+        backend = stack.enter_context(Service(
+            "backend",
+            [sys.executable, "-m", "uvicorn", "fastapi_backend.main:app",
+             "--host", "127.0.0.1", "--port", str(backend_port), "--log-level", "warning"],
+            service_env(
+                DISABLE_AUTH="true",
+                SKIP_FIRESTORE="false" if args.firestore else "true",
+                AGENT_LOCATION="local",
+                LOCAL_AGENT_URL=stub_url,
+                RESPONSE_CACHE_ENABLED="false",
+                NEAR_DUP_MODE="off",
+                LOG_LEVEL="warning"
+            ),
+            f"{backend_url}/health", log_dir
+        ))
+
+        chat_url = f"{backend_url}/api/chat/stream"
+        asyncio.run(run_step(chat_url, 1, 2, args.timeout, step=0))  # Warm up imports and connection pools
+
+        steps = []
+        for step, concurrency in enumerate(args.concurrency, start=1):
+            before = process_usage(backend.process.pid)
+            summary = asyncio.run(run_step(chat_url, concurrency, concurrency * args.requests_per_worker, args.timeout, step))
+            after = process_usage(backend.process.pid)
+            cpu = after["cpu_s"] - before["cpu_s"]
+            summary.update({
+                "cpu_ms_per_request": cpu * 1000 / max(1, summary["requests"]),
+                "cpu_utilization": cpu / summary["wall_s"] if summary["wall_s"] else 0.0,
+                "rss_mb": after["rss_mb"],
+                "peak_rss_mb": after["peak_rss_mb"],
+            })
+            steps.append(summary)
+        stub_stats = fetch_json(f"{stub_url}/stats")
+
+    baseline = steps[0]["final_p95_s"] if steps and steps[0]["final_p95_s"] else args.stream_seconds
+    max_streams = 0
+    for s in steps:
+        if s["errors"] == 0 and s["final_p95_s"] is not None and s["final_p95_s"] <= baseline * (1 + args.slowdown):
+            max_streams = max(max_streams, s["concurrency"])
+
+    if args.json:
+        print(json.dumps({
+            "settings": vars(args), "logs": log_dir, "steps": steps,
+            "max_concurrent_streams": max_streams, "stub": stub_stats
+        }, indent=2))
+        return
+
+    def fmt(value):
+        return f"{value:.2f}" if value is not None else "-"
+
+    print(f"Service logs: {log_dir}")
+    print(
+        f"{'conc':>5} {'reqs':>5} {'err':>4} {'rps':>7} {'cpu ms/req':>11} {'cpu util':>9} "
+        f"{'rss MB':>7} {'peak MB':>8} {'final p50':>10} {'p95':>6} {'p99':>6}"
+    )
+    for s in steps:
+        print(
+            f"{s['concurrency']:>5} {s['requests']:>5} {s['errors']:>4} {s['throughput_rps']:>7.2f} "
+            f"{s['cpu_ms_per_request']:>11.2f} {s['cpu_utilization']:>9.2f} {s['rss_mb']:>7.1f} "
+            f"{s['peak_rss_mb']:>8.1f} {fmt(s['final_p50_s']):>10} {fmt(s['final_p95_s']):>6} {fmt(s['final_p99_s']):>6}"
+        )
+    print(f"Max concurrent streams per worker (p95 within {args.slowdown:.0%} of {baseline:.2f}s, no errors): {max_streams}")
+    print(f"Stub agent: {stub_stats.get('runs', 0)} runs, up to {stub_stats.get('max_in_flight', 0)} in flight")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Offline end-to-end load benchmark.
+
+Starts the whole stack locally without touching Vertex AI: the Gemini
+stand-in (benchmarks/fake_gemini.py), the agent service (app.py) pointed at
+it, and the backend (fastapi_backend.main) with auth and Firestore off. Then
+drives POST /api/chat/stream at each concurrency level with unique, uncached
+questions and reports per step:
+
+- TTFB: time to the first SSE bytes from the backend
+- time to final: time to the 'final' event
+- p50/p95/p99 of both, throughput and errors (HTTP errors, error events,
+  streams that end without a final event)
+
+Model behaviour (latency distribution, rating sequence, 429s, 500s) is set
+with the fake server's options; agent settings can be overridden with
+--agent-env, e.g. --agent-env REFINEMENT_MODE=fused.
+
+Usage:
+    python -m benchmarks.bench_e2e_load
+    python -m benchmarks.bench_e2e_load --concurrency 1 8 32 --requests-per-worker 4 --latency-ms 1200 --rate-429 0.02 --json
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import urllib.request
+from collections import Counter
+from contextlib import ExitStack
+from typing import Any, Dict, List
+
+import aiohttp
+
+from benchmarks.fake_gemini import add_fake_gemini_arguments, fake_gemini_argv
+from benchmarks.services import ROOT, Service, free_port, service_env
+
+QUESTION = "Tell me about a time you had to prioritize competing stakeholder requests"
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def chat_request(session: aiohttp.ClientSession, url: str, tag: str) -> Dict[str, Any]:
+    """One /api/chat/stream request, timed to the first bytes and to the final event"""
+    body = {
+        "role": "Product Manager",
+        "industry": "Healthcare",
+        "question": f"{QUESTION} (load {tag})",
+        "bypassCache": True
+    }
+    started = time.perf_counter()
+    result: Dict[str, Any] = {"ttfb_s": None, "final_s": None, "error": None}
+    try:
+        async with session.post(url, json=body) as response:
+            if response.status != 200:
+                result["error"] = f"HTTP {response.status}"
+                return result
+            async for line in response.content:
+                if result["ttfb_s"] is None:
+                    result["ttfb_s"] = time.perf_counter() - started
+                line = line.strip()
+                if not line.startswith(b"data:"):
+                    continue
+                event = json.loads(line[5:])
+                if event.get("type") == "final":
+                    result["final_s"] = time.perf_counter() - started
+                    return result
+                if event.get("type") == "error" or "error" in event:
+                    result["error"] = str(event.get("error") or event.get("message") or "error event")[:80]
+                    return result
+        result["error"] = "no final event"
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        result["error"] = type(e).__name__
+    return result
+
+
+async def run_step(url: str, concurrency: int, requests: int, timeout: float, step: int) -> Dict[str, Any]:
+    """requests chat requests, at most concurrency in flight at a time"""
+    results: List[Dict[str, Any]] = []
+    pending = iter(range(requests))
+
+    async def worker(session):
+        for i in pending:
+            results.append(await chat_request(session, url, f"{step}-{i}"))
+
+    connector = aiohttp.TCPConnector(limit=0)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout, read_bufsize=2 ** 20) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        wall = time.perf_counter() - started
+
+    ok = [r for r in results if r["error"] is None]
+    summary: Dict[str, Any] = {
+        "concurrency": concurrency,
+        "requests": len(results),
+        "ok": len(ok),
+        "errors": len(results) - len(ok),
+        "error_kinds": dict(Counter(r["error"] for r in results if r["error"] is not None)),
+        "wall_s": wall,
+        "throughput_rps": len(ok) / wall if wall else 0.0,
+    }
+    ttfb = [r["ttfb_s"] for r in results if r["ttfb_s"] is not None]
+    final = [r["final_s"] for r in ok]
+    for name, samples in (("ttfb", ttfb), ("final", final)):
+        for pct in (50, 95, 99):
+            summary[f"{name}_p{pct}_s"] = percentile(samples, pct) if samples else None
+    return summary
+
+
+def fetch_json(url: str) -> Dict[str, Any]:
+    with urllib.request.urlopen(url, timeout=5) as response:
+        return json.loads(response.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", nargs="*", type=int, default=[1, 4, 16])
+    parser.add_argument("--requests-per-worker", type=int, default=3, help="Requests per step = concurrency x this")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed requests before the first step")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds before a request counts as failed")
+    parser.add_argument("--agent-env", nargs="*", default=[], metavar="KEY=VALUE", help="Extra agent service settings")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    add_fake_gemini_arguments(parser)
+    args = parser.parse_args()
+
+    agent_overrides = dict(item.split("=", 1) for item in args.agent_env)
+    log_dir = tempfile.mkdtemp(prefix="bench_e2e_")
+    fake_port, agent_port, backend_port = free_port(), free_port(), free_port()
+    fake_url = f"http://127.0.0.1:{fake_port}"
+    agent_url = f"http://127.0.0.1:{agent_port}"
+    backend_url = f"http://127.0.0.1:{backend_port}"
+
+    with ExitStack() as stack:
+        stack.enter_context(Service(
+            "fake_gemini",
+            [sys.executable, "-m", "benchmarks.fake_gemini", "--port", str(fake_port), *fake_gemini_argv(args)],
+            service_env(), f"{fake_url}/health", log_dir
+        ))
+        # The agent runs in the log directory so its sessions.db stays out of the repo
+        stack.enter_context(Service(
+            "agent",
+            [sys.executable, f"{ROOT}/app.py"],
+            service_env(
+                ADK_PORT=str(agent_port),
+                GOOGLE_GENAI_USE_VERTEXAI="FALSE",
+                GOOGLE_API_KEY="bench-key",
+                GOOGLE_GEMINI_BASE_URL=fake_url,
+                CONTEXT_CACHE_BACKEND="off",
+                **agent_overrides
+            ),
+            f"{agent_url}/health", log_dir, cwd=log_dir, startup_timeout=120.0
+        ))
+        stack.enter_context(Service(
+            "backend",
+            [sys.executable, "-m", "uvicorn", "fastapi_backend.main:app",
+             "--host", "127.0.0.1", "--port", str(backend_port), "--log-level", "warning"],
+            service_env(
+                DISABLE_AUTH="true",
+                SKIP_FIRESTORE="true",
+                AGENT_LOCATION="local",
+                LOCAL_AGENT_URL=agent_url,
+                RESPONSE_CACHE_ENABLED="false",
+                NEAR_DUP_MODE="off"
+            ),
+            f"{backend_url}/health", log_dir
+        ))
+
+        chat_url = f"{backend_url}/api/chat/stream"
+        if args.warmup:
+            asyncio.run(run_step(chat_url, 1, args.warmup, args.timeout, step=0))
+
+        steps = []
+        for step, concurrency in enumerate(args.concurrency, start=1):
+            before = fetch_json(f"{fake_url}/stats")
+            summary = asyncio.run(run_step(chat_url, concurrency, concurrency * args.requests_per_worker, args.timeout, step))
+            after = fetch_json(f"{fake_url}/stats")
+            summary["model"] = {key: after.get(key, 0) - before.get(key, 0) for key in ("calls", "rejected_429", "errors_500")}
+            steps.append(summary)
+
+    if args.json:
+        print(json.dumps({"settings": vars(args), "logs": log_dir, "steps": steps}, indent=2))
+        return
+
+    def fmt(value):
+        return f"{value:.2f}" if value is not None else "-"
+
+    print(f"Service logs: {log_dir}")
+    print(
+        f"{'conc':>5} {'reqs':>5} {'err':>4} {'rps':>6} {'ttfb p50':>9} {'p95':>6} {'p99':>6} "
+        f"{'final p50':>10} {'p95':>6} {'p99':>6} {'calls':>6} {'429':>4} {'500':>4}"
+    )
+    for s in steps:
+        print(
+            f"{s['concurrency']:>5} {s['requests']:>5} {s['errors']:>4} {s['throughput_rps']:>6.2f} "
+            f"{fmt(s['ttfb_p50_s']):>9} {fmt(s['ttfb_p95_s']):>6} {fmt(s['ttfb_p99_s']):>6} "
+            f"{fmt(s['final_p50_s']):>10} {fmt(s['final_p95_s']):>6} {fmt(s['final_p99_s']):>6} "
+            f"{s['model']['calls']:>6} {s['model']['rejected_429']:>4} {s['model']['errors_500']:>4}"
+        )
+        for kind, count in s["error_kinds"].items():
+            print(f"{'':>11} {count} x {kind}")
+
+
+if __name__ == "__main__":
+    main()
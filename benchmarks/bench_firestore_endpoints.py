@@ -0,0 +1,285 @@
+"""
+History and response endpoint benchmark on the Firestore emulator.
+
+Seeds the local Firestore emulator with realistic `responses` documents
+(shaped like user_service.store_user_response writes them, with 1-5
+iterations and varying resume/job description sizes) for one user per data
+set size, then calls the /api/history and /api/responses/{id} handlers of
+fastapi_backend.main in-process and reports per call:
+
+- latency p50/p95/p99 (handler time, without HTTP framing)
+- document reads and bytes read from Firestore, counted on the client's
+  RunQuery / BatchGetDocuments responses
+- bytes of the JSON response body
+
+Needs a running emulator (gcloud emulators firestore start) and
+FIRESTORE_EMULATOR_HOST pointing at it. The results can be written as a JSON
+baseline and compared against an earlier one.
+
+Usage:
+    FIRESTORE_EMULATOR_HOST=127.0.0.1:8081 python -m benchmarks.bench_firestore_endpoints
+    python -m benchmarks.bench_firestore_endpoints --sizes 10 1000 10000 --save benchmarks/baseline_firestore.json
+    python -m benchmarks.bench_firestore_endpoints --compare benchmarks/baseline_firestore.json
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+import datetime
+import urllib.request
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from benchmarks.payloads import final_response
+
+PROJECT_ID = os.getenv("FIREBASE_PROJECT_ID", "refiner-agent")
+DATABASE = "refiner-agent"  # The database the endpoints read from
+BATCH_SIZE = 500  # Firestore's maximum writes per batch
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class ReadCounter:
+    """Documents and bytes returned by Firestore read RPCs"""
+
+    def __init__(self):
+        self.documents = 0
+        self.bytes = 0
+
+    def reset(self):
+        self.documents = 0
+        self.bytes = 0
+
+
+class _CountingStream:
+    """A streaming RPC response that counts the documents it yields"""
+
+    def __init__(self, stream, counter: ReadCounter, field: str):
+        self._stream = stream
+        self._counter = counter
+        self._field = field
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        response = next(self._stream)
+        pb = type(response).pb(response)
+        if pb.HasField(self._field):
+            self._counter.documents += 1
+            self._counter.bytes += getattr(pb, self._field).ByteSize()
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class _CountingApi:
+    """The generated Firestore API client with its read RPCs counted"""
+
+    _READS = {"run_query": "document", "batch_get_documents": "found"}
+
+    def __init__(self, api, counter: ReadCounter):
+        self._api = api
+        self._counter = counter
+
+    def __getattr__(self, name):
+        attr = getattr(self._api, name)
+        field = self._READS.get(name)
+        if field is None:
+            return attr
+
+        def counted(*args, **kwargs):
+            return _CountingStream(attr(*args, **kwargs), self._counter, field)
+        return counted
+
+
+@contextmanager
+def count_reads(firestore_module, counter: ReadCounter):
+    """Make firestore_module.Client count what its read RPCs return"""
+    original = firestore_module.Client
+
+    class CountingClient(original):
+        @property
+        def _firestore_api(self):
+            return _CountingApi(super()._firestore_api, counter)
+
+    firestore_module.Client = CountingClient
+    try:
+        yield
+    finally:
+        firestore_module.Client = original
+
+
+def reset_emulator(host: str) -> None:
+    """Delete every document in the emulator's database"""
+    request = urllib.request.Request(
+        f"http://{host}/emulator/v1/projects/{PROJECT_ID}/databases/{DATABASE}/documents", method="DELETE"
+    )
+    with urllib.request.urlopen(request, timeout=60):
+        pass
+
+
+def seed(db, user_id: str, count: int, max_input_chars: int, rng: random.Random) -> List[str]:
+    """count response documents for the user, newest last; returns their ids"""
+    collection = db.collection("responses")
+    started = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(minutes=count)
+    ids = []
+    batch = db.batch()
+    for i in range(count):
+        response = final_response(
+            iterations=rng.randint(1, 5),
+            resume_chars=rng.randint(0, max_input_chars),
+            jd_chars=rng.randint(0, max_input_chars),
+            seed=rng.randrange(1 << 30)
+        )
+        response["metadata"]["userId"] = user_id
+        doc = collection.document()
+        batch.set(doc, {
+            "userId": user_id,
+            "createdAt": (started + datetime.timedelta(minutes=i)).isoformat(),
+            "finalResponse": response
+        })
+        ids.append(doc.id)
+        if (i + 1) % BATCH_SIZE == 0:
+            batch.commit()
+            batch = db.batch()
+    batch.commit()
+    return ids
+
+
+async def measure(call, counter: ReadCounter, repeats: int) -> Dict[str, Any]:
+    """Latency, Firestore reads and response size of an endpoint call"""
+    from fastapi.encoders import jsonable_encoder
+
+    latencies, documents, read_bytes, body_bytes = [], [], [], []
+    for _ in range(repeats):
+        counter.reset()
+        started = time.perf_counter()
+        result = await call()
+        latencies.append(time.perf_counter() - started)
+        documents.append(counter.documents)
+        read_bytes.append(counter.bytes)
+        body_bytes.append(len(json.dumps(jsonable_encoder(result)).encode()))
+    return {
+        "calls": repeats,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "documents_read": sum(documents) / repeats,
+        "bytes_read": sum(read_bytes) / repeats,
+        "response_bytes": sum(body_bytes) / repeats,
+    }
+
+
+async def run(args) -> Dict[str, Any]:
+    from google.cloud import firestore as gcp_firestore
+    from fastapi_backend import main as backend
+    from fastapi_backend.auth import User
+
+    rng = random.Random(args.seed)
+    db = gcp_firestore.Client(project=PROJECT_ID, database=DATABASE)
+    counter = ReadCounter()
+    results = []
+    with count_reads(backend.firestore, counter):
+        for size in args.sizes:
+            user = User(uid=f"bench-user-{size}", auth_type="development")
+            if not args.no_seed:
+                seed_started = time.perf_counter()
+                ids = seed(db, user.uid, size, args.max_input_chars, rng)
+                seed_s = time.perf_counter() - seed_started
+            else:
+                ids = [doc.id for doc in db.collection("responses").where("userId", "==", user.uid).select([]).get()]
+                seed_s = 0.0
+            if not ids:
+                results.append({"documents": size, "error": "no documents for this user"})
+                continue
+
+            history = await measure(lambda: backend.get_history(user), counter, args.repeats)
+            response = await measure(lambda: backend.get_response(rng.choice(ids), user), counter, args.repeats)
+            results.append({"documents": size, "seed_s": seed_s, "history": history, "response": response})
+    return {
+        "recordedAt": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "settings": {k: v for k, v in vars(args).items() if k not in ("save", "compare", "json")},
+        "results": results
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Relative change of each metric against the baseline run with the same data set size"""
+    previous = {r["documents"]: r for r in baseline.get("results", []) if "history" in r}
+    changes = []
+    for r in current["results"]:
+        base = previous.get(r["documents"])
+        if base is None or "history" not in r:
+            continue
+        for endpoint in ("history", "response"):
+            for metric in ("p50_ms", "p95_ms", "documents_read", "bytes_read", "response_bytes"):
+                before, after = base[endpoint][metric], r[endpoint][metric]
+                changes.append({
+                    "documents": r["documents"], "endpoint": endpoint, "metric": metric,
+                    "baseline": before, "current": after,
+                    "change": (after - before) / before if before else None
+                })
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="*", type=int, default=[10, 1000, 10000], help="Documents per user")
+    parser.add_argument("--repeats", type=int, default=20, help="Calls per endpoint and size")
+    parser.add_argument("--max-input-chars", type=int, default=4000, help="Upper bound of stored resume/JD sizes")
+    parser.add_argument("--no-seed", action="store_true", help="Reuse the documents already in the emulator")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="Write the results to this JSON baseline file")
+    parser.add_argument("--compare", help="Compare against this JSON baseline file")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    host = os.getenv("FIRESTORE_EMULATOR_HOST")
+    if not host:
+        parser.error("FIRESTORE_EMULATOR_HOST must point at a running Firestore emulator")
+    if not args.no_seed:
+        reset_emulator(host)
+
+    current = asyncio.run(run(args))
+    changes: Optional[List[Dict[str, Any]]] = None
+    if args.compare:
+        with open(args.compare) as f:
+            changes = compare(current, json.load(f))
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(current, f, indent=2)
+
+    if args.json:
+        print(json.dumps({**current, "comparison": changes}, indent=2))
+        return
+
+    print(f"{'docs':>6} {'endpoint':<9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'doc reads':>10} {'KB read':>9} {'KB body':>8}")
+    for r in current["results"]:
+        if "error" in r:
+            print(f"{r['documents']:>6} {r['error']}")
+            continue
+        for endpoint in ("history", "response"):
+            m = r[endpoint]
+            print(
+                f"{r['documents']:>6} {endpoint:<9} {m['p50_ms']:>8.1f} {m['p95_ms']:>8.1f} {m['p99_ms']:>8.1f} "
+                f"{m['documents_read']:>10.1f} {m['bytes_read'] / 1024:>9.1f} {m['response_bytes'] / 1024:>8.1f}"
+            )
+    if changes:
+        print(f"\nCompared with {args.compare}:")
+        for c in changes:
+            if c["change"] is not None and abs(c["change"]) >= 0.05:
+                print(f"  {c['documents']:>6} {c['endpoint']:<9} {c['metric']:<15} {c['baseline']:>10.1f} -> {c['current']:>10.1f} ({c['change']:+.0%})")
+    if args.save:
+        print(f"Baseline written to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
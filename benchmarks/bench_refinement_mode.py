@@ -0,0 +1,146 @@
+"""
+Refinement mode benchmark: two-step critique -> refine loop vs the fused
+critique-and-refine agent.
+
+Runs refiner_agent in-process through an ADK Runner for each mode (each mode
+in its own subprocess, since REFINEMENT_MODE is read at import time) on the
+same questions, and compares end-to-end latency, per-round latency, rounds
+and the best rating reached. Calls the configured Gemini models, so it needs
+the same credentials as the agent service.
+
+Usage:
+    python -m benchmarks.bench_refinement_mode
+    python -m benchmarks.bench_refinement_mode --repeats 3 --modes two_step fused --json
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import statistics
+import subprocess
+from typing import Any, Dict, List
+
+QUESTIONS = [
+    ("Product Manager", "Healthcare", "Tell me about a time you had to prioritize competing stakeholder requests."),
+    ("Software Engineer", "Finance", "Describe a time you resolved a production incident under pressure."),
+    ("Data Scientist", "Retail", "Give an example of when your analysis changed a business decision."),
+    ("Nurse", "Healthcare", "Tell me about a time you handled a difficult patient or family member."),
+    ("Sales Director", "Technology", "Describe a deal you almost lost and how you saved it."),
+]
+
+
+async def run_once(runner, session_service, role: str, industry: str, question: str) -> Dict[str, Any]:
+    from google.genai import types
+
+    user_id = "bench-user"
+    session = await session_service.create_session(
+        app_name="refiner_agent",
+        user_id=user_id,
+        session_id=str(uuid.uuid4()),
+        state={"role": role, "industry": industry, "question": question, "resume": "", "jobDescription": ""}
+    )
+    started = time.perf_counter()
+    final = None
+    async for event in runner.run_async(
+        user_id=user_id,
+        session_id=session.id,
+        new_message=types.Content(role="user", parts=[types.Part(text="Start")])
+    ):
+        if event.partial or not event.content or not event.content.parts:
+            continue
+        for part in event.content.parts:
+            text = (part.text or "").strip()
+            if text.startswith("{") and '"performanceMetrics"' in text:
+                final = json.loads(text)
+    elapsed = time.perf_counter() - started
+
+    if final is None:
+        return {"question": question, "error": "no final response", "wall_s": elapsed}
+    metrics = final["performanceMetrics"]
+    rounds = len(metrics.get("critiqueTimes", []))
+    round_time = sum(metrics.get("critiqueTimes", [])) + sum(metrics.get("refinementTimes", []))
+    return {
+        "question": question,
+        "wall_s": elapsed,
+        "rounds": rounds,
+        "round_s": round_time / rounds if rounds else 0.0,
+        "best_rating": max((it["critique"]["rating"] for it in final["iterations"]), default=0.0),
+        "llm_calls_saved": metrics.get("llmCallsSaved", 0),
+        "stop_reason": metrics.get("stopReason"),
+    }
+
+
+async def worker(repeats: int) -> List[Dict[str, Any]]:
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from refiner_agent.agent import root_agent
+
+    session_service = InMemorySessionService()
+    runner = Runner(agent=root_agent, app_name="refiner_agent", session_service=session_service)
+    results = []
+    for _ in range(repeats):
+        for role, industry, question in QUESTIONS:
+            results.append(await run_once(runner, session_service, role, industry, question))
+    return results
+
+
+def summarize(mode: str, runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    ok = [r for r in runs if "error" not in r]
+    if not ok:
+        return {"mode": mode, "runs": len(runs), "errors": len(runs)}
+    return {
+        "mode": mode,
+        "runs": len(runs),
+        "errors": len(runs) - len(ok),
+        "wall_p50_s": statistics.median(r["wall_s"] for r in ok),
+        "wall_mean_s": statistics.fmean(r["wall_s"] for r in ok),
+        "round_mean_s": statistics.fmean(r["round_s"] for r in ok),
+        "rounds_mean": statistics.fmean(r["rounds"] for r in ok),
+        "best_rating_mean": statistics.fmean(r["best_rating"] for r in ok),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="*", default=["two_step", "fused"])
+    parser.add_argument("--repeats", type=int, default=1, help="Runs per question per mode")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(worker(args.repeats))))
+        return
+
+    summaries = []
+    for mode in args.modes:
+        env = dict(os.environ, REFINEMENT_MODE=mode)
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_refinement_mode", "--worker", "--repeats", str(args.repeats)],
+            env=env, capture_output=True, text=True, check=True
+        )
+        # The agent logs to stdout as well; the results are the last line
+        runs = json.loads(completed.stdout.strip().splitlines()[-1])
+        summaries.append(summarize(mode, runs))
+
+    if args.json:
+        print(json.dumps(summaries, indent=2))
+        return
+
+    print(f"{'mode':<10} {'runs':>5} {'err':>4} {'p50 s':>7} {'round s':>8} {'rounds':>7} {'rating':>7}")
+    for s in summaries:
+        if "wall_p50_s" not in s:
+            print(f"{s['mode']:<10} {s['runs']:>5} {s['errors']:>4}")
+            continue
+        print(
+            f"{s['mode']:<10} {s['runs']:>5} {s['errors']:>4} {s['wall_p50_s']:>7.2f} "
+            f"{s['round_mean_s']:>8.2f} {s['rounds_mean']:>7.2f} {s['best_rating_mean']:>7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Relevance compression benchmark.
+
+Times shared_utils.relevance.compress_text on resume / job description
+sized inputs (up to the 10k / 15k character limits of STARRequest) and
+reports how much of each input is kept.
+
+Usage:
+    python -m benchmarks.bench_relevance
+    python -m benchmarks.bench_relevance --budget 600 --top-k 8 --json
+"""
+
+import json
+import time
+import random
+import argparse
+import statistics
+from typing import Dict, List
+
+from shared_utils.relevance import compress_text, split_passages
+from benchmarks.payloads import lorem
+
+QUERY = "Tell me about a time you resolved a conflict with a stakeholder Product Manager Healthcare"
+
+
+def bullet_document(chars: int, seed: int) -> str:
+    """Resume/JD-like text: section headings followed by bullet lines"""
+    rng = random.Random(seed)
+    lines: List[str] = []
+    while sum(len(line) + 1 for line in lines) < chars:
+        if rng.random() < 0.1:
+            lines.append(rng.choice(["EXPERIENCE", "Responsibilities", "Requirements", "Projects", "Skills"]))
+        else:
+            words = rng.randint(12, 40)
+            bullet = lorem(words, rng)
+            if rng.random() < 0.15:
+                bullet = bullet[:-1] + " and resolved a stakeholder conflict."
+            lines.append(f"- {bullet}")
+    return "\n".join(lines)[:chars]
+
+
+def run(chars: int, budget: int, top_k: int, repeats: int) -> Dict[str, float]:
+    text = bullet_document(chars, seed=chars)
+    latencies = []
+    compressed = ""
+    for _ in range(repeats):
+        started = time.perf_counter()
+        compressed = compress_text(text, QUERY, budget, top_k)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return {
+        "chars": len(text),
+        "passages": len(split_passages(text)),
+        "kept_chars": len(compressed),
+        "kept_ratio": len(compressed) / len(text),
+        "p50_ms": statistics.median(latencies),
+        "max_ms": max(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="*", type=int, default=[2000, 10000, 15000, 25000])
+    parser.add_argument("--budget", type=int, default=800, help="Token budget per document")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = [run(size, args.budget, args.top_k, args.repeats) for size in args.sizes]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'chars':>7} {'passages':>9} {'kept':>7} {'ratio':>7} {'p50 ms':>8} {'max ms':>8}")
+    for r in results:
+        print(
+            f"{r['chars']:>7} {r['passages']:>9} {r['kept_chars']:>7} {r['kept_ratio']:>7.1%} "
+            f"{r['p50_ms']:>8.2f} {r['max_ms']:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
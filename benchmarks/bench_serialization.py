@@ -0,0 +1,218 @@
+"""
+Serialization hot path micro-benchmarks.
+
+Times the code that builds, validates and re-encodes the schemas.py models
+on every request, on payloads with 1-5 iterations and long resume/job
+description inputs:
+
+- iteration_history_callback (STARResponse/Critique/IterationData per round)
+- final_formatting_callback (FinalResponse build + model_dump_json, timings from a run's span tree)
+- FinalResponse.model_validate (chat_stream, on the parsed agent event)
+- prepare_ui_response_from_model (final event for the UI)
+- shared_utils.error_utils.create_error_response
+
+Each case reports the best and median time per call over batches of calls.
+Log output is disabled while measuring, so the numbers are the models' cost.
+Results can be saved as the JSON baseline that
+benchmarks/test_serialization_regression.py checks against.
+
+Usage:
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --save            # Write benchmarks/baseline_serialization.json
+    python -m benchmarks.bench_serialization --compare benchmarks/baseline_serialization.json --json
+"""
+
+import os
+import io
+import json
+import time
+import logging
+import argparse
+import platform
+import statistics
+from contextlib import redirect_stdout
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.payloads import final_response, star_answer, critique
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline_serialization.json")
+ITERATIONS = (1, 3, 5)
+RESUME_CHARS = 10000
+JD_CHARS = 15000
+BATCH_SECONDS = 0.005  # Calls are timed in batches of at least this long
+
+# A case: setup() builds a fresh argument outside the timing, fn(argument) is timed
+Case = Tuple[Callable[[], Any], Callable[[Any], Any]]
+
+
+def run_trace(iterations: int):
+    """A finished trace shaped like a two-step run with this many iterations"""
+    from shared_utils.tracing import RunTrace
+
+    trace = RunTrace(BenchCallbackContext.invocation_id)
+    flow = trace.start("agent", "STAROrchestrator_sequential_flow")
+    for name in ("input_compressor", "STARAnswerGenerator"):
+        agent = trace.start("agent", name, flow)
+        if name == "STARAnswerGenerator":
+            trace.end(trace.start("llm", name, agent, model="gemini-2.0-flash"))
+        trace.end(agent)
+    loop = trace.start("agent", "refinement_loop", flow)
+    for i in range(iterations):
+        for name in ("STARAnswerCritic", "rating_checker", "STARAnswerRefiner"):
+            agent = trace.start("agent", name, loop)
+            for callback in ("model_tier_callback", "context_cache_callback"):
+                trace.end(trace.start("callback", callback, agent))
+            if name != "rating_checker" and (name != "STARAnswerRefiner" or i < iterations - 1):
+                trace.end(trace.start("llm", name, agent, model="gemini-2.0-flash"))
+            trace.end(trace.start("state", "append_event", agent, author=name, stateKeys=3))
+            trace.end(agent)
+    trace.end(loop)
+    return trace
+
+
+class BenchCallbackContext:
+    """What the formatting callbacks use of ADK's CallbackContext: the session state and the invocation id"""
+
+    invocation_id = "e-bench"
+
+    def __init__(self, state: Dict[str, Any]):
+        self.state = state
+
+
+def build_cases(iterations: Tuple[int, ...] = ITERATIONS) -> Dict[str, Case]:
+    from schemas import FinalResponse
+    from refiner_agent.callbacks import iteration_history_callback, final_formatting_callback
+    from fastapi_backend.response_utils import prepare_ui_response_from_model
+    from shared_utils.error_utils import create_error_response
+    from shared_utils.tracing import use_trace
+
+    cases: Dict[str, Case] = {}
+    for n in iterations:
+        response = final_response(n, RESUME_CHARS, JD_CHARS, seed=n)
+        # The agent event as chat_stream receives it: JSON decoded from the SSE frame
+        event = json.loads(json.dumps(response))
+        validated = FinalResponse.model_validate(event)
+        history = [iteration.model_dump() for iteration in validated.iterations]
+        base_state = {
+            "role": "Product Manager",
+            "industry": "Healthcare",
+            "question": response["metadata"]["question"],
+            "resume": response["metadata"]["resume"],
+            "jobDescription": response["metadata"]["jobDescription"],
+        }
+        trace = run_trace(n)
+
+        def history_state(n=n, history=history, base_state=base_state):
+            # Round n: n - 1 recorded iterations plus the current answer and critique
+            return BenchCallbackContext(dict(
+                base_state,
+                fullIterationHistory=list(history[:n - 1]),
+                currentIteration=n - 1,
+                current_star_answer=star_answer(words=60),
+                current_critique=critique(4.4),
+                highestRating=4.0
+            ))
+
+        def final_state(history=history, base_state=base_state):
+            return BenchCallbackContext(dict(base_state, fullIterationHistory=list(history)))
+
+        def traced_final_formatting(callback_context, trace=trace):
+            # The callback reads timings (and, with TRACE_IN_RESPONSE, the span tree) from the current run's trace
+            with use_trace(trace):
+                return final_formatting_callback(callback_context)
+
+        cases[f"iteration_history_callback[{n}]"] = (history_state, iteration_history_callback)
+        cases[f"final_formatting_callback[{n}]"] = (final_state, traced_final_formatting)
+        cases[f"FinalResponse.model_validate[{n}]"] = (lambda event=event: event, FinalResponse.model_validate)
+        cases[f"prepare_ui_response_from_model[{n}]"] = (lambda v=validated: v, prepare_ui_response_from_model)
+
+    cases["create_error_response"] = (
+        lambda: None,
+        lambda _: create_error_response(
+            "Agent streaming error: connection reset", error_type="connection_error",
+            details={"exception": "connection reset"}, status_code=502, component="cloud_run_agent"
+        )
+    )
+    return cases
+
+
+def measure(case: Case, min_time: float) -> Dict[str, float]:
+    """Best and median microseconds per call over batches of calls"""
+    setup, fn = case
+    batch = 1
+    per_call: List[float] = []
+    started = time.perf_counter()
+    while True:
+        arguments = [setup() for _ in range(batch)]
+        t0 = time.perf_counter()
+        for argument in arguments:
+            fn(argument)
+        elapsed = time.perf_counter() - t0
+        if elapsed < BATCH_SECONDS and not per_call:
+            batch *= 2  # Calibrating: batches too short to time reliably are discarded
+            continue
+        per_call.append(elapsed / batch * 1e6)
+        if time.perf_counter() - started >= min_time and len(per_call) >= 5:
+            break
+    return {"best_us": min(per_call), "median_us": statistics.median(per_call), "batches": len(per_call), "batch": batch}
+
+
+def run_suite(min_time: float = 0.5, names: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+    """Measure every case (or the named ones) with logging and console output suppressed"""
+    cases = build_cases()
+    results = {}
+    logging.disable(logging.CRITICAL)
+    try:
+        with redirect_stdout(io.StringIO()):
+            for name, case in cases.items():
+                if names is None or name in names:
+                    results[name] = measure(case, min_time)
+    finally:
+        logging.disable(logging.NOTSET)
+    return results
+
+
+def environment() -> Dict[str, str]:
+    import pydantic
+    return {"python": platform.python_version(), "pydantic": pydantic.VERSION, "machine": platform.machine()}
+
+
+def load_baseline(path: str = BASELINE_PATH) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-time", type=float, default=0.5, help="Seconds to run each case")
+    parser.add_argument("--save", nargs="?", const=BASELINE_PATH, help="Write the results as a baseline")
+    parser.add_argument("--compare", help="Baseline file to compare against")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = run_suite(args.min_time)
+    baseline = load_baseline(args.compare) if args.compare else None
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
+
+    if args.json:
+        print(json.dumps({"environment": environment(), "results": results, "baseline": baseline}, indent=2))
+        return
+
+    print(f"{'case':<40} {'best us':>10} {'median us':>10} {'baseline':>10} {'change':>8}")
+    for name, r in results.items():
+        base = (baseline or {}).get("results", {}).get(name)
+        if base:
+            change = r["best_us"] / base["best_us"] - 1
+            print(f"{name:<40} {r['best_us']:>10.1f} {r['median_us']:>10.1f} {base['best_us']:>10.1f} {change:>+8.0%}")
+        else:
+            print(f"{name:<40} {r['best_us']:>10.1f} {r['median_us']:>10.1f}")
+    if args.save:
+        print(f"Baseline written to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Near-duplicate question index benchmark.
+
+Fills fastapi_backend.similar_questions.QuestionIndex with synthetic
+behavioral questions spread over role/industry partitions, then measures
+lookup latency for reworded variants (expected hits) and unrelated
+questions (expected misses).
+
+Usage:
+    python -m benchmarks.bench_similar_questions
+    python -m benchmarks.bench_similar_questions --entries 100000 --queries 5000 --json
+"""
+
+import json
+import time
+import random
+import argparse
+import statistics
+from typing import Dict, List, Tuple
+
+from fastapi_backend.similar_questions import QuestionIndex, NEAR_DUP_THRESHOLD
+
+ROLES = ("Product Manager", "Software Engineer", "Data Scientist", "Nurse", "Sales Director", "Designer")
+INDUSTRIES = ("Healthcare", "Finance", "Retail", "Technology", "Education")
+
+_OPENERS = (
+    "Tell me about a time you {}.",
+    "Describe a situation where you {}.",
+    "Give me an example of when you {}.",
+    "Can you share a time you {}?",
+)
+_VERBS = (
+    "handled", "resolved", "managed", "led", "prioritized", "negotiated", "delivered", "escalated",
+    "simplified", "measured", "recovered", "mentored", "influenced", "launched", "redesigned", "automated",
+)
+_OBJECTS = (
+    "conflict", "deadline", "budget", "outage", "stakeholder", "roadmap", "migration", "vendor",
+    "customer", "experiment", "backlog", "hiring", "incident", "forecast", "launch", "audit",
+    "compliance", "onboarding", "pricing", "retention", "analytics", "integration", "release", "security",
+)
+_QUALIFIERS = (
+    "with your manager", "under pressure", "across teams", "with limited data", "for a key account",
+    "without authority", "after a failure", "on a new team", "with a tight budget", "during a reorg",
+)
+
+_EXTRA = ("difficult", "complex", "critical", "urgent", "sensitive")
+
+
+def make_question(rng: random.Random) -> Tuple[str, Tuple[str, ...]]:
+    """A question plus the content words it was built from, so it can be reworded"""
+    words = (rng.choice(_VERBS), rng.choice(_OBJECTS), rng.choice(_OBJECTS), rng.choice(_QUALIFIERS))
+    body = f"{words[0]} a {words[1]} and {words[2]} problem {words[3]}"
+    return rng.choice(_OPENERS).format(body), words
+
+
+def reword(words: Tuple[str, ...], rng: random.Random) -> str:
+    """Same question with a different opener, casing and one extra content word (exercises the LSH path)"""
+    body = f"{words[0]} a really {rng.choice(_EXTRA)} {words[1]} and {words[2]} problem {words[3]}"
+    return rng.choice(_OPENERS).format(body).upper()
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(entries: int, queries: int, threshold: float, seed: int) -> Dict[str, object]:
+    rng = random.Random(seed)
+    index = QuestionIndex(threshold=threshold, max_entries=entries)
+    stored: List[Tuple[str, str, Tuple[str, ...]]] = []
+
+    started = time.perf_counter()
+    for i in range(entries):
+        role, industry = rng.choice(ROLES), rng.choice(INDUSTRIES)
+        question, words = make_question(rng)
+        index.add(role, industry, question, i)
+        stored.append((role, industry, words))
+    build_s = time.perf_counter() - started
+
+    def timed(cases):
+        latencies, found = [], 0
+        for role, industry, question in cases:
+            t0 = time.perf_counter()
+            match = index.query(role, industry, question)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            found += match is not None
+        return {
+            "p50_ms": percentile(latencies, 50),
+            "p99_ms": percentile(latencies, 99),
+            "mean_ms": statistics.fmean(latencies),
+            "max_ms": max(latencies),
+            "match_rate": found / len(cases),
+        }
+
+    near = []
+    for _ in range(queries):
+        role, industry, words = rng.choice(stored)
+        near.append((role, industry, reword(words, rng)))
+    unrelated = [
+        (rng.choice(ROLES), rng.choice(INDUSTRIES), f"How would you explain {rng.choice(_OBJECTS)} trends to a child?")
+        for _ in range(queries)
+    ]
+
+    return {
+        "entries": len(index),
+        "threshold": threshold,
+        "build_s": build_s,
+        "near_duplicates": timed(near),
+        "unrelated": timed(unrelated),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", nargs="*", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--threshold", type=float, default=NEAR_DUP_THRESHOLD)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = [run(n, args.queries, args.threshold, args.seed) for n in args.entries]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'entries':>8} {'build s':>8} {'case':<16} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'matched':>8}")
+    for r in results:
+        for case in ("near_duplicates", "unrelated"):
+            c = r[case]
+            print(
+                f"{r['entries']:>8} {r['build_s']:>8.2f} {case:<16} "
+                f"{c['p50_ms']:>8.3f} {c['p99_ms']:>8.3f} {c['max_ms']:>8.3f} {c['match_rate']:>8.1%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
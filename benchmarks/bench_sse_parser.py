@@ -0,0 +1,168 @@
+"""
+SSE parser throughput benchmark.
+
+Compares the legacy line-by-line parsing previously done in
+CloudRunAgent.stream_query with shared_utils.sse_parser.SSEParser on
+recorded /run_sse streams, replayed in network-sized chunks.
+
+Usage:
+    python -m benchmarks.bench_sse_parser
+    python -m benchmarks.bench_sse_parser --stream recorded.sse --chunk-sizes 512 4096
+
+Record a real stream with:
+    curl -N -X POST $AGENT_URL/run_sse -H 'Content-Type: application/json' -d @run.json > recorded.sse
+"""
+
+import json
+import time
+import argparse
+from typing import Any, Callable, Dict, Iterable, List
+
+from shared_utils.sse_parser import SSEParser, json_loads, JSON_DECODE_ERRORS, JSON_BACKEND
+from benchmarks.payloads import adk_sse_stream
+
+
+def chunked(stream: bytes, size: int) -> List[bytes]:
+    return [stream[i:i + size] for i in range(0, len(stream), size)]
+
+
+def legacy_parse(chunks: Iterable[bytes]) -> List[Dict[str, Any]]:
+    """The pre-SSEParser logic: split on \\n, decode, json.loads event and nested text"""
+    # Reassemble \n-terminated lines from chunks the way aiohttp's StreamReader does
+    def lines():
+        buffer = bytearray()
+        for chunk in chunks:
+            buffer += chunk
+            start = 0
+            while True:
+                end = buffer.find(b"\n", start)
+                if end < 0:
+                    break
+                yield bytes(buffer[start:end + 1])
+                start = end + 1
+            del buffer[:start]
+        if buffer:
+            yield bytes(buffer)
+
+    events = []
+    for line in lines():
+        if not line:
+            continue
+        line_text = line.decode("utf-8").strip()
+        if not line_text.startswith("data: "):
+            continue
+        json_data = line_text[len("data: "):]
+        if not json_data:
+            continue
+        try:
+            adk_event = json.loads(json_data)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(adk_event, dict) and isinstance(adk_event.get("content"), dict):
+            for part in adk_event["content"].get("parts", []):
+                if "text" in part:
+                    try:
+                        events.append(json.loads(part["text"]))
+                    except json.JSONDecodeError:
+                        events.append({"type": "status", "message": part["text"]})
+    return events
+
+
+def sse_parser_parse(chunks: Iterable[bytes]) -> List[Dict[str, Any]]:
+    """SSEParser plus the extraction done by CloudRunAgent._events_from_sse"""
+    parser = SSEParser()
+    events = []
+
+    def extract(sse_event):
+        try:
+            adk_event = sse_event.json()
+        except JSON_DECODE_ERRORS:
+            return
+        content = adk_event.get("content") if isinstance(adk_event, dict) else None
+        if not isinstance(content, dict):
+            return
+        for part in content.get("parts", []):
+            text = part.get("text")
+            if text is None:
+                continue
+            if text.lstrip()[:1] == "{":
+                try:
+                    events.append(json_loads(text))
+                    continue
+                except JSON_DECODE_ERRORS:
+                    pass
+            events.append({"type": "status", "message": text})
+
+    for chunk in chunks:
+        for sse_event in parser.feed(chunk):
+            extract(sse_event)
+    for sse_event in parser.close():
+        extract(sse_event)
+    return events
+
+
+def bench(fn: Callable, chunks: List[bytes], total_bytes: int, min_time: float) -> Dict[str, float]:
+    runs = 0
+    n_events = 0
+    started = time.perf_counter()
+    while True:
+        n_events = len(fn(chunks))
+        runs += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+    per_run = elapsed / runs
+    return {
+        "ms_per_stream": per_run * 1000,
+        "mb_per_s": total_bytes / per_run / 1e6,
+        "events": n_events,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stream", nargs="*", default=[], help="Recorded /run_sse stream files")
+    parser.add_argument("--chunk-sizes", nargs="*", type=int, default=[256, 4096, 65536])
+    parser.add_argument("--iterations", type=int, default=3, help="Refinement iterations in synthetic streams")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds to run each case")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    streams = {}
+    for path in args.stream:
+        with open(path, "rb") as f:
+            streams[path] = f.read()
+    if not streams:
+        streams["synthetic-small"] = adk_sse_stream(args.iterations, resume_chars=0, jd_chars=0)
+        streams["synthetic-large"] = adk_sse_stream(args.iterations)
+
+    results = []
+    for name, stream in streams.items():
+        for size in args.chunk_sizes:
+            chunks = chunked(stream, size)
+            legacy = bench(legacy_parse, chunks, len(stream), args.min_time)
+            new = bench(sse_parser_parse, chunks, len(stream), args.min_time)
+            results.append({
+                "stream": name,
+                "bytes": len(stream),
+                "chunk_size": size,
+                "legacy": legacy,
+                "sse_parser": new,
+                "speedup": legacy["ms_per_stream"] / new["ms_per_stream"],
+            })
+
+    if args.json:
+        print(json.dumps({"json_backend": JSON_BACKEND, "results": results}, indent=2))
+        return
+
+    print(f"JSON backend: {JSON_BACKEND}")
+    print(f"{'stream':<20} {'bytes':>9} {'chunk':>6} {'legacy MB/s':>12} {'parser MB/s':>12} {'speedup':>8}")
+    for r in results:
+        print(
+            f"{r['stream']:<20} {r['bytes']:>9} {r['chunk_size']:>6} "
+            f"{r['legacy']['mb_per_s']:>12.1f} {r['sse_parser']['mb_per_s']:>12.1f} {r['speedup']:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Offline check of the context-cache path.
+
+Runs refiner_agent in-process with the local stand-in model and the local
+context cache backend, using a resume and job description large enough to be
+cached, and verifies that:
+  - one cache is created per run (per model) and every model call uses it,
+  - the resume and job description are never re-sent in a prompt,
+  - the run's caches are released when it finishes.
+
+Usage:
+    python -m benchmarks.check_context_cache
+"""
+
+import os
+
+# Selected before refiner_agent is imported, since its config is read at import time
+os.environ.update({
+    "STAR_GENERATOR_MODEL": "local-stand-in",
+    "STAR_CRITIQUE_MODEL": "local-stand-in",
+    "STAR_REFINER_MODEL": "local-stand-in",
+    "CONTEXT_CACHE_BACKEND": "local",
+    "INPUT_COMPRESSION_ENABLED": "false",  # Compressed inputs are too small to cache
+})
+
+import sys
+import uuid
+import asyncio
+
+from benchmarks.payloads import lorem
+
+
+async def run_check(runs: int) -> int:
+    import random
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from google.genai import types
+    from refiner_agent.agent import root_agent
+    from refiner_agent.context_cache import context_cache
+    from refiner_agent.local_model import STAND_IN_STATS
+
+    rng = random.Random(0)
+    resume = lorem(1500, rng)[:10000]
+    job_description = lorem(2200, rng)[:15000]
+    session_service = InMemorySessionService()
+    runner = Runner(agent=root_agent, app_name="refiner_agent", session_service=session_service)
+
+    for _ in range(runs):
+        session = await session_service.create_session(
+            app_name="refiner_agent", user_id="check", session_id=str(uuid.uuid4()),
+            state={
+                "role": "Product Manager", "industry": "Healthcare",
+                "question": "Tell me about a time you solved a complex problem.",
+                "resume": resume, "jobDescription": job_description
+            }
+        )
+        async for _ in runner.run_async(
+            user_id="check", session_id=session.id,
+            new_message=types.Content(role="user", parts=[types.Part(text="Start")])
+        ):
+            pass
+
+    stats = context_cache.stats()
+    failures = []
+    if stats["created"] != runs:
+        failures.append(f"expected {runs} caches created, got {stats['created']}")
+    if STAND_IN_STATS["cached_calls"] != STAND_IN_STATS["calls"]:
+        failures.append(f"{STAND_IN_STATS['calls'] - STAND_IN_STATS['cached_calls']} model calls bypassed the cache")
+    if stats["released"] != stats["created"] or context_cache.backend.entries:
+        failures.append(f"caches not released: {stats}")
+    if STAND_IN_STATS["prompt_chars"] >= STAND_IN_STATS["calls"] * len(resume):
+        failures.append(f"prompts still carry the background ({STAND_IN_STATS['prompt_chars']} chars)")
+
+    print(f"context cache: {stats}")
+    print(f"stand-in model: {STAND_IN_STATS}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print("OK" if not failures else f"{len(failures)} check(s) failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run_check(runs=2)))
@@ -0,0 +1,234 @@
+"""
+Local stand-in for the Gemini API, for offline end-to-end benchmarks.
+
+Serves models/{model}:generateContent and :streamGenerateContent the way
+the google-genai client calls them in API-key mode, so the agent service
+uses it when started with
+
+    GOOGLE_GENAI_USE_VERTEXAI=FALSE GOOGLE_API_KEY=bench GOOGLE_GEMINI_BASE_URL=http://127.0.0.1:<port>
+
+Responses are schema-valid JSON for the request's response schema
+(STARResponse, Critique or CritiqueAndRefinement). The nth critique of a run
+gets the nth rating of --ratings (the last one repeats), counting the critic's
+own earlier critiques in the conversation, and each call takes
+a log-normally distributed time around --latency-ms. A fraction of calls can
+be rejected with 429 RESOURCE_EXHAUSTED or fail with 500. GET /stats returns
+call counters.
+
+--model-profiles gives models their own median latency and answer quality:
+answers written by a model carry a "(q+0.30)" marker with its quality, and a
+critique of that answer adds the quality to the rating, so generator/refiner
+model choices show up in the ratings.
+
+Usage:
+    python -m benchmarks.fake_gemini --port 8765
+    python -m benchmarks.fake_gemini --port 8765 --latency-ms 1200 --ratings 3.8 4.2 4.6 --rate-429 0.02
+    python -m benchmarks.fake_gemini --model-profiles gemini-2.5-flash=1800:0.3 gemini-2.0-flash-lite=400:-0.2
+"""
+
+import re
+import json
+import math
+import random
+import asyncio
+import argparse
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+from benchmarks.payloads import star_answer, critique
+from shared_utils.critique_turns import is_critique_turn
+
+_CHARS_PER_TOKEN = 4
+_QUALITY_RE = re.compile(r"\(q([+-]\d+\.\d+)\)")
+
+
+class FakeGemini:
+    """Request handler state: response options, random source and counters"""
+
+    def __init__(self, latency_ms: float = 800.0, latency_sigma: float = 0.35, ratings: Sequence[float] = (3.8, 4.2, 4.6),
+                 rating_jitter: float = 0.0, rate_429: float = 0.0, error_rate: float = 0.0,
+                 stream_chunks: int = 8, seed: int = 0, model_profiles: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.ratings = list(ratings) or [4.0]
+        self.rating_jitter = rating_jitter
+        self.rate_429 = rate_429
+        self.error_rate = error_rate
+        self.stream_chunks = max(1, stream_chunks)
+        self.model_profiles = model_profiles or {}  # model -> (median latency ms, answer quality)
+        self.rng = random.Random(seed)
+        self.stats: Counter = Counter()
+
+    def latency(self, model: str = "") -> float:
+        """Seconds for one call: log-normal around the model's median latency"""
+        median_ms = self.model_profiles.get(model, (self.latency_ms, 0.0))[0]
+        return median_ms / 1000 * math.exp(self.rng.gauss(0.0, self.latency_sigma))
+
+    def rating(self, step: int, quality: float = 0.0) -> float:
+        rating = self.ratings[min(step, len(self.ratings) - 1)] + quality
+        if self.rating_jitter:
+            rating += self.rng.uniform(-self.rating_jitter, self.rating_jitter)
+        return round(min(5.0, max(1.0, rating)), 1)
+
+    def answer(self, model: str) -> Dict[str, str]:
+        answer = star_answer(self.rng)
+        if self.model_profiles:
+            answer["result"] += f" (q{self.model_profiles.get(model, (0.0, 0.0))[1]:+.2f})"
+        return answer
+
+    @staticmethod
+    def answer_quality(body: Dict[str, Any]) -> float:
+        """Quality marker of the answer under critique: the last one in the instruction, else in the contents"""
+        for source in (body.get("systemInstruction"), body.get("contents")):
+            markers = _QUALITY_RE.findall(json.dumps(source or ""))
+            if markers:
+                return float(markers[-1])
+        return 0.0
+
+    def payload(self, body: Dict[str, Any], model: str) -> Any:
+        """Response JSON for the request's schema; the step is the number of the critic's earlier critiques"""
+        config = body.get("generationConfig") or {}
+        schema = config.get("responseSchema") or config.get("responseJsonSchema") or {}
+        fields = set((schema.get("properties") or {}).keys())
+        step = sum(
+            1 for content in body.get("contents") or []
+            if is_critique_turn(content.get("role"), (part.get("text") for part in content.get("parts") or []))
+        )
+        if {"critique", "refinedAnswer"} <= fields:
+            self.stats["critique_refinements"] += 1
+            quality = self.answer_quality(body)
+            return {"critique": critique(self.rating(step, quality), self.rng), "refinedAnswer": self.answer(model)}
+        if "rating" in fields:
+            self.stats["critiques"] += 1
+            return critique(self.rating(step, self.answer_quality(body)), self.rng)
+        if "situation" in fields:
+            self.stats["answers"] += 1
+            return self.answer(model)
+        self.stats["other"] += 1
+        return {"text": "ok"}
+
+    @staticmethod
+    def response_chunk(text: str, final: bool, prompt_chars: int, output_chars: int) -> Dict[str, Any]:
+        candidate: Dict[str, Any] = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+        chunk: Dict[str, Any] = {"candidates": [candidate], "modelVersion": "fake-gemini"}
+        if final:
+            candidate["finishReason"] = "STOP"
+            prompt_tokens = prompt_chars // _CHARS_PER_TOKEN
+            output_tokens = output_chars // _CHARS_PER_TOKEN
+            chunk["usageMetadata"] = {
+                "promptTokenCount": prompt_tokens,
+                "candidatesTokenCount": output_tokens,
+                "totalTokenCount": prompt_tokens + output_tokens
+            }
+        return chunk
+
+    @staticmethod
+    def error(status: int, api_status: str, message: str) -> web.Response:
+        return web.json_response({"error": {"code": status, "message": message, "status": api_status}}, status=status)
+
+    async def generate(self, request: web.Request) -> web.StreamResponse:
+        model, _, method = request.match_info["action"].rpartition(":")
+        if method not in ("generateContent", "streamGenerateContent"):
+            return self.error(404, "NOT_FOUND", f"Unknown method {method}")
+        body = await request.json()
+        self.stats["calls"] += 1
+        self.stats[f"model:{model}"] += 1
+
+        roll = self.rng.random()
+        if roll < self.rate_429:
+            self.stats["rejected_429"] += 1
+            return self.error(429, "RESOURCE_EXHAUSTED", "Resource has been exhausted (e.g. check quota).")
+        if roll < self.rate_429 + self.error_rate:
+            self.stats["errors_500"] += 1
+            await asyncio.sleep(self.latency(model) / 2)
+            return self.error(500, "INTERNAL", "An internal error has occurred.")
+
+        text = json.dumps(self.payload(body, model))
+        prompt_chars = len(json.dumps(body.get("contents") or [])) + len(json.dumps(body.get("systemInstruction") or ""))
+        delay = self.latency(model)
+
+        if method == "generateContent":
+            await asyncio.sleep(delay)
+            return web.json_response(self.response_chunk(text, True, prompt_chars, len(text)))
+
+        # Streaming: time to first token is a third of the call, the rest is spread over the chunks
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        size = math.ceil(len(text) / self.stream_chunks)
+        pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        await asyncio.sleep(delay / 3)
+        for i, piece in enumerate(pieces):
+            if i:
+                await asyncio.sleep(delay * 2 / 3 / len(pieces))
+            chunk = self.response_chunk(piece, i == len(pieces) - 1, prompt_chars, len(text))
+            await response.write(f"data: {json.dumps(chunk)}\r\n\r\n".encode())
+        await response.write_eof()
+        return response
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(dict(self.stats))
+
+    async def health(self, request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok"})
+
+    def make_app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/{version}/models/{action}", self.generate)
+        app.router.add_get("/stats", self.get_stats)
+        app.router.add_get("/health", self.health)
+        return app
+
+
+def add_fake_gemini_arguments(parser: argparse.ArgumentParser) -> None:
+    """Response options shared with the benchmarks that start this server"""
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="Median model call latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.35, help="Log-normal spread of the latency")
+    parser.add_argument("--ratings", nargs="*", type=float, default=[3.8, 4.2, 4.6], help="Rating of the nth critique of a run")
+    parser.add_argument("--rating-jitter", type=float, default=0.0, help="Uniform +/- noise added to each rating")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of calls rejected with 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls failing with 500")
+    parser.add_argument("--stream-chunks", type=int, default=8, help="Chunks per streamed response")
+    parser.add_argument("--model-profiles", nargs="*", default=[], metavar="MODEL=LATENCY_MS:QUALITY",
+                        help="Per-model median latency and rating offset of the answers it writes")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def parse_model_profiles(items: List[str]) -> Dict[str, Tuple[float, float]]:
+    profiles = {}
+    for item in items:
+        model, _, profile = item.partition("=")
+        latency_ms, _, quality = profile.partition(":")
+        profiles[model] = (float(latency_ms), float(quality or 0.0))
+    return profiles
+
+
+def fake_gemini_argv(args: argparse.Namespace) -> List[str]:
+    """Command-line options reproducing the parsed response options"""
+    return [
+        "--latency-ms", str(args.latency_ms), "--latency-sigma", str(args.latency_sigma),
+        "--ratings", *[str(r) for r in args.ratings], "--rating-jitter", str(args.rating_jitter),
+        "--rate-429", str(args.rate_429), "--error-rate", str(args.error_rate),
+        "--stream-chunks", str(args.stream_chunks), "--seed", str(args.seed),
+        "--model-profiles", *args.model_profiles,
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_fake_gemini_arguments(parser)
+    args = parser.parse_args()
+
+    fake = FakeGemini(
+        latency_ms=args.latency_ms, latency_sigma=args.latency_sigma, ratings=args.ratings,
+        rating_jitter=args.rating_jitter, rate_429=args.rate_429, error_rate=args.error_rate,
+        stream_chunks=args.stream_chunks, seed=args.seed, model_profiles=parse_model_profiles(args.model_profiles)
+    )
+    web.run_app(fake.make_app(), host=args.host, port=args.port, print=None, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Realistic payload builders shared by the benchmarks.
+
+Produces plain dicts shaped like the schemas in schemas.py and ADK SSE
+streams shaped like the agent service's /run_sse output.
+"""
+
+import json
+import random
+import uuid
+import datetime
+from typing import Any, Dict, List, Optional
+
+_WORDS = (
+    "stakeholder roadmap delivered migration latency reduced customer backlog prioritized "
+    "cross-functional launched analytics pipeline revenue retention onboarding compliance "
+    "platform incident escalation mentored hiring budget forecast experiment conversion "
+    "dashboard vendor integration sprint release quality automation reliability"
+).split()
+
+
+def lorem(n_words: int, rng: Optional[random.Random] = None) -> str:
+    """Deterministic filler text of roughly n_words words"""
+    rng = rng or random.Random(n_words)
+    return " ".join(rng.choice(_WORDS) for _ in range(n_words)).capitalize() + "."
+
+
+def star_answer(rng: Optional[random.Random] = None, words: int = 60) -> Dict[str, str]:
+    """A STARResponse-shaped dict"""
+    rng = rng or random.Random(words)
+    return {field: lorem(words, rng) for field in ("situation", "task", "action", "result")}
+
+
+def critique(rating: float, rng: Optional[random.Random] = None) -> Dict[str, Any]:
+    """A Critique-shaped dict"""
+    rng = rng or random.Random(int(rating * 10))
+    return {
+        "rating": rating,
+        "structureFeedback": lorem(30, rng),
+        "relevanceFeedback": lorem(30, rng),
+        "specificityFeedback": lorem(30, rng),
+        "professionalImpactFeedback": lorem(30, rng),
+        "suggestions": [lorem(15, rng) for _ in range(3)],
+        "rawCritiqueText": None,
+        "feedback": lorem(40, rng),
+    }
+
+
+def final_response(
+    iterations: int = 3,
+    resume_chars: int = 10000,
+    jd_chars: int = 15000,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """A FinalResponse-shaped dict with the given number of iterations and input sizes"""
+    rng = random.Random(seed)
+    now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    ratings = [round(min(5.0, 3.6 + 0.4 * i), 1) for i in range(iterations)]
+    return {
+        "metadata": {
+            "role": "Product Manager",
+            "industry": "Healthcare",
+            "question": "Tell me about a time you solved a complex problem.",
+            "resume": lorem(resume_chars // 8, rng)[:resume_chars],
+            "jobDescription": lorem(jd_chars // 8, rng)[:jd_chars],
+            "status": "COMPLETED",
+            "createdAt": now,
+            "userId": "bench-user",
+        },
+        "iterations": [
+            {
+                "iterationNumber": i + 1,
+                "starAnswer": star_answer(rng),
+                "critique": critique(ratings[i], rng),
+                "timestamp": now,
+            }
+            for i in range(iterations)
+        ],
+        "performanceMetrics": {
+            "totalWorkflowTime": 18.2,
+            "generationTime": 4.1,
+            "critiqueTimes": [2.3] * iterations,
+            "refinementTimes": [3.9] * max(0, iterations - 1),
+        },
+    }
+
+
+def adk_event(author: str, text: str, invocation_id: str) -> Dict[str, Any]:
+    """An ADK Event as serialized by /run_sse (exclude_none, by_alias)"""
+    return {
+        "content": {"parts": [{"text": text}], "role": "model"},
+        "invocationId": invocation_id,
+        "author": author,
+        "actions": {"stateDelta": {}, "artifactDelta": {}, "requestedAuthConfigs": {}},
+        "id": str(uuid.uuid4()),
+        "timestamp": 1760000000.0,
+    }
+
+
+def adk_sse_stream(
+    iterations: int = 3,
+    resume_chars: int = 10000,
+    jd_chars: int = 15000,
+    line_ending: bytes = b"\n",
+    seed: int = 0
+) -> bytes:
+    """A complete /run_sse byte stream for one refinement run.
+
+    One event per sub-agent output (generator, critique, refiner) followed by the
+    indent=2 FinalResponse emitted by final_formatting_callback.
+    """
+    rng = random.Random(seed)
+    invocation_id = f"e-{uuid.uuid4()}"
+    events: List[Dict[str, Any]] = [adk_event("STARAnswerGenerator", json.dumps(star_answer(rng)), invocation_id)]
+    for i in range(iterations):
+        events.append(adk_event("STARAnswerCritic", json.dumps(critique(3.6 + 0.4 * i, rng)), invocation_id))
+        if i < iterations - 1:
+            events.append(adk_event("STARAnswerRefiner", json.dumps(star_answer(rng)), invocation_id))
+    final = final_response(iterations, resume_chars, jd_chars, seed)
+    events.append(adk_event("refiner_agent_sequential_flow", json.dumps(final, indent=2), invocation_id))
+
+    frames = [b"data: " + json.dumps(event).encode() + line_ending + line_ending for event in events]
+    return b"".join(frames)
@@ -0,0 +1,336 @@
+"""
+Record/replay harness for refiner_agent runs.
+
+record: runs root_agent in-process through an ADK Runner with every LlmAgent's
+model wrapped by a recorder, and writes one fixture per run with the initial
+state, each model call (agent, model, start offset, every response chunk and
+when it arrived) and each ADK event with its offset. Uses the configured
+models, so it needs the agent service's credentials - or point it at
+benchmarks/fake_gemini.py or the local-* stand-in model.
+
+replay: runs the same STAROrchestrator with every LlmAgent's model replaced by
+the recorded responses, either in real time (chunks arrive when they did) or
+with zero latency. Zero-latency replay measures pure orchestration overhead
+(callbacks, Pydantic validation, state persistence); real-time replay shows
+how much the orchestration adds to recorded model time. Each replay is checked
+against the recording (same model calls, same final iterations and ratings).
+
+Agent settings (refiner_agent/config.py) must match the recording; they are
+stored in the fixture and a mismatch is reported.
+
+Usage:
+    python -m benchmarks.record_replay record --out-dir benchmarks/fixtures
+    python -m benchmarks.record_replay replay benchmarks/fixtures/*.json --repeats 20
+    python -m benchmarks.record_replay replay benchmarks/fixtures/*.json --realtime --session-db --json
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import datetime
+import tempfile
+import statistics
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import DatabaseSessionService, InMemorySessionService
+from google.genai import types
+
+from benchmarks.bench_refinement_mode import QUESTIONS
+
+FIXTURE_VERSION = 1
+APP_NAME = "refiner_agent"
+USER_ID = "bench-user"
+
+
+class ReplayMismatch(Exception):
+    """The replayed run asked for a model call the recording does not have"""
+
+
+class RecordingLlm(BaseLlm):
+    """Passes requests to the agent's real model and records each response chunk with its timing"""
+
+    inner: BaseLlm
+    agent_name: str
+    recording: Any  # The run's Recording
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        started = time.perf_counter()
+        call = {
+            "agent": self.agent_name,
+            "model": llm_request.model,
+            "stream": stream,
+            "started_s": started - self.recording.started,
+            "responses": []
+        }
+        self.recording.llm_calls.append(call)
+        async for response in self.inner.generate_content_async(llm_request, stream=stream):
+            call["responses"].append({
+                "delay_s": time.perf_counter() - started,
+                "response": response.model_dump(mode="json", exclude_none=True)
+            })
+            yield response
+
+
+class ReplayLlm(BaseLlm):
+    """Serves one agent's recorded model calls in order, in real time or with zero latency"""
+
+    agent_name: str
+    calls: List[Dict[str, Any]]
+    realtime: bool = False
+    cursor: int = 0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        if self.cursor >= len(self.calls):
+            raise ReplayMismatch(f"{self.agent_name} made more than the {len(self.calls)} recorded model calls")
+        call = self.calls[self.cursor]
+        self.cursor += 1
+        started = time.perf_counter()
+        for item in call["responses"]:
+            if self.realtime:
+                await asyncio.sleep(max(0.0, item["delay_s"] - (time.perf_counter() - started)))
+            else:
+                await asyncio.sleep(0)  # Still yield to concurrent agents, as a real call would
+            yield LlmResponse.model_validate(item["response"])
+
+
+class Recording:
+    """Model calls and events of one run, with offsets from its start"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.llm_calls: List[Dict[str, Any]] = []
+        self.events: List[Dict[str, Any]] = []
+
+
+def llm_agents(agent: BaseAgent) -> Dict[str, LlmAgent]:
+    """Every LlmAgent in the tree by name (agents shared by several parents appear once)"""
+    found: Dict[str, LlmAgent] = {}
+    pending = [agent]
+    while pending:
+        current = pending.pop()
+        if isinstance(current, LlmAgent):
+            found[current.name] = current
+        pending.extend(current.sub_agents)
+    return found
+
+
+def agent_settings() -> Dict[str, Any]:
+    """The settings in refiner_agent/config.py, which decide the shape of a run"""
+    from refiner_agent import config
+    return {
+        name: value for name, value in vars(config).items()
+        if name.isupper() and isinstance(value, (str, int, float, bool, list, tuple))
+    }
+
+
+def final_summary(events: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Iteration count and ratings of the FinalResponse in a run's events"""
+    for event in reversed(events):
+        for part in (event.get("content") or {}).get("parts") or []:
+            text = (part.get("text") or "").strip()
+            if text.startswith("{") and '"performanceMetrics"' in text:
+                final = json.loads(text)
+                return {
+                    "iterations": len(final["iterations"]),
+                    "ratings": [it["critique"]["rating"] for it in final["iterations"]],
+                    "stopReason": final["performanceMetrics"].get("stopReason")
+                }
+    return None
+
+
+def make_session_service(session_db: bool):
+    if session_db:
+        path = os.path.join(tempfile.mkdtemp(prefix="replay_"), "sessions.db")
+        return DatabaseSessionService(db_url=f"sqlite:///{path}")
+    return InMemorySessionService()
+
+
+async def run_agent(runner: Runner, session_service, state: Dict[str, Any], recording: Recording) -> float:
+    """Run the agent once from the given initial state, appending its events to the recording"""
+    session = await session_service.create_session(
+        app_name=APP_NAME, user_id=USER_ID, session_id=str(uuid.uuid4()), state=dict(state)
+    )
+    recording.started = time.perf_counter()
+    async for event in runner.run_async(
+        user_id=USER_ID,
+        session_id=session.id,
+        new_message=types.Content(role="user", parts=[types.Part(text="Start")])
+    ):
+        recording.events.append({
+            "offset_s": time.perf_counter() - recording.started,
+            "event": event.model_dump(mode="json", exclude_none=True)
+        })
+    return time.perf_counter() - recording.started
+
+
+async def record(args) -> List[str]:
+    from refiner_agent.agent import root_agent
+
+    agents = llm_agents(root_agent)
+    session_service = make_session_service(args.session_db)
+    runner = Runner(agent=root_agent, app_name=APP_NAME, session_service=session_service)
+    os.makedirs(args.out_dir, exist_ok=True)
+    written = []
+    for i, (role, industry, question) in enumerate(QUESTIONS[:args.count]):
+        recording = Recording()
+        originals = {}
+        for name, agent in agents.items():
+            originals[name] = agent.model
+            inner = agent.canonical_model
+            agent.model = RecordingLlm(model=inner.model, inner=inner, agent_name=name, recording=recording)
+        try:
+            state = {"role": role, "industry": industry, "question": question, "resume": "", "jobDescription": ""}
+            wall = await run_agent(runner, session_service, state, recording)
+        finally:
+            for name, agent in agents.items():
+                agent.model = originals[name]
+
+        fixture = {
+            "version": FIXTURE_VERSION,
+            "recordedAt": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "settings": agent_settings(),
+            "state": state,
+            "wall_s": wall,
+            "llm_calls": recording.llm_calls,
+            "events": recording.events,
+            "final": final_summary([e["event"] for e in recording.events])
+        }
+        path = os.path.join(args.out_dir, f"run_{i + 1:02d}.json")
+        with open(path, "w") as f:
+            json.dump(fixture, f)
+        written.append(path)
+        print(f"Recorded {path}: {len(recording.llm_calls)} model calls, {len(recording.events)} events, {wall:.2f}s")
+    return written
+
+
+async def replay_fixture(root_agent, fixture: Dict[str, Any], args) -> Dict[str, Any]:
+    agents = llm_agents(root_agent)
+    calls_by_agent: Dict[str, List[Dict[str, Any]]] = {name: [] for name in agents}
+    for call in fixture["llm_calls"]:
+        calls_by_agent.setdefault(call["agent"], []).append(call)
+    unknown = sorted(set(calls_by_agent) - set(agents))
+    if unknown:
+        return {"error": f"recorded agents not in the current tree: {unknown}"}
+
+    session_service = make_session_service(args.session_db)
+    runner = Runner(agent=root_agent, app_name=APP_NAME, session_service=session_service)
+    originals = {name: agent.model for name, agent in agents.items()}
+    walls, error = [], None
+    try:
+        for _ in range(args.repeats):
+            replays = {}
+            for name, agent in agents.items():
+                replays[name] = ReplayLlm(
+                    model=f"replay-{name}", agent_name=name, calls=calls_by_agent[name], realtime=args.realtime
+                )
+                agent.model = replays[name]
+            recording = Recording()
+            try:
+                walls.append(await run_agent(runner, session_service, fixture["state"], recording))
+            except ReplayMismatch as e:
+                error = str(e)
+                break
+            unused = {name: len(r.calls) - r.cursor for name, r in replays.items() if r.cursor < len(r.calls)}
+            final = final_summary([e["event"] for e in recording.events])
+            if unused or final != fixture["final"]:
+                error = f"diverged from recording (unused calls {unused}, final {final} vs {fixture['final']})"
+                break
+    finally:
+        for name, agent in agents.items():
+            agent.model = originals[name]
+
+    result: Dict[str, Any] = {"runs": len(walls), "recorded_wall_s": fixture["wall_s"], "error": error}
+    if walls:
+        ordered = sorted(walls)
+        result.update({
+            "wall_p50_s": statistics.median(walls),
+            "wall_p95_s": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            "wall_min_s": ordered[0],
+            "model_calls": len(fixture["llm_calls"]),
+            "events": len(fixture["events"]),
+        })
+    return result
+
+
+async def replay(args) -> List[Dict[str, Any]]:
+    from refiner_agent.agent import root_agent
+
+    settings = agent_settings()
+    results = []
+    for path in args.fixtures:
+        with open(path) as f:
+            fixture = json.load(f)
+        if fixture.get("version") != FIXTURE_VERSION:
+            results.append({"fixture": path, "error": f"fixture version {fixture.get('version')}"})
+            continue
+        # JSON turns tuples into lists; compare in the same form
+        recorded_settings = fixture.get("settings", {})
+        changed = sorted(
+            name for name in set(settings) | set(recorded_settings)
+            if json.loads(json.dumps(settings.get(name))) != recorded_settings.get(name)
+        )
+        result = await replay_fixture(root_agent, fixture, args)
+        result["fixture"] = path
+        if changed:
+            result["settings_changed"] = changed
+        results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="Record runs of root_agent to fixture files")
+    record_parser.add_argument("--out-dir", default="benchmarks/fixtures")
+    record_parser.add_argument("--count", type=int, default=len(QUESTIONS), help="Runs to record (one per question)")
+    record_parser.add_argument("--session-db", action="store_true", help="Use a SQLite DatabaseSessionService, as app.py does")
+
+    replay_parser = commands.add_parser("replay", help="Replay fixtures with the model layer stubbed")
+    replay_parser.add_argument("fixtures", nargs="+")
+    replay_parser.add_argument("--repeats", type=int, default=10, help="Replays per fixture")
+    replay_parser.add_argument("--realtime", action="store_true", help="Deliver responses with their recorded timing")
+    replay_parser.add_argument("--session-db", action="store_true", help="Use a SQLite DatabaseSessionService, as app.py does")
+    replay_parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        asyncio.run(record(args))
+        return
+
+    # Replayed requests name no real model, so caches stay in-process (the callbacks still run)
+    if os.getenv("CONTEXT_CACHE_BACKEND", "off").strip().lower() == "gemini":
+        os.environ["CONTEXT_CACHE_BACKEND"] = "local"
+    results = asyncio.run(replay(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    mode = "real time" if args.realtime else "zero latency"
+    print(f"Replay ({mode}, {'sqlite' if args.session_db else 'in-memory'} sessions)")
+    print(f"{'fixture':<32} {'runs':>5} {'calls':>6} {'p50 ms':>9} {'p95 ms':>9} {'recorded s':>11}")
+    for r in results:
+        name = os.path.basename(r["fixture"])
+        if "wall_p50_s" in r:
+            print(
+                f"{name:<32} {r['runs']:>5} {r['model_calls']:>6} {r['wall_p50_s'] * 1000:>9.1f} "
+                f"{r['wall_p95_s'] * 1000:>9.1f} {r['recorded_wall_s']:>11.2f}"
+            )
+        if r.get("error"):
+            print(f"{name:<32} error: {r['error']}")
+        if r.get("settings_changed"):
+            print(f"{name:<32} settings differ from the recording: {', '.join(r['settings_changed'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Local service processes for the end-to-end benchmarks.
+
+Starts a service as a subprocess on a free port, waits for its health
+endpoint, and stops it again; output goes to a log file so a failed
+startup can be diagnosed:
+
+    with Service("agent", [sys.executable, "app.py"], env, health_url, log_dir) as agent:
+        ...
+"""
+
+import os
+import time
+import socket
+import subprocess
+import urllib.request
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    """A TCP port that is free right now on localhost"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def service_env(**overrides: str) -> Dict[str, str]:
+    """This process's environment with the repo importable and the given overrides"""
+    env = dict(os.environ)
+    env.pop("K_SERVICE", None)  # Would switch app.py to its Cloud Run configuration
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (ROOT, env.get("PYTHONPATH")) if p)
+    env.update(overrides)
+    return env
+
+
+class Service:
+    """A subprocess that is ready once health_url answers 200"""
+
+    def __init__(self, name: str, cmd: List[str], env: Dict[str, str], health_url: str,
+                 log_dir: str, cwd: str = ROOT, startup_timeout: float = 60.0):
+        self.name = name
+        self.cmd = cmd
+        self.env = env
+        self.health_url = health_url
+        self.cwd = cwd
+        self.startup_timeout = startup_timeout
+        self.log_path = os.path.join(log_dir, f"{name}.log")
+        self.process: Optional[subprocess.Popen] = None
+
+    def start(self) -> "Service":
+        log = open(self.log_path, "wb")
+        self.process = subprocess.Popen(self.cmd, env=self.env, cwd=self.cwd, stdout=log, stderr=subprocess.STDOUT)
+        log.close()
+
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"{self.name} exited with {self.process.returncode}; see {self.log_path}")
+            try:
+                with urllib.request.urlopen(self.health_url, timeout=2) as response:
+                    if response.status == 200:
+                        return self
+            except OSError:
+                pass
+            time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f"{self.name} not healthy after {self.startup_timeout:.0f}s; see {self.log_path}")
+
+    def stop(self) -> None:
+        if self.process is None or self.process.poll() is not None:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+    def __enter__(self) -> "Service":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
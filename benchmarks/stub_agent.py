@@ -0,0 +1,108 @@
+"""
+Stub agent service for backend benchmarks.
+
+Answers the routes the backend's CloudRunAgent uses (/run_sse_with_state,
+session creation and /run_sse) with a canned ADK event stream shaped like a
+real refinement run: generator, critique and refiner outputs, optional
+partial chunks before each of them, and the final FinalResponse, spread
+evenly over --stream-seconds. Payload size follows --iterations,
+--resume-chars and --jd-chars.
+
+Usage:
+    python -m benchmarks.stub_agent --port 8766
+    python -m benchmarks.stub_agent --port 8766 --stream-seconds 2 --partials 8 --resume-chars 10000 --jd-chars 15000
+"""
+
+import json
+import uuid
+import asyncio
+import argparse
+from collections import Counter
+from typing import List
+
+from aiohttp import web
+
+from benchmarks.payloads import adk_event, adk_sse_stream
+
+
+def build_frames(iterations: int, resume_chars: int, jd_chars: int, partials: int) -> List[bytes]:
+    """SSE frames of one run, with partial chunks of each sub-agent output before it"""
+    frames = []
+    for frame in adk_sse_stream(iterations, resume_chars, jd_chars).split(b"\n\n"):
+        if not frame.strip():
+            continue
+        event = json.loads(frame[len(b"data: "):])
+        text = event["content"]["parts"][0]["text"]
+        if partials and '"performanceMetrics"' not in text:
+            size = max(1, -(-len(text) // partials))
+            for i in range(0, len(text), size):
+                partial = adk_event(event["author"], text[i:i + size], event["invocationId"])
+                partial["partial"] = True
+                frames.append(b"data: " + json.dumps(partial).encode() + b"\n\n")
+        frames.append(frame + b"\n\n")
+    return frames
+
+
+class StubAgent:
+    """Streams the same canned run for every request"""
+
+    def __init__(self, frames: List[bytes], stream_seconds: float):
+        self.frames = frames
+        self.interval = stream_seconds / max(1, len(frames))
+        self.stats: Counter = Counter()
+
+    async def run_sse(self, request: web.Request) -> web.StreamResponse:
+        await request.read()
+        self.stats["runs"] += 1
+        self.stats["in_flight"] += 1
+        self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+        try:
+            response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+            await response.prepare(request)
+            for frame in self.frames:
+                await asyncio.sleep(self.interval)
+                await response.write(frame)
+            await response.write_eof()
+            return response
+        finally:
+            self.stats["in_flight"] -= 1
+
+    async def create_session(self, request: web.Request) -> web.Response:
+        state = await request.json()
+        self.stats["sessions"] += 1
+        return web.json_response({"id": request.match_info["session_id"] or str(uuid.uuid4()), "state": state})
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(dict(self.stats))
+
+    async def health(self, request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok"})
+
+    def make_app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/run_sse_with_state", self.run_sse)
+        app.router.add_post("/run_sse", self.run_sse)
+        app.router.add_post("/apps/{app_name}/users/{user_id}/sessions/{session_id}", self.create_session)
+        app.router.add_get("/stats", self.get_stats)
+        app.router.add_get("/health", self.health)
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--stream-seconds", type=float, default=2.0, help="Duration of each streamed run")
+    parser.add_argument("--partials", type=int, default=8, help="Partial chunks before each sub-agent output (0 for none)")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--resume-chars", type=int, default=10000)
+    parser.add_argument("--jd-chars", type=int, default=15000)
+    args = parser.parse_args()
+
+    frames = build_frames(args.iterations, args.resume_chars, args.jd_chars, args.partials)
+    stub = StubAgent(frames, args.stream_seconds)
+    web.run_app(stub.make_app(), host=args.host, port=args.port, print=None, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
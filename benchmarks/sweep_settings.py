@@ -0,0 +1,222 @@
+"""
+Parameter sweep over RATING_THRESHOLD, MAX_ITERATIONS and per-stage models.
+
+Runs the question corpus of bench_refinement_mode through root_agent for
+every combination of --thresholds, --max-iterations and --models, each
+combination in its own subprocess (the settings are read at import time),
+and reports mean latency against mean final (best) rating, marking the
+Pareto frontier: the settings no other combination beats on both.
+
+Response sources:
+- simulated (default): benchmarks/fake_gemini.py, with --model-profiles
+  giving each model its own latency and answer quality
+- recorded: fixtures from benchmarks/record_replay.py, replayed in real time.
+  Record with RATING_THRESHOLD=5.0 and MAX_ITERATIONS at the largest cap so
+  every round is available; model choice is fixed by the recording.
+- live: the configured Gemini models (needs credentials, costs quota)
+
+A model set is a comma-separated list of stage=model with stages gen,
+critique and refine, e.g. "gen=gemini-2.0-flash,refine=gemini-2.5-flash".
+
+Usage:
+    python -m benchmarks.sweep_settings
+    python -m benchmarks.sweep_settings --thresholds 4.2 4.4 4.6 --max-iterations 2 3 4 \\
+        --models default refine=gemini-2.5-flash --model-profiles gemini-2.5-flash=1800:0.3 --json
+    python -m benchmarks.sweep_settings --source recorded --fixtures benchmarks/fixtures/*.json
+"""
+
+import os
+import sys
+import json
+import asyncio
+import argparse
+import itertools
+import statistics
+import subprocess
+import tempfile
+from typing import Any, Dict, List
+
+from benchmarks.fake_gemini import add_fake_gemini_arguments, fake_gemini_argv
+from benchmarks.services import Service, free_port, service_env
+
+STAGE_SETTINGS = {
+    "gen": "STAR_GENERATOR_MODEL",
+    "critique": "STAR_CRITIQUE_MODEL",
+    "refine": "STAR_REFINER_MODEL",
+}
+
+
+def model_env(model_set: str) -> Dict[str, str]:
+    """Settings for a model set; "default" keeps the configured models"""
+    if model_set == "default":
+        return {}
+    env = {}
+    for item in model_set.split(","):
+        stage, _, model = item.partition("=")
+        if stage not in STAGE_SETTINGS or not model:
+            raise ValueError(f"Invalid model set entry {item!r}; expected one of {sorted(STAGE_SETTINGS)}=MODEL")
+        env[STAGE_SETTINGS[stage]] = model
+    return env
+
+
+async def worker_questions(repeats: int) -> List[Dict[str, Any]]:
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from refiner_agent.agent import root_agent
+    from benchmarks.bench_refinement_mode import QUESTIONS, run_once
+
+    session_service = InMemorySessionService()
+    runner = Runner(agent=root_agent, app_name="refiner_agent", session_service=session_service)
+    results = []
+    for _ in range(repeats):
+        for role, industry, question in QUESTIONS:
+            try:
+                results.append(await run_once(runner, session_service, role, industry, question))
+            except Exception as e:
+                results.append({"question": question, "error": f"{type(e).__name__}: {e}"[:120]})
+    return results
+
+
+async def worker_fixtures(fixtures: List[str], repeats: int) -> List[Dict[str, Any]]:
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from refiner_agent.agent import root_agent
+    from benchmarks.bench_refinement_mode import run_once
+    from benchmarks.record_replay import ReplayLlm, ReplayMismatch, llm_agents
+
+    agents = llm_agents(root_agent)
+    session_service = InMemorySessionService()
+    runner = Runner(agent=root_agent, app_name="refiner_agent", session_service=session_service)
+    results = []
+    for _ in range(repeats):
+        for path in fixtures:
+            with open(path) as f:
+                fixture = json.load(f)
+            # Rounds beyond the current settings simply stay unused
+            for name, agent in agents.items():
+                calls = [call for call in fixture["llm_calls"] if call["agent"] == name]
+                agent.model = ReplayLlm(model=f"replay-{name}", agent_name=name, calls=calls, realtime=True)
+            state = fixture["state"]
+            try:
+                results.append(await run_once(runner, session_service, state["role"], state["industry"], state["question"]))
+            except ReplayMismatch as e:
+                results.append({"question": state["question"], "error": f"recording too short: {e}"})
+    return results
+
+
+def summarize(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    ok = [r for r in runs if "error" not in r]
+    summary: Dict[str, Any] = {"runs": len(runs), "errors": len(runs) - len(ok)}
+    if ok:
+        summary.update({
+            "latency_mean_s": statistics.fmean(r["wall_s"] for r in ok),
+            "latency_p50_s": statistics.median(r["wall_s"] for r in ok),
+            "rating_mean": statistics.fmean(r["best_rating"] for r in ok),
+            "rating_min": min(r["best_rating"] for r in ok),
+            "rounds_mean": statistics.fmean(r["rounds"] for r in ok),
+        })
+    return summary
+
+
+def pareto_frontier(points: List[Dict[str, Any]]) -> None:
+    """Mark points that no other point matches or beats on both latency and rating (strictly on one)"""
+    valid = [p for p in points if "rating_mean" in p]
+    for p in points:
+        p["pareto"] = "rating_mean" in p and not any(
+            q is not p
+            and q["latency_mean_s"] <= p["latency_mean_s"] and q["rating_mean"] >= p["rating_mean"]
+            and (q["latency_mean_s"] < p["latency_mean_s"] or q["rating_mean"] > p["rating_mean"])
+            for q in valid
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--thresholds", nargs="*", type=float, default=[4.2, 4.4, 4.6, 4.8])
+    parser.add_argument("--max-iterations", nargs="*", type=int, default=[2, 3, 4])
+    parser.add_argument("--models", nargs="*", default=["default"], help="Model sets (see above)")
+    parser.add_argument("--source", choices=["simulated", "recorded", "live"], default="simulated")
+    parser.add_argument("--fixtures", nargs="*", default=[], help="Recorded runs (--source recorded)")
+    parser.add_argument("--repeats", type=int, default=1, help="Runs per question (or fixture) per combination")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    add_fake_gemini_arguments(parser)
+    args = parser.parse_args()
+
+    if args.worker:
+        if args.fixtures:
+            runs = asyncio.run(worker_fixtures(args.fixtures, args.repeats))
+        else:
+            runs = asyncio.run(worker_questions(args.repeats))
+        print(json.dumps(runs))
+        return
+
+    if args.source == "recorded" and not args.fixtures:
+        parser.error("--source recorded needs --fixtures")
+    if args.source == "recorded" and args.models != ["default"]:
+        parser.error("Model sets cannot be swept over recorded responses")
+
+    base_env = {"CONTEXT_CACHE_BACKEND": "off" if args.source != "live" else os.getenv("CONTEXT_CACHE_BACKEND", "off")}
+    worker_cmd = [sys.executable, "-m", "benchmarks.sweep_settings", "--worker", "--repeats", str(args.repeats)]
+    if args.source == "recorded":
+        worker_cmd += ["--fixtures", *args.fixtures]
+
+    log_dir = tempfile.mkdtemp(prefix="sweep_")
+    fake = None
+    if args.source == "simulated":
+        port = free_port()
+        fake = Service(
+            "fake_gemini",
+            [sys.executable, "-m", "benchmarks.fake_gemini", "--port", str(port), *fake_gemini_argv(args)],
+            service_env(), f"http://127.0.0.1:{port}/health", log_dir
+        ).start()
+        base_env.update(
+            GOOGLE_GENAI_USE_VERTEXAI="FALSE",
+            GOOGLE_API_KEY="sweep-key",
+            GOOGLE_GEMINI_BASE_URL=f"http://127.0.0.1:{port}"
+        )
+
+    points = []
+    try:
+        for threshold, max_iterations, model_set in itertools.product(args.thresholds, args.max_iterations, args.models):
+            env = service_env(
+                RATING_THRESHOLD=str(threshold),
+                MAX_ITERATIONS=str(max_iterations),
+                **base_env,
+                **model_env(model_set)
+            )
+            completed = subprocess.run(worker_cmd, env=env, capture_output=True, text=True)
+            point: Dict[str, Any] = {"threshold": threshold, "max_iterations": max_iterations, "models": model_set}
+            if completed.returncode != 0:
+                point.update({"runs": 0, "errors": 1, "failure": completed.stderr.strip().splitlines()[-1:]})
+            else:
+                # The agent logs to stdout as well; the results are the last line
+                point.update(summarize(json.loads(completed.stdout.strip().splitlines()[-1])))
+            points.append(point)
+            if not args.json:
+                print(f"  threshold={threshold} max_iterations={max_iterations} models={model_set}: done", file=sys.stderr)
+    finally:
+        if fake is not None:
+            fake.stop()
+
+    pareto_frontier(points)
+
+    if args.json:
+        print(json.dumps({"source": args.source, "points": points}, indent=2))
+        return
+
+    print(f"Source: {args.source}")
+    print(f"{'threshold':>9} {'max it':>6} {'models':<36} {'runs':>5} {'err':>4} {'lat mean':>9} {'lat p50':>8} {'rating':>7} {'min':>5} {'rounds':>7} {'pareto':>7}")
+    for p in sorted(points, key=lambda p: p.get("latency_mean_s", float("inf"))):
+        if "rating_mean" not in p:
+            print(f"{p['threshold']:>9.2f} {p['max_iterations']:>6} {p['models']:<36} {p['runs']:>5} {p['errors']:>4}  {p.get('failure', '')}")
+            continue
+        print(
+            f"{p['threshold']:>9.2f} {p['max_iterations']:>6} {p['models']:<36} {p['runs']:>5} {p['errors']:>4} "
+            f"{p['latency_mean_s']:>9.2f} {p['latency_p50_s']:>8.2f} {p['rating_mean']:>7.2f} {p['rating_min']:>5.1f} "
+            f"{p['rounds_mean']:>7.2f} {'*' if p['pareto'] else '':>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Regression gate for the serialization hot paths.
+
+Fails when a case of benchmarks/bench_serialization.py is slower than its
+stored baseline by more than SERIALIZATION_TOLERANCE (default 25%). Compares
+the best batch time, which is the least sensitive to machine noise; the
+baseline must come from the machine (or CI runner type) the check runs on:
+
+    python -m benchmarks.bench_serialization --save
+    SERIALIZATION_GATE=true python -m pytest benchmarks/test_serialization_regression.py
+
+The gate is opt-in: it runs only with SERIALIZATION_GATE=true, so a CI job
+enables it once a baseline recorded on that job's runner type is committed.
+An enabled gate with no baseline fails rather than skipping, so a missing
+baseline cannot pass silently. SERIALIZATION_BASELINE selects another
+baseline file.
+"""
+
+import os
+
+import pytest
+
+from benchmarks.bench_serialization import BASELINE_PATH, environment, load_baseline, run_suite
+
+TOLERANCE = float(os.getenv("SERIALIZATION_TOLERANCE", "0.25"))
+MIN_TIME = float(os.getenv("SERIALIZATION_MIN_TIME", "0.3"))  # Seconds per case
+GATE_ENABLED = os.getenv("SERIALIZATION_GATE", "false").lower() == "true"
+
+BASELINE_FILE = os.getenv("SERIALIZATION_BASELINE", BASELINE_PATH)
+BASELINE = load_baseline(BASELINE_FILE)
+CASES = sorted((BASELINE or {}).get("results", {}))
+
+pytestmark = pytest.mark.skipif(
+    not GATE_ENABLED, reason="Serialization gate disabled; set SERIALIZATION_GATE=true"
+)
+
+
+@pytest.fixture(scope="module")
+def current():
+    return run_suite(MIN_TIME, CASES)
+
+
+def test_baseline_exists():
+    assert BASELINE is not None, (
+        f"No serialization baseline at {BASELINE_FILE}; record one on this runner type with "
+        f"python -m benchmarks.bench_serialization --save and commit it"
+    )
+    assert CASES, f"Baseline {BASELINE_FILE} has no results"
+
+
+@pytest.mark.skipif(BASELINE is None, reason="No baseline (reported by test_baseline_exists)")
+def test_baseline_environment_matches():
+    recorded = BASELINE["environment"]
+    assert recorded["python"].rsplit(".", 1)[0] == environment()["python"].rsplit(".", 1)[0], \
+        f"Baseline recorded on Python {recorded['python']}; re-record it for this interpreter"
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_not_slower_than_baseline(current, name):
+    assert name in current, f"{name} is in the baseline but no longer benchmarked"
+    baseline_us = BASELINE["results"][name]["best_us"]
+    current_us = current[name]["best_us"]
+    assert current_us <= baseline_us * (1 + TOLERANCE), (
+        f"{name}: {current_us:.1f}us per call vs {baseline_us:.1f}us baseline "
+        f"(+{current_us / baseline_us - 1:.0%}, tolerance {TOLERANCE:.0%})"
+    )
@@ -0,0 +1,203 @@
+"""
+Agent Service Health Monitoring
+Background health prober and circuit breaker for the agent service
+"""
+
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Health probe settings
+HEALTH_PROBE_INTERVAL = float(os.getenv("AGENT_HEALTH_INTERVAL", "15"))  # Seconds between probes
+HEALTH_PROBE_TIMEOUT = float(os.getenv("AGENT_HEALTH_TIMEOUT", "5"))  # Per-probe timeout
+HEALTH_LATENCY_ALPHA = float(os.getenv("AGENT_HEALTH_EWMA_ALPHA", "0.3"))  # Weight of the newest latency sample
+
+# Circuit breaker settings
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("AGENT_BREAKER_FAILURES", "3"))  # Consecutive failures before opening
+BREAKER_RECOVERY_TIMEOUT = float(os.getenv("AGENT_BREAKER_RECOVERY", "30"))  # Seconds open before a trial request
+BREAKER_TRIAL_TIMEOUT = float(os.getenv("AGENT_BREAKER_TRIAL_TIMEOUT", "60"))  # Seconds before an unreported trial is given up
+
+
+class CircuitBreaker:
+    """Fail fast while the agent service is unhealthy.
+
+    closed -> open after `failure_threshold` consecutive failures.
+    open -> half_open once `recovery_timeout` has elapsed; one trial request is let through.
+    half_open -> closed on success, back to open on failure.
+
+    A trial that ends without reporting either (cancelled, or a 4xx) frees its
+    slot with release_trial(); one that never reports is given up after
+    `trial_timeout`, so the breaker cannot stay half-open rejecting everything.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        recovery_timeout: float = BREAKER_RECOVERY_TIMEOUT,
+        trial_timeout: float = BREAKER_TRIAL_TIMEOUT
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.trial_timeout = trial_timeout
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._trial_started_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        """Current breaker state, moving open -> half_open once the recovery timeout elapses"""
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+            logger.info("[BREAKER] Recovery timeout elapsed - half-open, allowing a trial request")
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Return True if a request may be sent to the agent service"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state != self.HALF_OPEN:
+            return False
+        if self._trial_in_flight and time.monotonic() - self._trial_started_at < self.trial_timeout:
+            return False
+        if self._trial_in_flight:
+            logger.warning(f"[BREAKER] Trial request unreported after {self.trial_timeout}s - allowing another")
+        self._trial_in_flight = True
+        self._trial_started_at = time.monotonic()
+        return True
+
+    def release_trial(self) -> None:
+        """Free the half-open trial slot when the trial request ended without reporting an outcome"""
+        if self._state == self.HALF_OPEN:
+            self._trial_in_flight = False
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker lets a trial request through"""
+        if self._state != self.OPEN or self._opened_at is None:
+            return 0.0
+        return max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+
+    def record_success(self) -> None:
+        """Record a successful call, closing the breaker"""
+        if self._state != self.CLOSED:
+            logger.info(f"[BREAKER] Agent service recovered - closing breaker (was {self._state})")
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the breaker once the threshold is reached"""
+        self._consecutive_failures += 1
+        self._trial_in_flight = False
+        if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                logger.warning(
+                    f"[BREAKER] Opening breaker after {self._consecutive_failures} consecutive failures"
+                )
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+
+    def status(self) -> Dict[str, Any]:
+        """Breaker state for the /health endpoint"""
+        return {
+            "state": self.state,
+            "consecutive_failures": self._consecutive_failures,
+            "retry_after_seconds": round(self.retry_after(), 1)
+        }
+
+
+class AgentHealthMonitor:
+    """Periodically probes the agent service in the background and feeds the circuit breaker"""
+
+    def __init__(
+        self,
+        agent,
+        interval: float = HEALTH_PROBE_INTERVAL,
+        alpha: float = HEALTH_LATENCY_ALPHA
+    ):
+        self.agent = agent
+        self.interval = interval
+        self.alpha = alpha
+        self.healthy: Optional[bool] = None  # Unknown until the first probe completes
+        self.latency_ewma: Optional[float] = None
+        self.last_latency: Optional[float] = None
+        self.last_checked: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.probes_total = 0
+        self.probes_failed = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the background probe loop on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="agent-health-monitor")
+            logger.info(f"[HEALTH] Agent health monitor started (interval={self.interval}s)")
+
+    async def stop(self) -> None:
+        """Cancel the background probe loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("[HEALTH] Agent health monitor stopped")
+
+    async def _run(self) -> None:
+        while True:
+            await self.probe()
+            await asyncio.sleep(self.interval)
+
+    async def probe(self) -> bool:
+        """Run one health probe and update health, latency EWMA and the breaker"""
+        started = time.perf_counter()
+        ok, error = await self.agent.health_check()
+        latency = time.perf_counter() - started
+
+        self.probes_total += 1
+        self.last_checked = time.time()
+        self.last_latency = latency
+
+        if ok:
+            self.latency_ewma = latency if self.latency_ewma is None else (
+                self.alpha * latency + (1 - self.alpha) * self.latency_ewma
+            )
+            self.last_error = None
+            self.agent.circuit_breaker.record_success()
+        else:
+            self.probes_failed += 1
+            self.last_error = error
+            self.agent.circuit_breaker.record_failure()
+
+        if ok != self.healthy:
+            log = logger.info if ok else logger.warning
+            log(f"[HEALTH] Agent service at {self.agent.base_url} is {'healthy' if ok else 'unhealthy'}"
+                + (f": {error}" if error else ""))
+        self.healthy = ok
+        return ok
+
+    def status(self) -> Dict[str, Any]:
+        """Health summary for the /health endpoint"""
+        return {
+            "healthy": self.healthy,
+            "latency_ewma_ms": round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+            "last_latency_ms": round(self.last_latency * 1000, 1) if self.last_latency is not None else None,
+            "last_checked": self.last_checked,
+            "last_error": self.last_error,
+            "probes_total": self.probes_total,
+            "probes_failed": self.probes_failed,
+            "circuit_breaker": self.agent.circuit_breaker.status()
+        }
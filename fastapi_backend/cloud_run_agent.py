@@ -3,22 +3,114 @@ Cloud Run Agent HTTP Client
 Handles communication with agent deployed on Cloud Run via HTTP API
 """
 
+import os
 import json
+import time
 import logging
 import asyncio
 import aiohttp
-import requests
-from typing import AsyncGenerator, Dict, Any, Optional
+from typing import AsyncGenerator, Dict, Any, List, Optional, Tuple
 from shared_utils.error_utils import create_error_response
+from shared_utils.sse_parser import SSEEvent, SSEParser, json_loads, JSON_DECODE_ERRORS
+from fastapi_backend.agent_health import CircuitBreaker, HEALTH_PROBE_TIMEOUT
 
 logger = logging.getLogger(__name__)
 
+# Connection pool settings (one pool per worker process)
+POOL_LIMIT = int(os.getenv("AGENT_POOL_LIMIT", "100"))  # Total open connections
+POOL_LIMIT_PER_HOST = int(os.getenv("AGENT_POOL_LIMIT_PER_HOST", "50"))  # Connections to the agent host
+KEEPALIVE_TIMEOUT = float(os.getenv("AGENT_KEEPALIVE_TIMEOUT", "60"))  # Idle seconds before a pooled connection is closed
+DNS_CACHE_TTL = int(os.getenv("AGENT_DNS_CACHE_TTL", "300"))  # Seconds to cache resolved agent host
+
+# Timeouts - no total timeout, since a full refinement run can legitimately take minutes
+CONNECT_TIMEOUT = float(os.getenv("AGENT_CONNECT_TIMEOUT", "10"))  # Acquire connection + TCP/TLS handshake
+READ_TIMEOUT = float(os.getenv("AGENT_READ_TIMEOUT", "120"))  # Max silence between chunks from the agent
+
+# Create the session and start the run in one request when the agent service supports it (see app.py)
+FUSED_RUN_ENABLED = os.getenv("AGENT_FUSED_RUN", "true").lower() == "true"
+FUSED_RUN_PATH = "/run_sse_with_state"
+FUSED_RUN_RETRY = float(os.getenv("AGENT_FUSED_RUN_RETRY", "300"))  # Seconds before probing the route again after a 404/405
+
+# Ask ADK to stream partial LLM output (StreamingMode.SSE) so drafts can be shown while generated
+STREAM_PARTIALS = os.getenv("AGENT_STREAM_PARTIALS", "true").lower() == "true"
+
 class CloudRunAgent:
     """Client for communicating with agent deployed on Cloud Run"""
     
     def __init__(self, base_url: str):
         self.base_url = base_url.rstrip('/')
-        self.timeout = aiohttp.ClientTimeout(total=300)  # 5 minute timeout for LLM calls
+        self.timeout = aiohttp.ClientTimeout(
+            total=None,
+            connect=CONNECT_TIMEOUT,
+            sock_connect=CONNECT_TIMEOUT,
+            sock_read=READ_TIMEOUT
+        )
+        self.circuit_breaker = CircuitBreaker()
+        # None = not yet known; resolved on the first request against the agent service
+        self.fused_run_supported: Optional[bool] = None if FUSED_RUN_ENABLED else False
+        self._fused_run_retry_at = 0.0  # Monotonic time after which a route that answered 404/405 is tried again
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        self._connector: Optional[aiohttp.TCPConnector] = None
+        self._requests_total = 0
+        self._requests_in_flight = 0
+
+    async def start(self) -> None:
+        """Create the shared HTTP session. Called from the FastAPI lifespan hook."""
+        if self._http_session and not self._http_session.closed:
+            return
+
+        self._connector = aiohttp.TCPConnector(
+            limit=POOL_LIMIT,
+            limit_per_host=POOL_LIMIT_PER_HOST,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            enable_cleanup_closed=True
+        )
+        self._http_session = aiohttp.ClientSession(
+            connector=self._connector,
+            timeout=self.timeout
+        )
+        logger.info(
+            f"[CLOUD_RUN] HTTP pool started for {self.base_url} "
+            f"(limit={POOL_LIMIT}, per_host={POOL_LIMIT_PER_HOST}, keepalive={KEEPALIVE_TIMEOUT}s, dns_ttl={DNS_CACHE_TTL}s)"
+        )
+
+    async def close(self) -> None:
+        """Close the shared HTTP session and its pooled connections."""
+        if self._http_session and not self._http_session.closed:
+            await self._http_session.close()
+            logger.info("[CLOUD_RUN] HTTP pool closed")
+        self._http_session = None
+        self._connector = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, starting it lazily if the lifespan hook did not run."""
+        if self._http_session is None or self._http_session.closed:
+            logger.warning("[CLOUD_RUN] HTTP pool not started by lifespan hook - starting lazily")
+            await self.start()
+        return self._http_session
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Return connection pool statistics for sizing the pool."""
+        connector = self._connector
+        if connector is None or connector.closed:
+            return {"started": False}
+
+        # aiohttp does not expose pool counters publicly, so read them defensively
+        acquired = getattr(connector, "_acquired", ())
+        idle_conns = getattr(connector, "_conns", {})
+        waiters = getattr(connector, "_waiters", {})
+
+        return {
+            "started": True,
+            "limit": connector.limit,
+            "limit_per_host": connector.limit_per_host,
+            "active_connections": len(acquired),
+            "idle_connections": sum(len(conns) for conns in idle_conns.values()),
+            "waiting_for_connection": sum(len(w) for w in waiters.values()),
+            "requests_in_flight": self._requests_in_flight,
+            "requests_total": self._requests_total
+        }
     
     async def stream_query(
         self,
@@ -26,7 +118,11 @@ class CloudRunAgent:
         session_id: str,
         initial_state: Dict[str, Any]
     ) -> AsyncGenerator[Dict[str, Any], None]:
-        """Streams a query to the agent service using two-step process for local ADK agent."""
+        """Streams a query to the agent service.
+
+        Uses the fused create-session-and-run route when the agent service exposes it,
+        otherwise falls back to the two-step process (create session, then /run_sse).
+        """
         
         # Step 1: Create session with initial state
         create_session_payload = {
@@ -44,43 +140,96 @@ class CloudRunAgent:
             "new_message": {
                 "role": "user",
                 "parts": [{"text": "Start"}]
-            }
+            },
+            "streaming": STREAM_PARTIALS
         }
 
         logger.info(f"[CLOUD_RUN] Creating session for user {user_id} with session {session_id}")
         logger.debug(f"[CLOUD_RUN] Initial state: {json.dumps(initial_state, indent=2)}")
 
-        http_session = None
+        # Fail fast instead of waiting on connection timeouts while the agent is down
+        trial = self.circuit_breaker.state == CircuitBreaker.HALF_OPEN
+        if not self.circuit_breaker.allow_request():
+            retry_after = self.circuit_breaker.retry_after()
+            logger.warning(f"[CLOUD_RUN] Circuit breaker open - rejecting request for session {session_id}")
+            yield create_error_response(
+                "Agent service is temporarily unavailable. Please try again shortly.",
+                error_type="agent_unavailable",
+                status_code=503,
+                component="cloud_run_agent",
+                details={"retry_after_seconds": round(retry_after, 1)},
+                return_format="dict"
+            )
+            return
+
+        self._requests_total += 1
+        self._requests_in_flight += 1
+        response: Optional[aiohttp.ClientResponse] = None
         try:
-            http_session = aiohttp.ClientSession(timeout=self.timeout)
-            
-            # Step 1: Create or update the session with initial state
-            async with http_session.post(
-                f"{self.base_url}/apps/refiner_agent/users/{user_id}/sessions/{session_id}",
-                json=create_session_payload,
-                headers={"Content-Type": "application/json"}
-            ) as create_response:
-                if create_response.status not in [200, 201, 409]:
-                    error_text = await create_response.text()
-                    logger.error(f"[CLOUD_RUN] Session creation failed for {session_id}: {create_response.status} - {error_text}")
-                    yield create_error_response(
-                        f"Session creation failed: {create_response.status} ({error_text[:100]})",
-                        error_type="session_creation_error",
-                        status_code=create_response.status,
-                        component="cloud_run_agent",
-                        return_format="dict"
+            http_session = await self._get_session()
+            session_exists = False
+
+            # Single round trip: the agent service creates the session and starts the run
+            if FUSED_RUN_ENABLED and time.monotonic() >= self._fused_run_retry_at:
+                fused_payload = dict(run_payload)
+                fused_payload["state"] = create_session_payload
+                response = await http_session.post(
+                    f"{self.base_url}{FUSED_RUN_PATH}",
+                    json=fused_payload
+                )
+                if response.status in (404, 405):
+                    # Usually an agent service without the route; probe again later in case the 404 was transient
+                    response.release()
+                    response = None
+                    self.fused_run_supported = False
+                    self._fused_run_retry_at = time.monotonic() + FUSED_RUN_RETRY
+                    logger.info(
+                        f"[CLOUD_RUN] {FUSED_RUN_PATH} answered 404/405 - using two-step session + run "
+                        f"for the next {FUSED_RUN_RETRY:.0f}s"
                     )
-                    return
+                elif response.status == 409:
+                    # Session already exists (e.g. a retried request) - run it, as the two-step path does
+                    response.release()
+                    response = None
+                    session_exists = True
+                    self.fused_run_supported = True
+                    logger.info(f"[CLOUD_RUN] Session {session_id} already exists - starting the run")
                 else:
-                    logger.info(f"[CLOUD_RUN] Session {session_id} created successfully (status: {create_response.status})")
+                    self.fused_run_supported = True
 
-            # Step 2: Run the agent with streaming
-            async with http_session.post(
-                f"{self.base_url}/run_sse",
-                json=run_payload,
-                headers={"Content-Type": "application/json"}
-            ) as response:
+            if response is None and not session_exists:
+                # Step 1: Create or update the session with initial state
+                async with http_session.post(
+                    f"{self.base_url}/apps/refiner_agent/users/{user_id}/sessions/{session_id}",
+                    json=create_session_payload
+                ) as create_response:
+                    if create_response.status not in [200, 201, 409]:
+                        if create_response.status >= 500:
+                            self.circuit_breaker.record_failure()
+                        error_text = await create_response.text()
+                        logger.error(f"[CLOUD_RUN] Session creation failed for {session_id}: {create_response.status} - {error_text}")
+                        yield create_error_response(
+                            f"Session creation failed: {create_response.status} ({error_text[:100]})",
+                            error_type="session_creation_error",
+                            status_code=create_response.status,
+                            component="cloud_run_agent",
+                            return_format="dict"
+                        )
+                        return
+                    else:
+                        logger.info(f"[CLOUD_RUN] Session {session_id} created successfully (status: {create_response.status})")
+
+            if response is None:
+                # Step 2: Run the agent with streaming
+                response = await http_session.post(
+                    f"{self.base_url}/run_sse",
+                    json=run_payload
+                )
+
+            async with response:
                 if response.status != 200:
+                    if response.status >= 500:
+                        self.circuit_breaker.record_failure()
                     error_text = await response.text()
                     logger.error(f"[CLOUD_RUN] Stream request failed: {response.status} - {error_text}")
                     yield create_error_response(
@@ -92,50 +241,34 @@ class CloudRunAgent:
                     )
                     return
 
-                async for line in response.content:
-                    if not line:
-                        continue
-                    
-                    line_text = line.decode("utf-8").strip()
-                    if not line_text.startswith("data: "):
-                        continue
-
-                    try:
-                        json_data = line_text[len("data: "):]
-                        if not json_data:
-                            continue
-                        
-                        adk_event = json.loads(json_data)
-                        if (
-                            isinstance(adk_event, dict) and
-                            "content" in adk_event and
-                            isinstance(adk_event["content"], dict) and
-                            "parts" in adk_event["content"]
-                        ):
-                            for part in adk_event["content"]["parts"]:
-                                if "text" in part:
-                                    try:
-                                        event_data = json.loads(part["text"])
-                                        logger.debug(f"[CLOUD_RUN] Streamed Event Data: {event_data}")
-                                        yield event_data
-                                    except json.JSONDecodeError:
-                                        logger.info(f"[CLOUD_RUN] Plain text from agent: {part['text']}")
-                                        yield {"type": "status", "message": part["text"]}
-                    except json.JSONDecodeError as e:
-                        logger.warning(f"[CLOUD_RUN] Failed to parse stream line: {line_text[:100]}... - {e}")
-                    except Exception as e:
-                        logger.error(f"[CLOUD_RUN] Stream processing error: {e}", exc_info=True)
+                self.circuit_breaker.record_success()
+
+                parser = SSEParser()
+                async for chunk in response.content.iter_any():
+                    for sse_event in parser.feed(chunk):
+                        for event_data in self._events_from_sse(sse_event):
+                            yield event_data
+                for sse_event in parser.close():
+                    for event_data in self._events_from_sse(sse_event):
+                        yield event_data
 
         except asyncio.TimeoutError:
-            logger.error(f"[CLOUD_RUN] Request timeout after {self.timeout.total} seconds")
+            self.circuit_breaker.record_failure()
+            logger.error(
+                f"[CLOUD_RUN] Request timeout (connect={self.timeout.connect}s, read={self.timeout.sock_read}s)"
+            )
             yield create_error_response(
                 "Request timeout",
                 error_type="timeout_error",
                 component="cloud_run_agent",
-                details={"timeout_seconds": self.timeout.total},
+                details={
+                    "connect_timeout_seconds": self.timeout.connect,
+                    "read_timeout_seconds": self.timeout.sock_read
+                },
                 return_format="dict",
             )
         except Exception as e:
+            self.circuit_breaker.record_failure()
             logger.error(f"[CLOUD_RUN] Stream query error: {e}", exc_info=True)
             yield create_error_response(
                 f"Connection error: {str(e)}",
@@ -145,17 +278,66 @@ class CloudRunAgent:
                 return_format="dict",
             )
         finally:
-            if http_session and not http_session.closed:
-                await http_session.close()
+            # The shared session stays open; only the response connection goes back to the pool,
+            # including when the generator is closed or cancelled before `async with response` is entered
+            if response is not None:
+                response.release()
+            self._requests_in_flight -= 1
+            if trial:
+                # Cancelled, or ended on a 4xx, without recording success or failure
+                self.circuit_breaker.release_trial()
     
-    def health_check(self) -> bool:
-        """Check if the Cloud Run agent service is healthy"""
+    def _events_from_sse(self, sse_event: SSEEvent) -> List[Dict[str, Any]]:
+        """Extract agent event payloads from one ADK SSE frame."""
         try:
-            response = requests.get(
-                f"{self.base_url}/",
-                timeout=10
-            )
-            return response.status_code == 200
+            adk_event = sse_event.json()
+        except JSON_DECODE_ERRORS as e:
+            logger.warning(f"[CLOUD_RUN] Failed to parse stream event: {sse_event.data[:100]!r}... - {e}")
+            return []
+
+        content = adk_event.get("content") if isinstance(adk_event, dict) else None
+        if not isinstance(content, dict) or "parts" not in content:
+            return []
+
+        # Partial LLM chunks are forwarded as-is; ADK sends the aggregated text again as a final event
+        if adk_event.get("partial"):
+            return [
+                {"type": "partial", "author": adk_event.get("author", ""), "text": part["text"]}
+                for part in content["parts"]
+                if part.get("text")
+            ]
+
+        events = []
+        for part in content["parts"]:
+            text = part.get("text")
+            if text is None:
+                continue
+            # Only structured payloads are JSON; skip the decode attempt for plain status text
+            if text.lstrip()[:1] == "{":
+                try:
+                    event_data = json_loads(text)
+                    logger.debug(f"[CLOUD_RUN] Streamed Event Data: {event_data}")
+                    events.append(event_data)
+                    continue
+                except JSON_DECODE_ERRORS:
+                    pass
+            logger.info(f"[CLOUD_RUN] Plain text from agent: {text}")
+            events.append({"type": "status", "message": text})
+        return events
+
+    async def health_check(self) -> Tuple[bool, Optional[str]]:
+        """Check if the Cloud Run agent service is healthy. Returns (healthy, error)."""
+        try:
+            http_session = await self._get_session()
+            async with http_session.get(
+                f"{self.base_url}/health",
+                timeout=aiohttp.ClientTimeout(total=HEALTH_PROBE_TIMEOUT)
+            ) as response:
+                if response.status == 200:
+                    return True, None
+                return False, f"HTTP {response.status}"
+        except asyncio.TimeoutError:
+            return False, f"timeout after {HEALTH_PROBE_TIMEOUT}s"
         except Exception as e:
-            logger.error(f"[CLOUD_RUN] Health check failed: {e}")
-            return False
\ No newline at end of file
+            logger.debug(f"[CLOUD_RUN] Health check failed: {e}")
+            return False, str(e)
@@ -0,0 +1,64 @@
+"""
+Per-field events from the agents' partial output
+Turns the growing JSON text of the sub-agent currently streaming into field events, falling back to raw text
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+from shared_utils.partial_json import PartialJSONParser
+
+logger = logging.getLogger(__name__)
+
+
+class FieldEventStream:
+    """Partial-output state of one chat stream.
+
+    feed() takes a {"type": "partial", "author", "text"} event and returns the
+    events to send to the client: {"type": "field", ...} updates while the text
+    parses as a JSON object. If the text turns out not to be JSON, the field
+    drafts already sent are withdrawn with {"type": "field_reset", "author"} and
+    all of the author's text so far is sent as one raw partial event; later
+    chunks from that author are forwarded unchanged.
+    """
+
+    __slots__ = ("_parser", "_author", "_text", "_fields_sent")
+
+    def __init__(self):
+        self._parser: Optional[PartialJSONParser] = None
+        self._author: Optional[str] = None
+        self._text: List[str] = []  # Raw text received from the current author
+        self._fields_sent = False
+
+    def reset(self) -> None:
+        """A complete event ends the current partial output"""
+        self._parser = None
+        self._author = None
+        self._text = []
+        self._fields_sent = False
+
+    def feed(self, event: Dict[str, Any]) -> List[Dict[str, Any]]:
+        author = event.get('author', '')
+        if self._parser is None or author != self._author:
+            self.reset()
+            self._parser, self._author = PartialJSONParser(), author
+        if self._parser.failed:
+            return [event]
+
+        text = event.get('text', '')
+        self._text.append(text)
+        events: List[Dict[str, Any]] = []
+        for update in self._parser.feed(text):
+            update['type'] = 'field'
+            update['author'] = author
+            events.append(update)
+        self._fields_sent = self._fields_sent or bool(events)
+        if not self._parser.failed:
+            return events
+
+        # Not JSON after all - the client drops its field drafts and gets the whole text instead
+        logger.debug(f"Partial output of {author!r} is not a JSON object; forwarding raw text")
+        events = [{'type': 'field_reset', 'author': author}] if self._fields_sent else []
+        events.append(dict(event, text="".join(self._text)))
+        self._text = []
+        return events
@@ -10,10 +10,11 @@ import sys
 import datetime
 import logging
 import traceback  # Import traceback at the module level
+from contextlib import asynccontextmanager, aclosing
 from typing import Dict, Any, Optional, List
 
 from fastapi import FastAPI, Request, Depends, HTTPException, status
-from fastapi.responses import JSONResponse, HTMLResponse, FileResponse, StreamingResponse
+from fastapi.responses import JSONResponse, HTMLResponse, FileResponse, StreamingResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
@@ -26,11 +27,20 @@ from firebase_admin import auth, firestore
 
 # Import local modules
 from fastapi_backend.cloud_run_agent import CloudRunAgent
+from fastapi_backend.agent_health import AgentHealthMonitor
+from fastapi_backend.response_cache import (
+    ResponseCache, make_cache_key, is_cacheable, RESPONSE_CACHE_ENABLED
+)
+from fastapi_backend.single_flight import SingleFlight, SINGLE_FLIGHT_ENABLED
+from fastapi_backend.similar_questions import QuestionIndex, NEAR_DUP_MODE, NEAR_DUP_MIN_RATING
+from fastapi_backend.field_events import FieldEventStream
+from shared_utils.metrics import REGISTRY, CONTENT_TYPE, MetricsMiddleware
 
 from fastapi_backend.response_utils import prepare_ui_response_from_model, create_error_response
 from fastapi_backend.user_service import get_user_profile, update_last_login, store_user_response
-from schemas import FinalResponse
+from schemas import FinalResponse, IterationData
 from fastapi_backend.auth import User, get_current_user, verify_firebase_token, init_firebase
+from fastapi_backend.metrics import ChatStreamMetrics, FIRESTORE_CALL_SECONDS, observe_run, register_cache_collectors
 
 # Load environment variables
 load_dotenv()
@@ -51,6 +61,7 @@ LOCATION = os.getenv("GOOGLE_CLOUD_LOCATION")
 AGENT_LOCATION = os.getenv("AGENT_LOCATION", "local").strip()
 AGENT_CLOUD_RUN_URL = os.getenv("AGENT_CLOUD_RUN_URL")
 SKIP_FIRESTORE = os.getenv("SKIP_FIRESTORE", "false").lower() == "true"  # Set SKIP_FIRESTORE=true to bypass Firestore
+STREAM_STAR_FIELDS = os.getenv("STREAM_STAR_FIELDS", "true").lower() == "true"  # Turn partial JSON output into per-field events
 
 # Debug logging for environment variables
 logger.info(f"Environment variables loaded:")
@@ -88,6 +99,7 @@ class STARRequest(BaseModel):
     question: str = Field(..., min_length=10)
     resume: str = Field("", description="Optional resume text", max_length=10000)
     jobDescription: str = Field("", description="Optional job description", max_length=15000)
+    bypassCache: bool = Field(False, description="Skip the response cache and run the full pipeline")
 
 class SessionRequest(BaseModel):
     token: Optional[str] = None
@@ -110,12 +122,47 @@ else:
 # Initialize the CloudRunAgent client
 cloud_run_agent = CloudRunAgent(agent_url)
 
-# Test connectivity to agent
-if not cloud_run_agent.health_check():
-    logger.warning(f"Agent health check failed at {agent_url} - service may not be ready")
+# Agent connectivity is probed in the background once the app starts (see lifespan)
+agent_health_monitor = AgentHealthMonitor(cloud_run_agent)
+
+# Per-worker cache of completed pipeline results
+response_cache = ResponseCache()
+
+# Per-worker registry of in-flight agent runs shared by identical concurrent requests
+single_flight = SingleFlight()
+
+# Per-worker index of high-rated answers for near-duplicate questions
+question_index = QuestionIndex()
+
+register_cache_collectors(response_cache, question_index, single_flight)
+
+
+def is_generic_request(request_data: Dict[str, Any]) -> bool:
+    """Answers are only reusable across questions when they are not tailored to a resume or job description"""
+    return not request_data.get('resume', '').strip() and not request_data.get('jobDescription', '').strip()
+
+
+def best_rating(response: FinalResponse) -> float:
+    return max((iteration.critique.rating for iteration in response.iterations), default=0.0)
+
+
+def best_star_answer(response: FinalResponse) -> Dict[str, Any]:
+    best = max(response.iterations, key=lambda iteration: iteration.critique.rating)
+    return best.starAnswer.model_dump()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Own the shared agent HTTP pool and health monitor for the lifetime of the worker."""
+    await cloud_run_agent.start()
+    agent_health_monitor.start()
+    try:
+        yield
+    finally:
+        await agent_health_monitor.stop()
+        await cloud_run_agent.close()
 
 # Create FastAPI app
-app = FastAPI(title="STAR Answer Generator API")
+app = FastAPI(title="STAR Answer Generator API", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -126,6 +173,9 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+# Request latency by route for /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Mount static files - use local static files
 static_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
 templates_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
@@ -226,84 +276,193 @@ async def serve_ui(user: User = Depends(get_current_user)):
     logger.info(f"Serving index file from: {index_path}")
     return FileResponse(index_path)
 
+def build_final_event(validated_response: FinalResponse, user_id: str) -> Dict[str, Any]:
+    """Convert a validated agent response to the UI format, store it and wrap it as a `final` event."""
+    # Cached and coalesced runs are shared between users; the stored copy belongs to this user
+    if validated_response.metadata.userId != user_id:
+        validated_response = validated_response.model_copy(update={
+            'metadata': validated_response.metadata.model_copy(update={'userId': user_id})
+        })
+
+    # 1. Convert to UI-compatible format
+    ui_response = prepare_ui_response_from_model(validated_response)
+    logger.info(f"Converted response to UI format for user {user_id}")
+
+    # 2. Store the validated response in Firestore
+    if not SKIP_FIRESTORE:
+        try:
+            response_id = store_user_response(
+                user_id=user_id,
+                response_data=validated_response.model_dump()
+            )
+            ui_response['id'] = response_id
+            logger.info(f"Stored response {response_id} for user {user_id}")
+        except Exception as e:
+            logger.error(f"Failed to store response for user {user_id}: {e}")
+            ui_response['storage_error'] = str(e)
+
+    return {
+        'type': 'final',
+        'data': ui_response
+    }
+
+def complete_run(event: Dict[str, Any], cache_key: Optional[str], similar_request: Optional[STARRequest]) -> Dict[str, Any]:
+    """Validate the agent's final output once per run, record its metrics and cache it.
+
+    Returns a `run_complete` event carrying the validated FinalResponse, or an
+    error event if the output does not match the schema.
+    """
+    try:
+        # Debug: Log what we received
+        logger.info(f"[DEBUG] Final event keys: {list(event.keys())}")
+        logger.info(f"[DEBUG] Number of iterations: {len(event.get('iterations', []))}")
+        logger.info(f"[DEBUG] Performance metrics: {event.get('performanceMetrics', {})}")
+
+        # Validate the agent's response against the FinalResponse Pydantic model
+        validated_response = FinalResponse.model_validate(event)
+    except ValidationError as e:
+        logger.error(f"Agent response validation failed. Error: {e}. Data: {event}")
+        return create_error_response(f"Agent returned invalid data structure: {e}")
+
+    logger.info("Successfully validated agent response")
+    logger.info(f"[DEBUG] Validated response has {len(validated_response.iterations)} iterations")
+    logger.info(f"[DEBUG] Validated performance metrics: {validated_response.performanceMetrics.model_dump()}")
+    observe_run(validated_response.performanceMetrics, len(validated_response.iterations))
+
+    if cache_key and is_cacheable(validated_response):
+        response_cache.put(cache_key, validated_response)
+    if (similar_request is not None and is_cacheable(validated_response)
+            and best_rating(validated_response) >= NEAR_DUP_MIN_RATING):
+        question_index.add(
+            similar_request.role, similar_request.industry,
+            similar_request.question, validated_response
+        )
+
+    return {'type': 'run_complete', 'response': validated_response}
+
 @app.post('/api/chat/stream')
 async def chat_stream(validated_data: STARRequest, user: User = Depends(get_current_user)):
     """Process chat requests with real-time streaming updates. Requires authentication."""
     logger.debug(f"chat_stream route called for user: {user.uid} with data: {validated_data.dict()}")
+    stream_metrics = ChatStreamMetrics()
 
     async def event_generator():
         session_id = str(uuid.uuid4())
-        request_data = validated_data.model_dump()
+        request_data = validated_data.model_dump(exclude={'bypassCache'})
+
+        # Identical inputs under the same agent config replay the cached result
+        fingerprint = make_cache_key(request_data)
+        cache_key = fingerprint if RESPONSE_CACHE_ENABLED else None
+        if cache_key and not validated_data.bypassCache:
+            cached_response = response_cache.get(cache_key)
+            if cached_response is not None:
+                logger.info(f"Response cache hit for user {user.uid}")
+                final_event = build_final_event(cached_response, user.uid)
+                final_event['data']['cached'] = True
+                stream_metrics.outcome = "cached"
+                yield f"data: {json.dumps(final_event)}\n\n"
+                return
+
+        # Near-duplicate questions reuse a stored high-rated answer, either as the result or as the starting draft
+        use_similar = NEAR_DUP_MODE in ("serve", "seed") and is_generic_request(request_data)
+        if use_similar and not validated_data.bypassCache:
+            match = question_index.query(validated_data.role, validated_data.industry, validated_data.question)
+            if match is not None:
+                similar_to = {'question': match.question, 'similarity': round(match.similarity, 3)}
+                if NEAR_DUP_MODE == "serve":
+                    logger.info(f"Serving near-duplicate answer for user {user.uid} ({similar_to['similarity']})")
+                    # The answer was written for another question; say so rather than present it as a fresh run
+                    status_event = {
+                        'type': 'status',
+                        'message': f'Reusing the answer to a similar question: "{match.question}"',
+                        'similarTo': similar_to
+                    }
+                    yield f"data: {json.dumps(status_event)}\n\n"
+                    served = match.payload.model_copy(deep=True)
+                    served.metadata.question = validated_data.question
+                    served.metadata.createdAt = datetime.datetime.now(datetime.timezone.utc).isoformat()
+                    final_event = build_final_event(served, user.uid)
+                    final_event['data']['reused'] = True
+                    final_event['data']['similarTo'] = similar_to
+                    stream_metrics.outcome = "similar"
+                    yield f"data: {json.dumps(final_event)}\n\n"
+                    return
+                logger.info(f"Seeding run with near-duplicate answer for user {user.uid} ({similar_to['similarity']})")
+                request_data['seed_star_answer'] = best_star_answer(match.payload)
+                status_event = {'type': 'status', 'message': 'Starting from an answer to a similar question...', 'similarTo': similar_to}
+                yield f"data: {json.dumps(status_event)}\n\n"
+
+        # Partial JSON output of the sub-agent currently streaming
+        field_events = FieldEventStream()
 
         try:
-            # Use the refactored stream_query to pass initial_state directly
-            async for event in cloud_run_agent.stream_query(
-                user_id=user.uid,
-                session_id=session_id,
-                initial_state=request_data
-            ):
-                if event.get('type') == 'status':
-                    # Forward status updates directly to the client
-                    yield f"data: {json.dumps(event)}\n\n"
-                
-                # The final response is no longer a special type, but the full agent output
-                elif event.get('type') not in ['status', 'error'] and 'metadata' in event and 'iterations' in event:
-                    try:
-                        # Debug: Log what we received
-                        logger.info(f"[DEBUG] Final event keys: {list(event.keys())}")
-                        logger.info(f"[DEBUG] Number of iterations: {len(event.get('iterations', []))}")
-                        logger.info(f"[DEBUG] Performance metrics: {event.get('performanceMetrics', {})}")
-                        
-                        # 1. Validate the agent's response against the FinalResponse Pydantic model
-                        validated_response = FinalResponse.model_validate(event)
-                        logger.info(f"Successfully validated agent response for user {user.uid}")
-                        logger.info(f"[DEBUG] Validated response has {len(validated_response.iterations)} iterations")
-                        logger.info(f"[DEBUG] Validated performance metrics: {validated_response.performanceMetrics.model_dump()}")
-
-                        # 2. Convert to UI-compatible format
-                        ui_response = prepare_ui_response_from_model(validated_response)
-                        logger.info(f"Converted response to UI format for user {user.uid}")
-
-                        # 3. Store the validated response in Firestore
-                        if not SKIP_FIRESTORE:
-                            try:
-                                response_id = store_user_response(
-                                    user_id=user.uid,
-                                    response_data=validated_response.model_dump()
-                                )
-                                ui_response['id'] = response_id
-                                logger.info(f"Stored response {response_id} for user {user.uid}")
-                            except Exception as e:
-                                logger.error(f"Failed to store response for user {user.uid}: {e}")
-                                ui_response['storage_error'] = str(e)
-                        
-                        # 4. Send the UI-compatible response to the client
-                        final_response_wrapper = {
-                            'type': 'final',
-                            'data': ui_response
+            # Concurrent identical requests share one upstream run (see single_flight.py); the final
+            # event is validated, counted in the run metrics and cached once per run, not per subscriber
+            async def run_agent():
+                async for event in cloud_run_agent.stream_query(
+                    user_id=user.uid,
+                    session_id=session_id,
+                    initial_state=request_data
+                ):
+                    if event.get('type') not in ['status', 'error'] and 'metadata' in event and 'iterations' in event:
+                        event = complete_run(event, cache_key, validated_data if use_similar else None)
+                    yield event
+
+            agent_events = single_flight.stream(fingerprint, run_agent) if SINGLE_FLIGHT_ENABLED else run_agent()
+            async with aclosing(agent_events):
+                async for event in agent_events:
+                    if event.get('type') == 'partial':
+                        if STREAM_STAR_FIELDS:
+                            # Emit STAR/critique fields as soon as they appear in the growing JSON
+                            for field_event in field_events.feed(event):
+                                yield f"data: {json.dumps(field_event)}\n\n"
+                        else:
+                            yield f"data: {json.dumps(event)}\n\n"
+                        continue
+
+                    # Any complete event ends the current partial output
+                    field_events.reset()
+
+                    if event.get('type') == 'status':
+                        # Forward status updates directly to the client
+                        yield f"data: {json.dumps(event)}\n\n"
+
+                    elif event.get('type') == 'iteration':
+                        # Forward each completed iteration immediately so the UI can show the best answer so far
+                        try:
+                            iteration = IterationData.model_validate(event.get('data'))
+                        except ValidationError as e:
+                            logger.warning(f"Skipping invalid iteration event for user {user.uid}: {e}")
+                            continue
+                        iteration_event = {
+                            'type': 'iteration',
+                            'data': iteration.model_dump(),
+                            'highestRating': event.get('highestRating', iteration.critique.rating)
                         }
+                        yield f"data: {json.dumps(iteration_event)}\n\n"
+
+                    elif event.get('type') == 'run_complete':
+                        # Convert, store and send the UI-compatible response to the client
+                        final_response_wrapper = build_final_event(event['response'], user.uid)
+                        stream_metrics.outcome = "final"
                         yield f"data: {json.dumps(final_response_wrapper)}\n\n"
                         return  # End stream after final response
 
-                    except ValidationError as e:
-                        logger.error(f"Agent response validation failed for user {user.uid}. Error: {e}. Data: {event}")
-                        error_response = create_error_response(f"Agent returned invalid data structure: {e}")
-                        yield f"data: {json.dumps(error_response)}\n\n"
+                    elif event.get('type') == 'error' or 'error' in event:
+                        # Forward error events (including typed agent errors) to the client
+                        stream_metrics.outcome = "error"
+                        yield f"data: {json.dumps(event)}\n\n"
                         return
 
-                elif event.get('type') == 'error':
-                    # Forward error events to the client
-                    yield f"data: {json.dumps(event)}\n\n"
-                    return
-
         except Exception as e:
             logger.error(f"Stream processing error: {e}")
             logger.error(traceback.format_exc())
             error_response = create_error_response(f"Agent streaming error: {str(e)}")
+            stream_metrics.outcome = "error"
             yield f"data: {json.dumps(error_response)}\n\n"
 
     return StreamingResponse(
-        event_generator(),
+        stream_metrics.track(event_generator()),
         media_type="text/event-stream",
         headers={
             'Cache-Control': 'no-cache',
@@ -322,10 +481,11 @@ async def get_history(user: User = Depends(get_current_user)):
         logger.info(f"[DEBUG] History: Created Firestore client with database 'refiner-agent'")
 
         # Query by Firebase UID
-        user_responses = db.collection('responses') \
-            .where('userId', '==', user.uid) \
-            .limit(50) \
-            .get()
+        with FIRESTORE_CALL_SECONDS.labels("history_query").time():
+            user_responses = db.collection('responses') \
+                .where('userId', '==', user.uid) \
+                .limit(50) \
+                .get()
 
         # Add detailed logging
         logger.info(f"[DEBUG] History: Found {len(user_responses)} responses for authenticated user: {user.uid}")
@@ -434,7 +594,8 @@ async def get_response(response_id: str, user: User = Depends(get_current_user))
         logger.info(f"[DEBUG] Response: Created Firestore client with database 'refiner-agent'")
 
         # Get the response document
-        response = db.collection('responses').document(response_id).get()
+        with FIRESTORE_CALL_SECONDS.labels("response_get").time():
+            response = db.collection('responses').document(response_id).get()
 
         # Check if it exists
         if not response.exists:
@@ -583,7 +744,19 @@ async def auth_status(user: User = Depends(get_current_user)):
 @app.get('/health')
 async def health_check():
     """Health check endpoint."""
-    return {"status": "ok"}
+    return {
+        "status": "ok",
+        "agent": agent_health_monitor.status(),
+        "agent_pool": cloud_run_agent.pool_stats(),
+        "response_cache": response_cache.stats(),
+        "similar_questions": question_index.stats(),
+        "single_flight": single_flight.stats()
+    }
+
+@app.get('/metrics')
+async def metrics():
+    """Prometheus scrape endpoint."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
 
 # Import the hello router
 from fastapi_backend.hello import router as hello_router
@@ -0,0 +1,82 @@
+"""
+Backend metrics, exposed by the /metrics route
+Chat stream latency and outcome, pipeline stage times reported by the agent, Firestore calls and cache hit rates
+"""
+
+import time
+from typing import AsyncIterator, Optional
+
+from shared_utils.metrics import REGISTRY, Counter, Gauge, Histogram, stats_collector
+
+CHAT_FIRST_EVENT_SECONDS = Histogram("star_chat_first_event_seconds", "Time from chat request to the first SSE event")
+CHAT_STREAM_SECONDS = Histogram(
+    "star_chat_stream_duration_seconds", "Chat stream duration by outcome (final, cached, similar, error, incomplete)",
+    ["outcome"]
+)
+CHAT_STREAMS_IN_FLIGHT = Gauge("star_chat_streams_in_flight", "Chat streams currently open")
+RUN_STAGE_SECONDS = Histogram("star_run_stage_seconds", "Pipeline stage times from the agent's PerformanceMetrics", ["stage"])
+RUN_ITERATIONS = Histogram("star_run_iterations", "Iterations per completed pipeline run", buckets=range(1, 11))
+RUN_TOKENS = Histogram(
+    "star_run_tokens", "LLM tokens per run by stage and kind (prompt, cached, output, thoughts)", ["stage", "kind"],
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000)
+)
+RUN_COST_USD = Counter("star_run_cost_usd_total", "Estimated LLM cost of completed runs by stage", ["stage"])
+FIRESTORE_CALL_SECONDS = Histogram(
+    "star_firestore_call_seconds", "Firestore call latency by operation", ["operation"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+
+
+class ChatStreamMetrics:
+    """Times one chat stream; the route sets outcome before it finishes"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.outcome = "incomplete"
+
+    async def track(self, events: AsyncIterator[str]) -> AsyncIterator[str]:
+        first_event: Optional[float] = None
+        CHAT_STREAMS_IN_FLIGHT.inc()
+        try:
+            async for event in events:
+                if first_event is None:
+                    first_event = time.perf_counter()
+                    CHAT_FIRST_EVENT_SECONDS.observe(first_event - self.started)
+                yield event
+        finally:
+            CHAT_STREAMS_IN_FLIGHT.dec()
+            CHAT_STREAM_SECONDS.labels(self.outcome).observe(time.perf_counter() - self.started)
+
+
+def observe_run(performance_metrics, iterations: int) -> None:
+    """Record the stage times, token usage and iteration count of a completed run"""
+    RUN_ITERATIONS.observe(iterations)
+    RUN_STAGE_SECONDS.labels("total").observe(performance_metrics.totalWorkflowTime)
+    if performance_metrics.generationTime:
+        RUN_STAGE_SECONDS.labels("generator").observe(performance_metrics.generationTime)
+    for seconds in performance_metrics.critiqueTimes:
+        RUN_STAGE_SECONDS.labels("critique").observe(seconds)
+    for seconds in performance_metrics.refinementTimes:
+        RUN_STAGE_SECONDS.labels("refiner").observe(seconds)
+    for stage, usage in performance_metrics.tokenUsage.items():
+        RUN_TOKENS.labels(stage, "prompt").observe(usage.promptTokens)
+        RUN_TOKENS.labels(stage, "cached").observe(usage.cachedTokens)
+        RUN_TOKENS.labels(stage, "output").observe(usage.outputTokens)
+        RUN_TOKENS.labels(stage, "thoughts").observe(usage.thoughtsTokens)
+        RUN_COST_USD.labels(stage).inc(usage.costUsd)
+
+
+def register_cache_collectors(response_cache, question_index, single_flight) -> None:
+    """Export the hit/miss counters the per-worker caches already keep for /health"""
+    REGISTRY.register_collector(stats_collector(
+        "star_response_cache", "Whole-pipeline response cache", response_cache.stats,
+        counters=("hits", "misses", "evictions", "expirations"), gauges=("size",)
+    ))
+    REGISTRY.register_collector(stats_collector(
+        "star_similar_questions", "Near-duplicate question index", question_index.stats,
+        counters=("hits", "misses"), gauges=("size",)
+    ))
+    REGISTRY.register_collector(stats_collector(
+        "star_single_flight", "Coalesced agent runs", single_flight.stats,
+        counters=("started", "coalesced", "cancelled"), gauges=("in_flight",)
+    ))
@@ -0,0 +1,113 @@
+"""
+Whole-pipeline response cache
+Caches validated agent results keyed on normalized request inputs plus the deployed agent's identity
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from schemas import FinalResponse
+
+logger = logging.getLogger(__name__)
+
+# Off by default: entries are only invalidated by the TTL or a bump of AGENT_CONFIG_VERSION
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() == "true"
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))  # Seconds an entry stays valid
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))  # LRU bound per worker
+# Bump when the deployed agent's models, prompts or thresholds change, so earlier answers are not served
+AGENT_CONFIG_VERSION = os.getenv("AGENT_CONFIG_VERSION", "1")
+
+# Request fields that determine the agent's output
+CACHE_KEY_FIELDS = ("role", "industry", "question", "resume", "jobDescription")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(value: Any) -> str:
+    """Collapse whitespace and case so trivially different inputs share a cache entry"""
+    return _WHITESPACE_RE.sub(" ", str(value or "")).strip().casefold()
+
+
+def config_fingerprint() -> Dict[str, Any]:
+    """The agent the backend talks to: its deployment and AGENT_CONFIG_VERSION"""
+    return {
+        "version": AGENT_CONFIG_VERSION,
+        "location": os.getenv("AGENT_LOCATION", "local").strip(),
+        "endpoint": os.getenv("AGENT_CLOUD_RUN_URL") or os.getenv("VERTEX_AI_RESOURCE_ID") or os.getenv("LOCAL_AGENT_URL", ""),
+    }
+
+
+def make_cache_key(request_data: Dict[str, Any]) -> str:
+    """Canonical hash of the normalized request inputs and the agent configuration"""
+    canonical = {field: normalize_text(request_data.get(field)) for field in CACHE_KEY_FIELDS}
+    canonical["config"] = config_fingerprint()
+    encoded = json.dumps(canonical, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ResponseCache:
+    """TTL + size-bounded LRU cache of validated FinalResponse objects"""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, ttl: float = RESPONSE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, FinalResponse]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[FinalResponse]:
+        """Return the cached response for key, or None on a miss or expired entry"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        stored_at, response = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return response
+
+    def put(self, key: str, response: FinalResponse) -> None:
+        """Store a completed response, evicting the least recently used entries if full"""
+        self._entries[key] = (time.monotonic(), response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss metrics for /health"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": RESPONSE_CACHE_ENABLED,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+
+def is_cacheable(response: FinalResponse) -> bool:
+    """Only cache complete, successful runs"""
+    return bool(response.iterations) and response.metadata.status == "COMPLETED"
@@ -0,0 +1,187 @@
+"""
+Near-duplicate question index
+MinHash/LSH index over normalized question text, partitioned by role and industry
+"""
+
+import os
+import re
+import zlib
+import random
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# "off" disables the index, "seed" starts the pipeline from the similar answer,
+# "serve" returns the similar answer (marked as reused) without running the pipeline.
+# Opt-in: both change the answer a user gets for a question that merely resembles an earlier one
+NEAR_DUP_MODE = os.getenv("NEAR_DUP_MODE", "off").strip().lower()
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.75"))  # Minimum Jaccard similarity of question terms
+NEAR_DUP_MIN_RATING = float(os.getenv("NEAR_DUP_MIN_RATING", "4.5"))  # Only index answers rated at least this
+NEAR_DUP_MAX_ENTRIES = int(os.getenv("NEAR_DUP_MAX_ENTRIES", "100000"))
+
+# MinHash signature layout: BANDS * ROWS hash functions; candidates share all ROWS values of some band
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+_MERSENNE_PRIME = (1 << 61) - 1
+
+_rng = random.Random(1)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Function words plus the framing shared by most behavioral questions ("Tell me about a time...")
+_STOPWORDS = frozenset("""
+a an the and or but if of to in on at by for with from into about as is are was were be been being
+do did does done have has had i me my you your we our they their he she it its this that these those
+there here what when where which who whom why how can could would should will shall may might must
+tell describe give share walk explain talk example examples time times situation situations instance
+occasion moment once ever some any one please us really very just
+""".split())
+
+_SUFFIXES = ("ing", "ed", "es", "s")
+
+
+def _stem(token: str) -> str:
+    """Crude suffix stripping so handled/handling/handle share a term"""
+    for suffix in _SUFFIXES:
+        if len(token) > len(suffix) + 3 and token.endswith(suffix):
+            return token[:-len(suffix)]
+    return token
+
+
+def question_terms(question: str) -> FrozenSet[str]:
+    """Normalized content terms of a question"""
+    return frozenset(
+        _stem(token) for token in _TOKEN_RE.findall(question.casefold())
+        if token not in _STOPWORDS
+    )
+
+
+def minhash_signature(terms: FrozenSet[str]) -> Tuple[int, ...]:
+    """MinHash signature of a term set"""
+    hashes = [zlib.crc32(term.encode("utf-8")) for term in terms] or [0]
+    return tuple(
+        min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class SimilarMatch(NamedTuple):
+    """A near-duplicate found in the index"""
+    question: str
+    similarity: float
+    payload: Any
+
+
+class QuestionIndex:
+    """In-process LSH index of questions, partitioned by (role, industry).
+
+    LSH buckets give candidates in O(BANDS) dict lookups; candidates are verified
+    with exact Jaccard similarity on their term sets. Oldest entries are evicted
+    beyond max_entries.
+    """
+
+    def __init__(self, threshold: float = NEAR_DUP_THRESHOLD, max_entries: int = NEAR_DUP_MAX_ENTRIES):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Tuple[Tuple[str, str], str, FrozenSet[str], Tuple, Any]]" = OrderedDict()
+        self._buckets: Dict[Tuple, List[int]] = {}
+        self._exact: Dict[Tuple, int] = {}  # (partition, terms) -> entry id, so re-adds replace
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _partition(role: str, industry: str) -> Tuple[str, str]:
+        return (role.strip().casefold(), industry.strip().casefold())
+
+    def add(self, role: str, industry: str, question: str, payload: Any) -> None:
+        """Index a question with its payload (e.g. a high-rated FinalResponse)"""
+        partition = self._partition(role, industry)
+        terms = question_terms(question)
+        if not terms:
+            return
+
+        existing = self._exact.get((partition, terms))
+        if existing is not None:
+            self._remove(existing)
+
+        signature = minhash_signature(terms)
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = (partition, question, terms, signature, payload)
+        self._exact[(partition, terms)] = entry_id
+        for band in range(BANDS):
+            key = (partition, band, signature[band * ROWS:(band + 1) * ROWS])
+            self._buckets.setdefault(key, []).append(entry_id)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, entry_id: int) -> None:
+        partition, _, terms, signature, _ = self._entries.pop(entry_id)
+        self._exact.pop((partition, terms), None)
+        for band in range(BANDS):
+            key = (partition, band, signature[band * ROWS:(band + 1) * ROWS])
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.remove(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def query(self, role: str, industry: str, question: str) -> Optional[SimilarMatch]:
+        """Return the most similar indexed question at or above the threshold, if any"""
+        partition = self._partition(role, industry)
+        terms = question_terms(question)
+        if not terms:
+            self.misses += 1
+            return None
+
+        exact = self._exact.get((partition, terms))
+        if exact is not None:
+            self.hits += 1
+            _, indexed_question, _, _, payload = self._entries[exact]
+            return SimilarMatch(indexed_question, 1.0, payload)
+
+        signature = minhash_signature(terms)
+        best: Optional[SimilarMatch] = None
+        seen = set()
+        for band in range(BANDS):
+            for entry_id in self._buckets.get((partition, band, signature[band * ROWS:(band + 1) * ROWS]), ()):
+                if entry_id in seen:
+                    continue
+                seen.add(entry_id)
+                _, indexed_question, indexed_terms, _, payload = self._entries[entry_id]
+                similarity = jaccard(terms, indexed_terms)
+                if similarity >= self.threshold and (best is None or similarity > best.similarity):
+                    best = SimilarMatch(indexed_question, similarity, payload)
+
+        if best is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return best
+
+    def stats(self) -> Dict[str, Any]:
+        """Index metrics for /health"""
+        lookups = self.hits + self.misses
+        return {
+            "mode": NEAR_DUP_MODE,
+            "size": len(self._entries),
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,117 @@
+"""
+Single-flight coalescing of agent runs
+Concurrent requests with the same input fingerprint share one upstream stream_query
+"""
+
+import os
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from fastapi_backend.response_utils import create_error_response
+
+logger = logging.getLogger(__name__)
+
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+
+
+class _Flight:
+    """One in-flight upstream run and the events it has produced so far"""
+
+    __slots__ = ("events", "finished", "subscribers", "task", "_waiter")
+
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []  # Kept so late subscribers replay from the start
+        self.finished = False
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._waiter = asyncio.Event()
+
+    def publish(self, event: Optional[Dict[str, Any]] = None) -> None:
+        """Append an event (or just wake subscribers) without needing a lock"""
+        if event is not None:
+            self.events.append(event)
+        waiter, self._waiter = self._waiter, asyncio.Event()
+        waiter.set()
+
+    async def wait(self) -> None:
+        await self._waiter.wait()
+
+
+class SingleFlight:
+    """Fan out one upstream event stream per fingerprint to every concurrent subscriber.
+
+    The upstream run is cancelled only when its last subscriber goes away.
+    Events are shared between subscribers and must be treated as read-only.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.started = 0
+        self.coalesced = 0
+        self.cancelled = 0
+
+    async def stream(
+        self,
+        key: str,
+        start: Callable[[], AsyncIterator[Dict[str, Any]]]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Subscribe to the run for key, calling start() to begin one if none is in flight"""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(self._pump(key, flight, start()))
+            self.started += 1
+        else:
+            self.coalesced += 1
+            logger.info(f"[SINGLE_FLIGHT] Joined in-flight run ({flight.subscribers} other subscribers)")
+
+        flight.subscribers += 1
+        index = 0
+        try:
+            while True:
+                while index < len(flight.events):
+                    event = flight.events[index]
+                    index += 1
+                    yield event
+                if flight.finished:
+                    return
+                await flight.wait()
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.finished:
+                logger.info("[SINGLE_FLIGHT] Last subscriber left; cancelling upstream run")
+                self.cancelled += 1
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    async def _pump(self, key: str, flight: _Flight, source: AsyncIterator[Dict[str, Any]]) -> None:
+        try:
+            async for event in source:
+                flight.publish(event)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"[SINGLE_FLIGHT] Upstream run failed: {e}")
+            flight.publish(create_error_response(f"Agent streaming error: {str(e)}"))
+        finally:
+            flight.finished = True
+            self._forget(key, flight)
+            flight.publish()
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        # A finished or abandoned run must not capture new requests
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Coalescing metrics for /health"""
+        return {
+            "enabled": SINGLE_FLIGHT_ENABLED,
+            "in_flight": len(self._flights),
+            "subscribers": sum(flight.subscribers for flight in self._flights.values()),
+            "started": self.started,
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled
+        }
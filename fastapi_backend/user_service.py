@@ -11,6 +11,7 @@ from firebase_admin import auth, firestore
 from google.cloud import firestore as gcp_firestore
 from typing import Dict, Any, Optional, List, Union
 
+from fastapi_backend.metrics import FIRESTORE_CALL_SECONDS
 from schemas import (
     FinalResponse, IterationData, STARResponse, Critique, 
     ResponseMetadata, PerformanceMetrics
@@ -59,7 +60,8 @@ def get_user_profile(user_id: str) -> Optional[Dict[str, Any]]:
     try:
         db = _get_firestore_client()
         user_ref = db.collection('users').document(user_id)
-        user_doc = user_ref.get()
+        with FIRESTORE_CALL_SECONDS.labels("user_get").time():
+            user_doc = user_ref.get()
 
         if user_doc.exists:
             return user_doc.to_dict()
@@ -75,7 +77,8 @@ def get_user_profile(user_id: str) -> Optional[Dict[str, Any]]:
                 'createdAt': gcp_firestore.SERVER_TIMESTAMP,
                 'lastLogin': gcp_firestore.SERVER_TIMESTAMP
             }
-            user_ref.set(user_data)
+            with FIRESTORE_CALL_SECONDS.labels("user_set").time():
+                user_ref.set(user_data)
             return user_data
         except Exception as e:
             logger.error(f"Error creating user profile: {e}")
@@ -88,9 +91,10 @@ def update_last_login(user_id: str) -> bool:
     """Update user's last login timestamp."""
     try:
         db = _get_firestore_client()
-        db.collection('users').document(user_id).update({
-            'lastLogin': gcp_firestore.SERVER_TIMESTAMP
-        })
+        with FIRESTORE_CALL_SECONDS.labels("user_update").time():
+            db.collection('users').document(user_id).update({
+                'lastLogin': gcp_firestore.SERVER_TIMESTAMP
+            })
         return True
     except Exception as e:
         logger.error(f"Error updating last login: {e}")
@@ -128,7 +132,8 @@ def store_user_response(user_id: str, response_data: Dict[str, Any]) -> Optional
         logger.info(f"  - finalResponse keys: {list(final_doc['finalResponse'].keys())}")
 
         # Add the document to the collection
-        _, doc_ref = responses_ref.add(final_doc)
+        with FIRESTORE_CALL_SECONDS.labels("response_add").time():
+            _, doc_ref = responses_ref.add(final_doc)
         
         logger.info(f"Successfully stored response with ID {doc_ref.id} for user {user_id}")
         return doc_ref.id
@@ -2,6 +2,9 @@
 STAR Answer Refiner Agent using ADK Sequential and Loop Agents
 """
 
+# Registers the offline "local-*" stand-in model names (see local_model.py)
+from . import local_model
+
 # Import the main generator agent instance
 from .subagents.generator.agent import star_generator
 
@@ -1,5 +1,7 @@
+import json
 import logging
 import datetime
+from typing import Optional
 from google.adk.agents.callback_context import CallbackContext
 from google.genai import types as genai_types
 
@@ -11,14 +13,28 @@ from schemas import (
     ResponseMetadata,
     PerformanceMetrics
 )
+from shared_utils.tracing import current_trace
+from .config import TRACE_IN_RESPONSE
+from .token_usage import total_usage
+from .tracing import stage_times
 
 logger = logging.getLogger(__name__)
 
-def iteration_history_callback(callback_context: CallbackContext) -> None:
+def same_star_answer(a: Optional[dict], b: Optional[dict]) -> bool:
+    """True if two STAR answer dicts have the same content, ignoring surrounding whitespace."""
+    if not isinstance(a, dict) or not isinstance(b, dict):
+        return False
+    return all(
+        str(a.get(field, "")).strip() == str(b.get(field, "")).strip()
+        for field in ("situation", "task", "action", "result")
+    )
+
+def iteration_history_callback(callback_context: CallbackContext) -> Optional[IterationData]:
     """Callback to record iteration data (STAR answer + critique) into history.
     
     This callback is attached to the LoopAgent and runs after each loop iteration completes.
     It captures both the STAR answer and critique from the completed iteration.
+    Returns the recorded IterationData, or None if nothing could be recorded.
     """
     logger.debug(f"'iteration_history_callback' triggered during invocation: {callback_context.invocation_id}")
 
@@ -35,16 +51,24 @@ def iteration_history_callback(callback_context: CallbackContext) -> None:
             type(current_star_answer_dict).__name__,
             type(current_critique_dict).__name__
         )
-        return
+        return None
 
     try:
         star_answer_obj = STARResponse(**current_star_answer_dict)
         critique_obj = Critique(**current_critique_dict)
     except Exception as e:
         logger.error(f"'iteration_history_callback': Error parsing Pydantic models from state: {e}", exc_info=True)
-        return
+        return None
 
     iteration_list = callback_context.state.get("fullIterationHistory", [])
+
+    # An unchanged answer is not a new iteration; the iteration planner stops the loop on it
+    unchanged = bool(iteration_list) and same_star_answer(iteration_list[-1].get("starAnswer"), current_star_answer_dict)
+    callback_context.state["answer_unchanged"] = unchanged
+    if unchanged:
+        logger.info("'iteration_history_callback': Refined answer is unchanged; not recording a new iteration.")
+        return None
+
     # Get current iteration, initialize if not present
     iteration_number = callback_context.state.get("currentIteration", 0) + 1
     callback_context.state["currentIteration"] = iteration_number 
@@ -53,8 +77,13 @@ def iteration_history_callback(callback_context: CallbackContext) -> None:
         iterationNumber=iteration_number,
         starAnswer=star_answer_obj,
         critique=critique_obj,
+        answerModel=callback_context.state.get("current_answer_model"),
+        critiqueModel=callback_context.state.get("current_critique_model"),
+        tokenUsage=callback_context.state.get("iteration_token_usage") or {},
         timestamp=datetime.datetime.now(datetime.timezone.utc).isoformat()
     )
+    # Later calls count towards the next iteration
+    callback_context.state["iteration_token_usage"] = {}
     
     # Convert to dict for JSON serialization before storing in state
     iteration_list.append(iteration_entry.model_dump())
@@ -69,12 +98,20 @@ def iteration_history_callback(callback_context: CallbackContext) -> None:
         f"'iteration_history_callback': Recorded iteration {iteration_number}. "
         f"Rating: {critique_obj.rating}. Highest rating so far: {new_highest_rating}."
     )
+    return iteration_entry
+
+def iteration_event_content(iteration_entry: IterationData, highest_rating: float) -> genai_types.Content:
+    """Build the progressive `type: "iteration"` event streamed after each completed iteration."""
+    payload = {
+        "type": "iteration",
+        "data": iteration_entry.model_dump(),
+        "highestRating": highest_rating
+    }
+    return genai_types.Content(role="model", parts=[genai_types.Part(text=json.dumps(payload))])
 
 def final_formatting_callback(callback_context: CallbackContext) -> genai_types.Content:
     """Callback to prepare the final structured response from the agent's state."""
-    # Force logging at WARNING level to ensure visibility
-    logger.warning(f"🔥 FINAL_FORMATTING_CALLBACK TRIGGERED for invocation: {callback_context.invocation_id}")
-    print(f"🔥 FINAL_FORMATTING_CALLBACK TRIGGERED for invocation: {callback_context.invocation_id}")  # Also print to console
+    logger.debug(f"'final_formatting_callback' triggered during invocation: {callback_context.invocation_id}")
 
     full_iteration_history_raw = callback_context.state.get("fullIterationHistory", [])
     processed_history_list = []
@@ -113,24 +150,34 @@ def final_formatting_callback(callback_context: CallbackContext) -> genai_types.
         userId=user_id
     )
 
-    # Extract timing data from orchestrator's timing_data and individual agents
-    timing_data = callback_context.state.get("timing_data", {})
-    generation_time = callback_context.state.get("generation_time", 0.0)
-    critique_times = callback_context.state.get("critique_times", [])
-    refinement_times = callback_context.state.get("refinement_times", [])
-    
-    # Force timing logs to WARNING level for visibility
-    logger.warning(f"🕐 TIMING DATA - Total workflow: {timing_data}")
-    logger.warning(f"🕐 TIMING DATA - Generation time: {generation_time}")
-    logger.warning(f"🕐 TIMING DATA - Critique times: {critique_times}")
-    logger.warning(f"🕐 TIMING DATA - Refinement times: {refinement_times}")
-    print(f"🕐 TIMING: workflow={timing_data}, gen={generation_time}, crit={critique_times}, ref={refinement_times}")
+    # Timing comes from this run's trace: the run span so far and the finished agent spans
+    trace = current_trace(callback_context.invocation_id)
+    total_workflow_time = trace.root.duration if trace is not None else 0.0
+    times = stage_times(trace)
+    generation_time = times["generation_time"]
+    critique_times = times["critique_times"]
+    refinement_times = times["refinement_times"]
+    llm_calls_saved = callback_context.state.get("llm_calls_saved", 0)
+    stop_reason = callback_context.state.get("stop_reason")
+    model_latencies = callback_context.state.get("model_latencies") or {}
+    token_usage = callback_context.state.get("token_usage") or {}
+
+    logger.debug(
+        f"'final_formatting_callback': workflow={total_workflow_time:.3f}s, generation={generation_time:.3f}s, "
+        f"critique={critique_times}, refinement={refinement_times}, tokens={token_usage}"
+    )
     
     perf_metrics = PerformanceMetrics(
-        totalWorkflowTime=timing_data.get("total_workflow", 0.0) if isinstance(timing_data, dict) else 0.0,
+        totalWorkflowTime=total_workflow_time,
         generationTime=generation_time,
         critiqueTimes=critique_times,
-        refinementTimes=refinement_times
+        refinementTimes=refinement_times,
+        llmCallsSaved=llm_calls_saved,
+        stopReason=stop_reason,
+        modelLatencies=model_latencies,
+        tokenUsage=token_usage,
+        totalTokenUsage=total_usage(token_usage),
+        trace=trace.tree() if trace is not None and TRACE_IN_RESPONSE else None
     )
     logger.info(f"'final_formatting_callback': Created perf_metrics: {perf_metrics.model_dump()}")
 
@@ -146,7 +193,6 @@ def final_formatting_callback(callback_context: CallbackContext) -> genai_types.
         logger.error(f"'final_formatting_callback': Error serializing FinalResponse to JSON: {e}", exc_info=True)
         # Fallback or error response
         error_response = {"error": "Failed to generate final response", "details": str(e)}
-        import json
         final_json_string = json.dumps(error_response, indent=2)
 
     logger.info("'final_formatting_callback': Prepared final output successfully.")
@@ -0,0 +1,115 @@
+"""
+Parallel candidate generation stage
+
+Generates several STAR answers concurrently (generator clones at different
+temperatures), critiques each one in the same parallel branch, and hands only
+the best-rated candidate to the refinement loop. The winning critique is left
+in state as `pending_critique` so the loop's first critique reuses it instead
+of calling the model again.
+"""
+
+import time
+import logging
+from typing import AsyncGenerator, List
+from typing_extensions import override
+
+from google.adk.agents import BaseAgent, ParallelAgent, SequentialAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+from pydantic import ValidationError
+
+from schemas import STARResponse, Critique
+from .subagents.generator.agent import build_candidate_generator
+from .subagents.critique.agent import build_candidate_critic
+
+logger = logging.getLogger(__name__)
+
+
+class CandidateGenerationStage(BaseAgent):
+    """Generates and critiques N candidates concurrently, then selects the best for refinement."""
+
+    star_generator: BaseAgent
+    candidate_agent: ParallelAgent
+    candidate_count: int
+
+    def __init__(self, name: str, star_generator: BaseAgent, candidate_count: int, temperatures: List[float]):
+        temperatures = temperatures or [1.0]
+        branches = [
+            SequentialAgent(
+                name=f"candidate_{i}",
+                sub_agents=[
+                    build_candidate_generator(i, temperatures[i % len(temperatures)]),
+                    build_candidate_critic(i)
+                ]
+            )
+            for i in range(candidate_count)
+        ]
+        candidate_agent = ParallelAgent(
+            name=f"{name}_parallel",
+            sub_agents=branches,
+            description="Generates and critiques STAR answer candidates concurrently."
+        )
+        super().__init__(
+            name=name,
+            description="Generates several STAR answer candidates and keeps the best one.",
+            star_generator=star_generator,
+            candidate_agent=candidate_agent,
+            candidate_count=candidate_count,
+            sub_agents=[star_generator, candidate_agent]
+        )
+        logger.info(f"CandidateGenerationStage '{name}' configured with {candidate_count} candidates at temperatures {temperatures}")
+
+    @override
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        # A run seeded with a similar question's answer needs no candidates
+        if ctx.session.state.get("seed_star_answer"):
+            async for event in self.star_generator.run_async(ctx):
+                yield event
+            return
+
+        started = time.perf_counter()
+        async for event in self.candidate_agent.run_async(ctx):
+            if event.partial:
+                # Partial output of concurrent candidates interleaves; only complete events are forwarded
+                continue
+            yield event
+        duration = time.perf_counter() - started  # For the log line; the run's trace has the stage span
+
+        candidates = []
+        for i in range(self.candidate_count):
+            try:
+                answer = STARResponse.model_validate(ctx.session.state.get(f"candidate_{i}_answer"))
+                critique = Critique.model_validate(ctx.session.state.get(f"candidate_{i}_critique"))
+            except ValidationError as e:
+                logger.warning(f"'{self.name}': Candidate {i} is incomplete or invalid, skipping: {e}")
+                continue
+            candidates.append((critique.rating, i, answer, critique))
+
+        if not candidates:
+            logger.warning(f"'{self.name}': No valid candidates; falling back to the single generator")
+            async for event in self.star_generator.run_async(ctx):
+                yield event
+            return
+
+        rating, index, answer, critique = max(candidates, key=lambda candidate: candidate[0])
+        ratings = [candidate[0] for candidate in sorted(candidates, key=lambda candidate: candidate[1])]
+        logger.info(
+            f"'{self.name}': Selected candidate {index} with rating {rating} "
+            f"(ratings {ratings}) in {duration:.3f}s"
+        )
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            content=types.Content(
+                role="model",
+                parts=[types.Part(text=f"Selected the best of {len(candidates)} candidate answers (rating {rating})")]
+            ),
+            actions=EventActions(state_delta={
+                "current_star_answer": answer.model_dump(),
+                "pending_critique": critique.model_dump(),
+                "candidate_ratings": ratings
+            })
+        )
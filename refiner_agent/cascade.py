@@ -0,0 +1,146 @@
+"""
+Per-stage model cascade
+
+Critique runs on a fast, cheap model, and so do refinements while the answer
+is improving. Once ESCALATION_AFTER_ROUNDS rounds have passed and the best
+rating is still below ESCALATION_THRESHOLD, refinement escalates to the strong
+model. Model names containing a provider prefix (e.g. "openai/gpt-4o-mini") are
+served through LiteLLM; plain names are resolved by the ADK model registry.
+
+Every model call records which model and tier it used, so iterations can
+report their models and PerformanceMetrics can report latency by tier.
+"""
+
+import logging
+from typing import AsyncGenerator, Callable, Optional, Union
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.models.registry import LLMRegistry
+
+from shared_utils.tracing import current_trace
+
+from . import local_model  # Registers local-* names so they can be used as tiers offline
+from .metrics import LLM_CALL_SECONDS, agent_stage
+from .config import (
+    CASCADE_ENABLED, FAST_MODEL, STRONG_MODEL, ESCALATION_THRESHOLD, ESCALATION_AFTER_ROUNDS,
+    STAR_CRITIQUE_MODEL, STAR_REFINER_MODEL
+)
+
+logger = logging.getLogger(__name__)
+
+# Tiers reported in PerformanceMetrics.modelLatencies
+TIER_DEFAULT = "default"
+TIER_FAST = "fast"
+TIER_STRONG = "strong"
+
+
+def resolve_model(name: str) -> BaseLlm:
+    """Model instance for a name: LiteLLM for provider-prefixed names, the ADK registry otherwise"""
+    if "/" in name:
+        from google.adk.models.lite_llm import LiteLlm
+        return LiteLlm(model=name)
+    return LLMRegistry.new_llm(name)
+
+
+class CascadeLlm(BaseLlm):
+    """Routes each request to the fast or strong model, as chosen by model_tier_callback"""
+
+    model: str = "cascade"
+    fast: BaseLlm
+    strong: BaseLlm
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        llm = self.strong if llm_request.model == self.strong.model else self.fast
+        llm_request.model = llm.model
+        async for response in llm.generate_content_async(llm_request, stream=stream):
+            yield response
+
+
+def _create_models():
+    if not CASCADE_ENABLED:
+        return STAR_CRITIQUE_MODEL, STAR_REFINER_MODEL
+    fast = resolve_model(FAST_MODEL)
+    logger.info(
+        f"Model cascade enabled: fast={FAST_MODEL}, strong={STRONG_MODEL}, escalate below "
+        f"{ESCALATION_THRESHOLD} after {ESCALATION_AFTER_ROUNDS} round(s)"
+    )
+    return fast, CascadeLlm(fast=fast, strong=resolve_model(STRONG_MODEL))
+
+
+# Models for the critique agent and for the answer-refining agents (refiner, fused critique-refiner)
+critique_model, refinement_model = _create_models()
+AgentModel = Union[str, BaseLlm]
+
+
+def refinement_tier(state) -> str:
+    """Escalate once enough rounds have passed without reaching the escalation threshold"""
+    if not CASCADE_ENABLED:
+        return TIER_DEFAULT
+    rounds = state.get("planner_round", 0)
+    if rounds >= ESCALATION_AFTER_ROUNDS and state.get("highestRating", 0.0) < ESCALATION_THRESHOLD:
+        return TIER_STRONG
+    return TIER_FAST
+
+
+def model_tier_callback(role: str) -> Callable[[CallbackContext, LlmRequest], Optional[LlmResponse]]:
+    """Before-model callback that picks the tier for a stage and records the model it used.
+
+    role is "generate", "critique", "refine" or "fused" (critique + next answer in one call).
+    """
+    def callback(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        state = callback_context.state
+        if role in ("refine", "fused"):
+            tier = refinement_tier(state)
+            if tier == TIER_STRONG:
+                if state.get("escalated_at_round") is None:
+                    state["escalated_at_round"] = state.get("planner_round", 0)
+                    logger.info(f"Escalating refinement to {STRONG_MODEL} (best rating {state.get('highestRating', 0.0)})")
+                llm_request.model = STRONG_MODEL
+            elif tier == TIER_FAST:
+                llm_request.model = FAST_MODEL
+        elif role == "critique":
+            tier = TIER_FAST if CASCADE_ENABLED else TIER_DEFAULT
+        else:
+            tier = TIER_DEFAULT
+
+        model_name = llm_request.model
+        if role == "critique":
+            state["current_critique_model"] = model_name
+        elif role == "fused":
+            # The critique is for this iteration; the refined answer belongs to the next one
+            state["current_critique_model"] = model_name
+            state["pending_answer_model"] = model_name
+        else:
+            state["current_answer_model"] = model_name
+
+        agent_name = callback_context.agent_name
+        state[f"model_tier_{agent_name}"] = tier
+        state[f"model_name_{agent_name}"] = model_name
+        return None
+
+    return callback
+
+
+def record_model_latency(callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+    """After-model callback that adds the call's latency to its tier and to /metrics"""
+    if llm_response.partial:
+        return None
+    state = callback_context.state
+    agent_name = callback_context.agent_name
+    tier = state.get(f"model_tier_{agent_name}")
+    trace = current_trace(callback_context.invocation_id)
+    # The call's "llm" span was ended just before the after-model callbacks (see tracing.py)
+    span = trace.latest("llm", agent_name) if trace is not None else None
+    if tier is None or span is None or span.ended is None:
+        return None
+    state[f"model_tier_{agent_name}"] = None  # Counted once per call
+    elapsed = span.duration
+    model_name = state.get(f"model_name_{agent_name}") or "unknown"
+    LLM_CALL_SECONDS.labels(agent_stage(agent_name), model_name).observe(elapsed)
+    latencies = dict(state.get("model_latencies") or {})
+    latencies[tier] = list(latencies.get(tier, [])) + [elapsed]
+    state["model_latencies"] = latencies
+    return None
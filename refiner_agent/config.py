@@ -2,10 +2,52 @@
 import os
 
 # Model configurations - gemini-2.5-flash-preview-05-20, gemini-2.0-flash
-STAR_GENERATOR_MODEL = "gemini-2.0-flash"
-STAR_CRITIQUE_MODEL = "gemini-2.0-flash"
-STAR_REFINER_MODEL = "gemini-2.0-flash"
+# "local-stand-in" selects the offline stand-in model in local_model.py
+STAR_GENERATOR_MODEL = os.getenv("STAR_GENERATOR_MODEL", "gemini-2.0-flash")
+STAR_CRITIQUE_MODEL = os.getenv("STAR_CRITIQUE_MODEL", "gemini-2.0-flash")
+STAR_REFINER_MODEL = os.getenv("STAR_REFINER_MODEL", "gemini-2.0-flash")
+
+# Model cascade: critique and early refinements on FAST_MODEL; refinement escalates to STRONG_MODEL
+# when the best rating is still below ESCALATION_THRESHOLD after ESCALATION_AFTER_ROUNDS rounds.
+# Provider-prefixed names (e.g. "openai/gpt-4o-mini") are served through LiteLLM.
+CASCADE_ENABLED = os.getenv("CASCADE_ENABLED", "false").lower() == "true"
+FAST_MODEL = os.getenv("FAST_MODEL", "gemini-2.0-flash-lite")
+STRONG_MODEL = os.getenv("STRONG_MODEL", "gemini-2.5-flash")
+ESCALATION_THRESHOLD = float(os.getenv("ESCALATION_THRESHOLD", "4.2"))
+ESCALATION_AFTER_ROUNDS = int(os.getenv("ESCALATION_AFTER_ROUNDS", "1"))
+
+# USD per million tokens as model=input:cached_input:output, for the cost figures in PerformanceMetrics.
+# Thinking tokens are billed as output. Models without a price report token counts only.
+MODEL_PRICES = {
+    model.strip(): tuple(float(price) for price in prices.split(":"))
+    for model, _, prices in (
+        item.partition("=") for item in os.getenv(
+            "MODEL_PRICES",
+            "gemini-2.0-flash=0.10:0.025:0.40,gemini-2.0-flash-lite=0.075:0.01875:0.30,gemini-2.5-flash=0.30:0.075:2.50"
+        ).split(",") if item.strip()
+    )
+}
 
 # Refinement settings (these can remain configurable via env)
 RATING_THRESHOLD = float(os.getenv("RATING_THRESHOLD", "4.6"))
-MAX_ITERATIONS = int(os.getenv("MAX_ITERATIONS", "3"))
\ No newline at end of file
+MAX_ITERATIONS = int(os.getenv("MAX_ITERATIONS", "3"))
+PLATEAU_PATIENCE = int(os.getenv("PLATEAU_PATIENCE", "1"))  # Stop after this many rounds without improvement (0 disables)
+# "two_step": separate critique and refiner calls per round; "fused": one call returns both
+REFINEMENT_MODE = os.getenv("REFINEMENT_MODE", "two_step").strip().lower()
+MIN_RATING_IMPROVEMENT = float(os.getenv("MIN_RATING_IMPROVEMENT", "0.1"))  # Smallest rating gain that counts as progress
+
+# Parallel candidate generation: 1 keeps the single generator; N > 1 generates and critiques
+# N candidates concurrently and refines only the best one
+CANDIDATE_COUNT = int(os.getenv("CANDIDATE_COUNT", "1"))
+CANDIDATE_TEMPERATURES = [
+    float(t) for t in os.getenv("CANDIDATE_TEMPERATURES", "0.4,0.8,1.2").split(",") if t.strip()
+]
+
+# Relevance compression of resume / job description before generation (BM25 over passages)
+INPUT_COMPRESSION_ENABLED = os.getenv("INPUT_COMPRESSION_ENABLED", "true").lower() == "true"
+INPUT_TOKEN_BUDGET = int(os.getenv("INPUT_TOKEN_BUDGET", "800"))  # Per document
+INPUT_TOP_K = int(os.getenv("INPUT_TOP_K", "10"))  # Max passages kept per document
+
+# Attach the run's span tree (agents, LLM calls, callbacks) to PerformanceMetrics.trace; debug data,
+# stored with every saved response when on
+TRACE_IN_RESPONSE = os.getenv("TRACE_IN_RESPONSE", "false").lower() == "true"
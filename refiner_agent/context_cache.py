@@ -0,0 +1,209 @@
+"""
+Context caching for the run-stable part of the prompts
+
+The resume and job description can be 25k characters together and would
+otherwise be re-sent with every model call of a run. When they are large
+enough, the first model call of a run stores them as cached content and every
+generator/critique/refiner call of that run references the cache instead.
+The caches of a run are released when the orchestrator finishes.
+
+Critique and refiner prompts do not include the background themselves; they
+see it only through the cache, billed at the cached-token rate. Input
+compression (INPUT_COMPRESSION_ENABLED) keeps at most INPUT_TOKEN_BUDGET
+tokens per document, so with the default budget the background never reaches
+CONTEXT_CACHE_MIN_TOKENS; caching is then turned off at startup rather than
+checked on every call. Disable compression to cache the full inputs.
+"""
+
+import os
+import uuid
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+from .config import INPUT_COMPRESSION_ENABLED, INPUT_TOKEN_BUDGET
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_CACHE_BACKEND = os.getenv("CONTEXT_CACHE_BACKEND", "off").strip().lower()  # off | gemini | local
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("CONTEXT_CACHE_MIN_TOKENS", "4096"))  # Gemini's minimum cacheable size
+CONTEXT_CACHE_TTL = int(os.getenv("CONTEXT_CACHE_TTL", "900"))  # Seconds; a safety net, runs release their caches
+
+_CHARS_PER_TOKEN = 4  # Rough estimate, only used to decide whether caching is worth it
+BACKGROUND_REFERENCE = "(provided in the candidate background above)"
+
+
+def background_contents(resume: str, job_description: str) -> List[types.Content]:
+    """The cached prefix: the candidate's resume and the job description"""
+    sections = ["## CANDIDATE BACKGROUND"]
+    if resume:
+        sections.append(f"Resume:\n{resume}")
+    if job_description:
+        sections.append(f"Job description:\n{job_description}")
+    return [types.Content(role="user", parts=[types.Part(text="\n\n".join(sections))])]
+
+
+class GeminiCacheBackend:
+    """Explicit context caches via the google-genai client (Vertex AI or Gemini API, from the environment)"""
+
+    def __init__(self):
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            from google import genai
+            self._client = genai.Client()
+        return self._client
+
+    async def create(self, model: str, contents: List[types.Content], ttl: int) -> str:
+        cache = await self._get_client().aio.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(contents=contents, ttl=f"{ttl}s", display_name="star-background")
+        )
+        return cache.name
+
+    async def delete(self, name: str) -> None:
+        await self._get_client().aio.caches.delete(name=name)
+
+
+class LocalCacheBackend:
+    """In-process stand-in for offline runs; resolved by the local stand-in model"""
+
+    def __init__(self):
+        self.entries: Dict[str, Tuple[str, List[types.Content]]] = {}
+        self.lookups = 0
+
+    async def create(self, model: str, contents: List[types.Content], ttl: int) -> str:
+        name = f"cachedContents/local-{uuid.uuid4().hex[:12]}"
+        self.entries[name] = (model, contents)
+        return name
+
+    async def delete(self, name: str) -> None:
+        self.entries.pop(name, None)
+
+    def lookup(self, name: str, model: str) -> Optional[List[types.Content]]:
+        """Resolve a cache handle the way the API would: unknown or wrong-model handles fail"""
+        self.lookups += 1
+        entry = self.entries.get(name)
+        if entry is None or entry[0] != model:
+            return None
+        return entry[1]
+
+
+class ContextCacheManager:
+    """Creates one cache per (run, model) on first use, rewrites requests to use it, and releases it at the end"""
+
+    def __init__(self, backend, min_tokens: int = CONTEXT_CACHE_MIN_TOKENS, ttl: int = CONTEXT_CACHE_TTL):
+        self.backend = backend
+        self.min_tokens = min_tokens
+        self.ttl = ttl
+        self._handles: Dict[str, Dict[str, str]] = {}  # invocation id -> model -> cache name
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        self.created = 0
+        self.reused = 0
+        self.released = 0
+        self.failures = 0
+
+    async def before_model_callback(self, callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        """Point the request at the run's background cache, creating it on first use"""
+        # The relevance-compressed inputs when InputCompressor ran, as the generator prompt uses them
+        state = callback_context.state
+        resume = (state.get("resume_context", state.get("resume")) or "").strip()
+        job_description = (state.get("jobDescription_context", state.get("jobDescription")) or "").strip()
+        if (len(resume) + len(job_description)) / _CHARS_PER_TOKEN < self.min_tokens:
+            return None
+        instruction = llm_request.config.system_instruction if llm_request.config else None
+        if instruction is not None and not isinstance(instruction, str):
+            return None
+
+        model = llm_request.model
+        if not model or "/" in model:
+            # LiteLLM-served models cannot use Gemini cached content
+            return None
+        invocation_id = callback_context.invocation_id
+        # Parallel candidates may ask at the same time; only one of them creates the cache
+        lock = self._locks.setdefault((invocation_id, model), asyncio.Lock())
+        async with lock:
+            handles = self._handles.setdefault(invocation_id, {})
+            name = handles.get(model)
+            if name is None:
+                try:
+                    name = await self.backend.create(model, background_contents(resume, job_description), self.ttl)
+                except Exception as e:
+                    self.failures += 1
+                    logger.warning(f"[CONTEXT_CACHE] Could not create cache for {model}, sending full prompt: {e}")
+                    return None
+                handles[model] = name
+                self.created += 1
+                logger.info(f"[CONTEXT_CACHE] Created {name} for invocation {invocation_id} ({model})")
+            else:
+                self.reused += 1
+
+        # Cached content cannot be combined with a system instruction, so the (now short)
+        # instruction moves into the request contents, without the cached background
+        if instruction:
+            for value in (resume, job_description):
+                if value:
+                    instruction = instruction.replace(value, BACKGROUND_REFERENCE)
+            llm_request.contents.insert(0, types.Content(role="user", parts=[types.Part(text=instruction)]))
+        llm_request.config.system_instruction = None
+        llm_request.config.cached_content = name
+        return None
+
+    async def release(self, invocation_id: str) -> None:
+        """Delete every cache created for a run"""
+        handles = self._handles.pop(invocation_id, {})
+        for model in handles:
+            self._locks.pop((invocation_id, model), None)
+        for name in handles.values():
+            try:
+                await self.backend.delete(name)
+                self.released += 1
+            except Exception as e:
+                self.failures += 1
+                logger.warning(f"[CONTEXT_CACHE] Could not delete {name} (expires after {self.ttl}s): {e}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "created": self.created,
+            "reused": self.reused,
+            "released": self.released,
+            "failures": self.failures,
+            "active_runs": len(self._handles)
+        }
+
+
+def _create_manager() -> Optional[ContextCacheManager]:
+    if CONTEXT_CACHE_BACKEND == "off":
+        return None
+    if INPUT_COMPRESSION_ENABLED and 2 * INPUT_TOKEN_BUDGET < CONTEXT_CACHE_MIN_TOKENS:
+        # The compressed resume and job description can never be large enough to cache
+        logger.warning(
+            f"[CONTEXT_CACHE] Disabled: input compression keeps at most {2 * INPUT_TOKEN_BUDGET} background tokens, "
+            f"below CONTEXT_CACHE_MIN_TOKENS={CONTEXT_CACHE_MIN_TOKENS}; set INPUT_COMPRESSION_ENABLED=false to cache"
+        )
+        return None
+    if CONTEXT_CACHE_BACKEND == "gemini":
+        return ContextCacheManager(GeminiCacheBackend())
+    if CONTEXT_CACHE_BACKEND == "local":
+        return ContextCacheManager(LocalCacheBackend())
+    return None
+
+
+# Shared by all agents of this process; None when caching is disabled
+context_cache = _create_manager()
+
+
+def with_context_cache(*callbacks) -> Optional[list]:
+    """Model callbacks for an agent, followed by the context cache callback when caching is enabled.
+
+    The agent's own callbacks run first, so a call they short-circuit never creates a cache.
+    """
+    chain = list(callbacks)
+    if context_cache is not None:
+        chain.append(context_cache.before_model_callback)
+    return chain or None
@@ -1,3 +1,4 @@
+import time
 import logging
 from typing import AsyncGenerator
 from typing_extensions import override
@@ -6,68 +7,211 @@ from google.adk.agents import BaseAgent
 from google.adk.agents.invocation_context import InvocationContext
 from google.adk.events import Event, EventActions
 
+from shared_utils.relevance import compress_text
+
 # Assuming your Critique schema is in .schemas and has a 'rating' field
 # from .schemas import Critique # We'll fetch the dict from state directly
 
 logger = logging.getLogger(__name__)
 
 class RatingChecker(BaseAgent):
-    """Checks critique rating and escalates to stop refinement if rating >= threshold."""
+    """Plans the refinement loop: decides after each critique whether another refine round is worth it.
+
+    Stops the loop (escalates) when the rating meets the threshold, when this is the last
+    allowed round (its refine output would never be critiqued), when ratings stop improving,
+    or when the refiner returned an unchanged answer. LLM calls avoided compared to running
+    every round are accumulated in `llm_calls_saved`, and the reason in `stop_reason`.
+    """
     
     rating_threshold: float = 4.6  # Define as a class field for Pydantic
+    max_iterations: int = 3
+    plateau_patience: int = 1  # Rounds without improvement before stopping; 0 disables
+    min_improvement: float = 0.1
+    fused: bool = False  # Critique and refinement come from one call (no separate refine to skip)
 
-    def __init__(self, name: str, rating_threshold: float = 4.6):
-        super().__init__(name=name, rating_threshold=rating_threshold)
-        logger.info(f"RatingChecker '{name}' initialized with threshold: {self.rating_threshold}")
+    def __init__(
+        self,
+        name: str,
+        rating_threshold: float = 4.6,
+        max_iterations: int = 3,
+        plateau_patience: int = 1,
+        min_improvement: float = 0.1,
+        fused: bool = False
+    ):
+        super().__init__(
+            name=name,
+            rating_threshold=rating_threshold,
+            max_iterations=max_iterations,
+            plateau_patience=plateau_patience,
+            min_improvement=min_improvement,
+            fused=fused
+        )
+        logger.info(
+            f"RatingChecker '{name}' initialized with threshold: {self.rating_threshold}, "
+            f"max iterations: {self.max_iterations}, plateau patience: {self.plateau_patience}"
+        )
+
+    def _stop(self, ctx: InvocationContext, reason: str, round_number: int, calls_saved: int) -> Event:
+        state = ctx.session.state
+        total_saved = state.get("llm_calls_saved", 0) + calls_saved
+        logger.info(f"'{self.name}': Stopping refinement after round {round_number} ({reason}); LLM calls saved: {total_saved}")
+        return Event(
+            author=self.name,
+            actions=EventActions(
+                escalate=True,
+                state_delta={"stop_reason": reason, "llm_calls_saved": total_saved, "planner_round": round_number}
+            )
+        )
 
     @override
     async def _run_async_impl(
         self, ctx: InvocationContext
     ) -> AsyncGenerator[Event, None]:
-        """Checks the critique rating from session state and yields an escalation event if threshold is met."""
+        """Checks the latest critique and yields an escalation event when the loop should stop."""
         logger.debug(f"'{self.name}' started. Invocation ID: {ctx.invocation_id}")
+        state = ctx.session.state
+        round_number = state.get("planner_round", 0) + 1
+        # Calls for every round that would still have run, plus this round's separate refine
+        refine_call = 0 if self.fused else 1
+        calls_per_round = 1 if self.fused else 2
+        remaining_calls = refine_call + calls_per_round * max(0, self.max_iterations - round_number)
 
-        # The star_critique agent should have placed its output (Critique model) 
-        # into state, e.g., under the key "current_critique".
-        critique_output = ctx.session.state.get("current_critique")
+        if state.get("answer_unchanged"):
+            yield self._stop(ctx, "unchanged", round_number, remaining_calls)
+            return
 
+        # The star_critique agent places its output (Critique model) into state under "current_critique".
+        critique_output = state.get("current_critique")
+        rating = None
         if critique_output is None:
             logger.warning(
                 f"'{self.name}': Critique output not found in session state under key 'current_critique'. Proceeding without escalation."
             )
-            yield Event(author=self.name)
+        else:
+            try:
+                rating = critique_output.get("rating") if isinstance(critique_output, dict) else critique_output.rating
+                if rating is None:
+                    raise ValueError("'rating' field is missing or None in critique_output")
+                rating = float(rating) # Ensure it's a float
+            except (AttributeError, ValueError, TypeError) as e:
+                logger.error(
+                    f"'{self.name}': Error accessing rating from critique_output. "
+                    f"Critique data: {critique_output}. Error: {e}. Proceeding without escalation."
+                )
+                rating = None
+
+        if rating is not None:
+            logger.info(f"'{self.name}': Found rating {rating} in state. Threshold is {self.rating_threshold}.")
+            if rating >= self.rating_threshold:
+                # Same stop as before the planner existed, so nothing is counted as saved
+                yield self._stop(ctx, "threshold", round_number, 0)
+                return
+
+        if round_number >= self.max_iterations:
+            # The loop ends after this round anyway; its refined answer would never be critiqued
+            yield self._stop(ctx, "max_iterations", round_number, refine_call)
             return
 
-        # Assuming critique_output is a dictionary representation of the Critique Pydantic model
-        # or the Pydantic model itself which can be accessed like a dict.
-        try:
-            rating = critique_output.get("rating") if isinstance(critique_output, dict) else critique_output.rating
-            if rating is None:
-                raise ValueError("'rating' field is missing or None in critique_output")
-            rating = float(rating) # Ensure it's a float
-        except (AttributeError, ValueError, TypeError) as e:
-            logger.error(
-                f"'{self.name}': Error accessing rating from critique_output. "
-                f"Critique data: {critique_output}. Error: {e}. Proceeding without escalation."
-            )
+        # Best rating of the earlier rounds, kept by the planner itself: the iteration history
+        # skips a round whose critique could not be recorded, so its last entry may not be this round's
+        best_rating = state.get("planner_best_rating")
+        stalled_rounds = 0
+        if rating is not None and self.plateau_patience > 0:
+            stalled_rounds = state.get("stalled_rounds", 0)
+            if best_rating is not None:
+                if rating < best_rating + self.min_improvement:
+                    stalled_rounds += 1
+                else:
+                    stalled_rounds = 0
+            if stalled_rounds >= self.plateau_patience:
+                yield self._stop(ctx, "plateau", round_number, remaining_calls)
+                return
+
+        state_delta = {"planner_round": round_number, "stalled_rounds": stalled_rounds}
+        if rating is not None:
+            state_delta["planner_best_rating"] = rating if best_rating is None else max(best_rating, rating)
+        logger.info(f"'{self.name}': Round {round_number} of {self.max_iterations}; continuing loop.")
+        yield Event(author=self.name, actions=EventActions(state_delta=state_delta))
+
+        logger.debug(f"'{self.name}' finished.")
+
+class RefinementApplier(BaseAgent):
+    """Fused mode: promotes the refined answer to current_star_answer once the planner decides to continue."""
+
+    @override
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        pending = ctx.session.state.get("pending_star_answer")
+        if not isinstance(pending, dict):
+            logger.warning(f"'{self.name}': No refined answer in state under 'pending_star_answer'; keeping current answer.")
             yield Event(author=self.name)
             return
+        yield Event(
+            author=self.name,
+            actions=EventActions(state_delta={
+                "current_star_answer": pending,
+                "pending_star_answer": None,
+                "current_answer_model": ctx.session.state.get("pending_answer_model")
+            })
+        )
 
-        logger.info(f"'{self.name}': Found rating {rating} in state. Threshold is {self.rating_threshold}.")
+class InputCompressor(BaseAgent):
+    """Keeps only the resume and job description passages relevant to the question.
 
-        if rating >= self.rating_threshold:
-            logger.info(
-                f"'{self.name}': Rating {rating} >= threshold {self.rating_threshold}. Escalating to stop loop."
-            )
-            yield Event(author=self.name, actions=EventActions(escalate=True))
-        else:
+    Writes `resume_context` and `jobDescription_context`, which the generator prompt
+    uses; the original inputs stay in state for the response metadata.
+    """
+
+    enabled: bool = True
+    token_budget: int = 800  # Per document
+    top_k: int = 10
+
+    @override
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        resume = state.get("resume") or ""
+        job_description = state.get("jobDescription") or ""
+        if not self.enabled:
+            yield Event(author=self.name, actions=EventActions(state_delta={
+                "resume_context": resume, "jobDescription_context": job_description
+            }))
+            return
+
+        started = time.perf_counter()
+        query = " ".join(str(state.get(key) or "") for key in ("question", "role", "industry"))
+        resume_context = compress_text(resume, query, self.token_budget, self.top_k)
+        job_description_context = compress_text(job_description, query, self.token_budget, self.top_k)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        if len(resume_context) < len(resume) or len(job_description_context) < len(job_description):
             logger.info(
-                f"'{self.name}': Rating {rating} < threshold {self.rating_threshold}. Continuing loop."
+                f"'{self.name}': Compressed resume {len(resume)} -> {len(resume_context)} chars, "
+                f"job description {len(job_description)} -> {len(job_description_context)} chars in {elapsed_ms:.1f}ms"
             )
-            yield Event(author=self.name) # Continue loop
-
-        logger.debug(f"'{self.name}' finished.")
+        yield Event(author=self.name, actions=EventActions(state_delta={
+            "resume_context": resume_context, "jobDescription_context": job_description_context
+        }))
 
-# Create an instance of RatingChecker with the configured threshold
-from .config import RATING_THRESHOLD
-rating_checker = RatingChecker(name="rating_checker", rating_threshold=RATING_THRESHOLD)
+# Create an instance of RatingChecker with the configured threshold and iteration budget
+from .config import (
+    RATING_THRESHOLD, MAX_ITERATIONS, PLATEAU_PATIENCE, MIN_RATING_IMPROVEMENT, REFINEMENT_MODE,
+    INPUT_COMPRESSION_ENABLED, INPUT_TOKEN_BUDGET, INPUT_TOP_K
+)
+rating_checker = RatingChecker(
+    name="rating_checker",
+    rating_threshold=RATING_THRESHOLD,
+    max_iterations=MAX_ITERATIONS,
+    plateau_patience=PLATEAU_PATIENCE,
+    min_improvement=MIN_RATING_IMPROVEMENT,
+    fused=REFINEMENT_MODE == "fused"
+)
+refinement_applier = RefinementApplier(name="refinement_applier")
+input_compressor = InputCompressor(
+    name="input_compressor",
+    enabled=INPUT_COMPRESSION_ENABLED,
+    token_budget=INPUT_TOKEN_BUDGET,
+    top_k=INPUT_TOP_K
+)
@@ -0,0 +1,114 @@
+"""
+Local stand-in model for offline runs
+
+Registered for model names matching "local-*" (e.g. STAR_GENERATOR_MODEL=local-stand-in).
+Returns schema-shaped JSON for STARResponse, Critique and CritiqueAndRefinement
+requests without any network access, and resolves cached-content handles against
+the local context cache backend the way the real API would - an unknown handle
+is an error - so the context-cache path can be exercised end to end.
+"""
+
+import os
+import json
+import asyncio
+import logging
+from typing import Any, AsyncGenerator, Dict
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.genai import types
+
+from schemas import STARResponse, Critique, CritiqueAndRefinement
+from shared_utils.critique_turns import is_critique_turn
+from .context_cache import LocalCacheBackend, context_cache
+
+logger = logging.getLogger(__name__)
+
+LOCAL_MODEL_LATENCY = float(os.getenv("LOCAL_MODEL_LATENCY", "0"))  # Seconds per call
+
+# Process-wide call accounting, inspected by offline checks
+STAND_IN_STATS: Dict[str, int] = {"calls": 0, "cached_calls": 0, "prompt_chars": 0}
+
+
+def _request_text(llm_request: LlmRequest) -> str:
+    parts = []
+    instruction = llm_request.config.system_instruction if llm_request.config else None
+    if isinstance(instruction, str):
+        parts.append(instruction)
+    for content in llm_request.contents:
+        for part in content.parts or []:
+            if part.text:
+                parts.append(part.text)
+    return "\n".join(parts)
+
+
+def _star_answer(step: int) -> Dict[str, str]:
+    return {
+        field: f"Stand-in {field} (revision {step})."
+        for field in ("situation", "task", "action", "result")
+    }
+
+
+def _critique(step: int) -> Dict[str, Any]:
+    return {
+        "rating": min(5.0, 3.6 + 0.4 * step),
+        "structureFeedback": "Clear STAR structure.",
+        "relevanceFeedback": "Relevant to the role.",
+        "specificityFeedback": "Add one more metric.",
+        "professionalImpactFeedback": "Impact is visible.",
+        "suggestions": ["Quantify the result.", "Name the stakeholders."],
+        "feedback": "Solid answer with room for detail."
+    }
+
+
+class LocalStandInLlm(BaseLlm):
+    """Deterministic offline model; the rating improves with each of the critic's earlier critiques"""
+
+    model: str = "local-stand-in"
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return [r"local-.*"]
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        STAND_IN_STATS["calls"] += 1
+        cached_content = llm_request.config.cached_content if llm_request.config else None
+        if cached_content:
+            backend = context_cache.backend if context_cache is not None else None
+            if not isinstance(backend, LocalCacheBackend) or backend.lookup(cached_content, llm_request.model) is None:
+                raise ValueError(f"Cached content {cached_content} not found for model {llm_request.model}")
+            STAND_IN_STATS["cached_calls"] += 1
+        STAND_IN_STATS["prompt_chars"] += len(_request_text(llm_request))
+
+        if LOCAL_MODEL_LATENCY > 0:
+            await asyncio.sleep(LOCAL_MODEL_LATENCY)
+
+        # Ratings follow the critic's own earlier critiques; the context cache moves the instruction
+        # (which may embed the current critique) to a user-role first content, which does not count
+        step = sum(
+            1 for content in llm_request.contents
+            if is_critique_turn(content.role, (part.text for part in content.parts or []))
+        )
+        schema = llm_request.config.response_schema if llm_request.config else None
+        if schema is STARResponse:
+            # Any rating text in the conversation (other agents' critiques, iteration events) makes a new revision
+            revision = sum(
+                1 for content in llm_request.contents for part in content.parts or []
+                if part.text and '"rating"' in part.text
+            )
+            payload: Any = _star_answer(revision)
+        elif schema is Critique:
+            payload = _critique(step)
+        elif schema is CritiqueAndRefinement:
+            payload = {"critique": _critique(step), "refinedAnswer": _star_answer(step + 1)}
+        else:
+            payload = {"text": "ok"}
+
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=json.dumps(payload))])
+        )
+
+
+LLMRegistry.register(LocalStandInLlm)
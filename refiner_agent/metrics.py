@@ -0,0 +1,37 @@
+"""
+Agent service metrics, exposed by app.py's /metrics route
+"""
+
+from shared_utils.metrics import REGISTRY, Counter, Gauge, Histogram, stats_collector
+from .context_cache import context_cache
+
+# Sub-agent name prefixes and the pipeline stage they belong to
+AGENT_STAGES = (
+    ("STARAnswerCritiqueRefiner", "critique_refiner"),
+    ("STARCandidateGenerator", "generator"),
+    ("STARAnswerGenerator", "generator"),
+    ("STARCandidateCritic", "critique"),
+    ("STARAnswerCritic", "critique"),
+    ("STARAnswerRefiner", "refiner"),
+)
+
+LLM_CALL_SECONDS = Histogram("star_llm_call_seconds", "Model call latency by pipeline stage and model", ["stage", "model"])
+LLM_TOKENS = Counter("star_llm_tokens_total", "LLM tokens by stage, model and kind (prompt, cached, output, thoughts)", ["stage", "model", "kind"])
+LLM_COST_USD = Counter("star_llm_cost_usd_total", "Estimated LLM cost by stage and model (MODEL_PRICES)", ["stage", "model"])
+AGENT_RUN_SECONDS = Histogram("star_agent_run_seconds", "Orchestrator run duration", ["outcome"])
+AGENT_RUN_ITERATIONS = Histogram("star_agent_run_iterations", "Iterations per completed run", buckets=range(1, 11))
+AGENT_RUNS_IN_FLIGHT = Gauge("star_agent_runs_in_flight", "Orchestrator runs in progress")
+
+
+def agent_stage(agent_name: str) -> str:
+    for prefix, stage in AGENT_STAGES:
+        if agent_name.startswith(prefix):
+            return stage
+    return "other"
+
+
+if context_cache is not None:
+    REGISTRY.register_collector(stats_collector(
+        "star_context_cache", "Gemini context cache", context_cache.stats,
+        counters=("created", "reused", "released", "failures"), gauges=("active_runs",)
+    ))
@@ -26,28 +26,35 @@ from google.adk.events import Event, EventActions
 from google.genai import types
 from pydantic import ValidationError, Field
 from schemas import IterationData, STARResponse, Critique 
-from .callbacks import iteration_history_callback, final_formatting_callback
-from .config import MAX_ITERATIONS, RATING_THRESHOLD
-from .flow_control import rating_checker
+from .callbacks import final_formatting_callback
+from .config import MAX_ITERATIONS, RATING_THRESHOLD, CANDIDATE_COUNT, CANDIDATE_TEMPERATURES, REFINEMENT_MODE
+from .candidates import CandidateGenerationStage
+from .flow_control import rating_checker, refinement_applier, input_compressor
 from .subagents.generator.agent import star_generator
 from .subagents.critique.agent import star_critique
 from .subagents.refiner.agent import star_refiner
-from .timing import TimingTracker
+from .subagents.critique_refine.agent import star_critique_refiner
+from .tracing import instrument_agent_tree
+from .context_cache import context_cache
+from .metrics import AGENT_RUN_SECONDS, AGENT_RUN_ITERATIONS, AGENT_RUNS_IN_FLIGHT
 
 from shared_utils.error_utils import create_structured_error_response
+from shared_utils.tracing import start_trace, end_trace
 
 # Refinement Loop Agent Configuration
+if REFINEMENT_MODE == "fused":
+    # One critique-and-refine call per round; the refined answer is applied only if the loop continues
+    refinement_sub_agents = [star_critique_refiner, rating_checker, refinement_applier]
+else:
+    refinement_sub_agents = [star_critique, rating_checker, star_refiner]
+
 refinement_loop_agent = LoopAgent(
     name="refinement_loop",
     max_iterations=MAX_ITERATIONS,
-    sub_agents=[
-        star_critique, 
-        rating_checker,
-        star_refiner
-    ]
+    sub_agents=refinement_sub_agents
     # Note: Moved iteration_history_callback to star_critique agent
 )
-logger.info(f"Refinement Loop Agent '{refinement_loop_agent.name}' configured with max iterations: {MAX_ITERATIONS}")
+logger.info(f"Refinement Loop Agent '{refinement_loop_agent.name}' configured with max iterations: {MAX_ITERATIONS}, mode: {REFINEMENT_MODE}")
 
 class STAROrchestrator(Agent):
     """
@@ -56,7 +63,6 @@ class STAROrchestrator(Agent):
     """
     star_generator: Agent
     refinement_loop_agent: LoopAgent
-    timing_tracker: TimingTracker
     sequential_agent: SequentialAgent
     def __init__(
         self,
@@ -64,19 +70,24 @@ class STAROrchestrator(Agent):
         star_generator: Agent,
         refinement_loop_agent: LoopAgent,
     ):
-        # Create dependent objects first
-        timing_tracker = TimingTracker()
-        # Create the callback and log its creation
-        final_callback = self._create_final_callback_with_timing()
-        print(f"🏗️ Created final callback for orchestrator: {name}")
-        logger.warning(f"🏗️ Created final callback for orchestrator: {name}")
-        
+        # Optionally replace the single generator with a parallel best-of-N candidate stage
+        generation_stage = star_generator
+        if CANDIDATE_COUNT > 1:
+            generation_stage = CandidateGenerationStage(
+                name="candidate_generation",
+                star_generator=star_generator,
+                candidate_count=CANDIDATE_COUNT,
+                temperatures=CANDIDATE_TEMPERATURES
+            )
+
         sequential_agent = SequentialAgent(
             name=f"{name}_sequential_flow",
-            sub_agents=[star_generator, refinement_loop_agent],
+            sub_agents=[input_compressor, generation_stage, refinement_loop_agent],
             description="Internal sequential flow for STAR generation and refinement.",
-            after_agent_callback=final_callback
+            after_agent_callback=final_formatting_callback
         )
+        # Every agent run, model call and callback below the orchestrator is recorded in the run's trace
+        instrument_agent_tree(sequential_agent)
         
         # Pass all declared fields to super().__init__ for Pydantic validation
         super().__init__(
@@ -84,37 +95,19 @@ class STAROrchestrator(Agent):
             description="Orchestrates STAR answer generation and iterative refinement.",
             star_generator=star_generator,
             refinement_loop_agent=refinement_loop_agent,
-            timing_tracker=timing_tracker,
             sequential_agent=sequential_agent
         )
 
-    def _create_final_callback_with_timing(self):
-        """Create a callback that has access to the timing tracker"""
-        def timing_aware_final_callback(callback_context):
-            # Add timing data to state before calling the original callback
-            print(f"🔥 TIMING_AWARE_FINAL_CALLBACK triggered for invocation: {callback_context.invocation_id}")
-            logger.warning(f"🔥 TIMING_AWARE_FINAL_CALLBACK triggered for invocation: {callback_context.invocation_id}")
-            
-            self.timing_tracker.end("total_workflow")
-            timing_data = self.timing_tracker.get_timings()
-            if timing_data:
-                callback_context.state["timing_data"] = timing_data
-                logger.warning(f"STAROrchestrator: Added timing data to state: {timing_data}")
-                print(f"📊 Added timing data: {timing_data}")
-            
-            # Call the original final formatting callback
-            return final_formatting_callback(callback_context)
-        
-        return timing_aware_final_callback
-
     @override
     async def _run_async_impl(
         self, ctx: InvocationContext
     ) -> AsyncGenerator[Event, None]:
         logger.info(f"STAROrchestrator '{self.name}' invoked. Invocation ID: {ctx.invocation_id}")
         
-        self.timing_tracker.reset()
-        self.timing_tracker.start("total_workflow")
+        # Scoped to this run: concurrent invocations each get their own trace
+        trace, trace_token = start_trace(ctx.invocation_id)
+        outcome = "incomplete"  # Stays so when the caller stops consuming the run
+        AGENT_RUNS_IN_FLIGHT.inc()
 
         try:
             # Validate required fields are present (input validation only)
@@ -134,6 +127,7 @@ class STAROrchestrator(Agent):
                     invocation_id=ctx.invocation_id,
                     content=types.Content(parts=[types.Part(text=error_payload)])
                 )
+                outcome = "invalid_input"
                 return
 
             logger.debug(
@@ -145,8 +139,11 @@ class STAROrchestrator(Agent):
             # Pure delegation to sequential agent - let ADK and callbacks handle state management
             async for event in self.sequential_agent.run_async(ctx):
                 yield event
+            outcome = "completed"
+            AGENT_RUN_ITERATIONS.observe(len(ctx.session.state.get("fullIterationHistory") or []))
 
         except Exception as e:
+            outcome = "error"
             logger.error(f"Sequential agent failed: {e}", exc_info=True)
             error_payload = create_structured_error_response(
                 f"Agent execution failed: {str(e)}",
@@ -159,6 +156,10 @@ class STAROrchestrator(Agent):
                 content=types.Content(parts=[types.Part(text=error_payload)])
             )
         finally:
+            AGENT_RUNS_IN_FLIGHT.dec()
+            AGENT_RUN_SECONDS.labels(outcome).observe(end_trace(trace, trace_token))
+            if context_cache is not None:
+                await context_cache.release(ctx.invocation_id)
             # Timing data is now handled in the sequential agent callback
             logger.info(f"STAROrchestrator: Workflow completed.")
 
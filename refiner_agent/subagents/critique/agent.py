@@ -6,37 +6,54 @@ This agent evaluates STAR format answers for quality and provides feedback.
 
 from google.adk.agents.llm_agent import LlmAgent
 from google.adk.agents.callback_context import CallbackContext
-from ...config import STAR_CRITIQUE_MODEL
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+from pydantic import ValidationError
+from ...context_cache import with_context_cache
+from ...cascade import critique_model, model_tier_callback, record_model_latency
+from ...token_usage import record_token_usage
 from schemas import Critique  # Added import
-from ...callbacks import iteration_history_callback
-import time
+from ...callbacks import iteration_history_callback, iteration_event_content, same_star_answer
+from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Timing callbacks for critique
-def critique_before_callback(callback_context: CallbackContext):
-    """Record critique start time"""
-    callback_context.state["critique_start_time"] = time.time()
-
 def critique_after_callback(callback_context: CallbackContext):
-    """Record critique completion time and call iteration history callback"""
-    start_time = callback_context.state.get("critique_start_time")
-    if start_time:
-        duration = time.time() - start_time
-        critique_times = callback_context.state.get("critique_times", [])
-        critique_times.append(duration)
-        callback_context.state["critique_times"] = critique_times
-        logger.info(f"STAR critique completed in {duration:.3f}s")
-    
-    # Call the original iteration history callback
-    iteration_history_callback(callback_context)
+    """Record iteration history and emit the iteration event"""
+    iteration_entry = iteration_history_callback(callback_context)
+    if iteration_entry is None:
+        return None
 
-# Define the STAR Answer Critique Agent
-star_critique = LlmAgent(
-    name="STARAnswerCritic",
-    model=STAR_CRITIQUE_MODEL,
-    instruction="""You are an expert career coach and excellent editor and interview prep coach.
+    # Returned content is emitted as an event, so the backend can stream each iteration as it completes
+    return iteration_event_content(iteration_entry, callback_context.state.get("highestRating", 0.0))
+
+def critique_reuse_callback(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    """Skip the critique call when the answer was already critiqued.
+
+    Reuses the candidate-selection critique (`pending_critique`), or the previous
+    iteration's critique when the refiner returned the same answer.
+    """
+    pending = callback_context.state.get("pending_critique")
+    if pending:
+        callback_context.state["pending_critique"] = None
+    else:
+        history = callback_context.state.get("fullIterationHistory") or []
+        if not history or not same_star_answer(history[-1].get("starAnswer"), callback_context.state.get("current_star_answer")):
+            return None
+        pending = history[-1].get("critique")
+        callback_context.state["llm_calls_saved"] = callback_context.state.get("llm_calls_saved", 0) + 1
+    try:
+        critique = Critique.model_validate(pending)
+    except ValidationError as e:
+        logger.warning(f"Ignoring invalid pending critique: {e}")
+        return None
+    logger.info(f"Reusing existing critique (rating {critique.rating}); skipping critique call")
+    return LlmResponse(
+        content=types.Content(role="model", parts=[types.Part(text=critique.model_dump_json())])
+    )
+
+CRITIQUE_INSTRUCTION = """You are an expert career coach and excellent editor and interview prep coach.
 User has come to you looking for advice on preparing for an interview where the interview will be in STAR format.
 User's current role is {role} and works in {industry}.
 
@@ -49,13 +66,35 @@ As their coach, provide a rating (1.0-5.0) and specific feedback to help them im
 Focus on structure, relevance to their {role} role in {industry}, specific details, and professional impact.
 
 Be encouraging but honest. Most answers score 3.0-4.5. Only exceptional answers score above 4.6.
-Respond using the Critique schema format with JSON output only.""",
+Respond using the Critique schema format with JSON output only."""
+
+def build_candidate_critic(index: int) -> LlmAgent:
+    """A critic for parallel candidate generation, reading and writing candidate-specific state keys"""
+    return LlmAgent(
+        name=f"STARCandidateCritic_{index}",
+        model=critique_model,
+        instruction=CRITIQUE_INSTRUCTION.replace("{current_star_answer}", f"{{candidate_{index}_answer}}"),
+        description=f"Evaluates STAR answer candidate {index}",
+        output_key=f"candidate_{index}_critique",
+        output_schema=Critique,
+        before_model_callback=with_context_cache(model_tier_callback("critique")),
+        after_model_callback=[record_model_latency, record_token_usage],
+        disallow_transfer_to_parent=True,
+        disallow_transfer_to_peers=True
+    )
+
+# Define the STAR Answer Critique Agent
+star_critique = LlmAgent(
+    name="STARAnswerCritic",
+    model=critique_model,
+    instruction=CRITIQUE_INSTRUCTION,
     description="Evaluates STAR answers and provides specific feedback for improvement",
     tools=[],  # No tools needed - the agent does the evaluation directly
     output_key="current_critique",
     output_schema=Critique,  # Added output_schema
-    before_agent_callback=critique_before_callback,
-    after_agent_callback=critique_after_callback,  # Now includes timing + iteration history
+    after_agent_callback=critique_after_callback,  # Records iteration history
+    before_model_callback=with_context_cache(critique_reuse_callback, model_tier_callback("critique")),
+    after_model_callback=[record_model_latency, record_token_usage],
     disallow_transfer_to_parent=True,
     disallow_transfer_to_peers=True
 )
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""
+STAR Answer Critique-and-Refine Agent
+
+This agent critiques the current STAR answer and returns an improved version
+in the same call, replacing the separate critique and refiner round trips.
+"""
+
+from google.adk.agents.llm_agent import LlmAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+from pydantic import ValidationError
+from ...context_cache import with_context_cache
+from ...cascade import refinement_model, model_tier_callback, record_model_latency
+from ...token_usage import record_token_usage
+from schemas import CritiqueAndRefinement
+from ...callbacks import iteration_history_callback, iteration_event_content, same_star_answer
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+def critique_refine_after_callback(callback_context: CallbackContext):
+    """Split the fused output into the critique and the pending refined answer, then record the iteration"""
+    try:
+        output = CritiqueAndRefinement.model_validate(callback_context.state.get("current_critique_refinement"))
+    except ValidationError as e:
+        logger.error(f"Critique-and-refine output is invalid: {e}")
+        return None
+
+    # Same state shape as the two-agent loop: the critique of current_star_answer, and the
+    # refined answer waiting for RefinementApplier if the planner continues the loop
+    callback_context.state["current_critique"] = output.critique.model_dump()
+    callback_context.state["pending_star_answer"] = output.refinedAnswer.model_dump()
+
+    iteration_entry = iteration_history_callback(callback_context)
+    if iteration_entry is None:
+        return None
+    return iteration_event_content(iteration_entry, callback_context.state.get("highestRating", 0.0))
+
+def critique_refine_reuse_callback(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    """Skip the call when the answer is unchanged since the last iteration"""
+    callback_context.state["pending_critique"] = None  # A candidate critique has no refinement to go with it
+    history = callback_context.state.get("fullIterationHistory") or []
+    current_answer = callback_context.state.get("current_star_answer")
+    if not history or not same_star_answer(history[-1].get("starAnswer"), current_answer):
+        return None
+    try:
+        output = CritiqueAndRefinement(critique=history[-1].get("critique"), refinedAnswer=current_answer)
+    except ValidationError as e:
+        logger.warning(f"Could not reuse previous critique: {e}")
+        return None
+    callback_context.state["llm_calls_saved"] = callback_context.state.get("llm_calls_saved", 0) + 1
+    logger.info("Answer unchanged; reusing previous critique and skipping critique-and-refine call")
+    return LlmResponse(
+        content=types.Content(role="model", parts=[types.Part(text=output.model_dump_json())])
+    )
+
+# Define the STAR Answer Critique-and-Refine Agent
+star_critique_refiner = LlmAgent(
+    name="STARAnswerCritiqueRefiner",
+    model=refinement_model,
+    instruction="""You are an expert career coach and excellent editor and interview prep coach.
+User has come to you looking for advice on preparing for an interview where the interview will be in STAR format.
+User's current role is {role} and works in {industry}.
+
+## CONTEXT
+Question: {question}
+Current answer: {current_star_answer}
+
+## YOUR TASK
+1. Critique: provide a rating (1.0-5.0) and specific feedback on the current answer.
+Focus on structure, relevance to their {role} role in {industry}, specific details, and professional impact.
+Be encouraging but honest. Most answers score 3.0-4.5. Only exceptional answers score above 4.6.
+
+2. Refine: rewrite the answer so it addresses your own feedback and suggestions,
+while maintaining their authentic voice and experience.
+
+Respond using the CritiqueAndRefinement schema format with JSON output only:
+the rating and feedback under "critique", the improved answer under "refinedAnswer".""",
+    description="Critiques the current STAR answer and refines it in a single call",
+    output_key="current_critique_refinement",
+    output_schema=CritiqueAndRefinement,
+    after_agent_callback=critique_refine_after_callback,
+    before_model_callback=with_context_cache(critique_refine_reuse_callback, model_tier_callback("fused")),
+    after_model_callback=[record_model_latency, record_token_usage],
+    disallow_transfer_to_parent=True,
+    disallow_transfer_to_peers=True
+)
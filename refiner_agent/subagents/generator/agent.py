@@ -6,48 +6,75 @@ This agent creates the initial STAR format answer based on user inputs.
 
 from google.adk.agents.llm_agent import LlmAgent
 from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+from pydantic import ValidationError
 from ...config import STAR_GENERATOR_MODEL
+from ...context_cache import with_context_cache
+from ...cascade import model_tier_callback, record_model_latency
+from ...token_usage import record_token_usage
 from schemas import STARResponse  # Added import
-import time
+from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Timing callbacks for generation
-def generation_before_callback(callback_context: CallbackContext):
-    """Record generation start time"""
-    callback_context.state["generation_start_time"] = time.time()
+def generation_seed_callback(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    """Skip the generation call when the backend seeded the run with a similar question's answer"""
+    seed = callback_context.state.get("seed_star_answer")
+    if not seed:
+        return None
+    callback_context.state["seed_star_answer"] = None  # Only the first generation is seeded
+    try:
+        seed_answer = STARResponse.model_validate(seed)
+    except ValidationError as e:
+        logger.warning(f"Ignoring invalid seed answer: {e}")
+        return None
+    logger.info("Starting from seeded STAR answer; skipping generation call")
+    return LlmResponse(
+        content=types.Content(role="model", parts=[types.Part(text=seed_answer.model_dump_json())])
+    )
 
-def generation_after_callback(callback_context: CallbackContext):
-    """Record generation completion time"""
-    start_time = callback_context.state.get("generation_start_time")
-    if start_time:
-        duration = time.time() - start_time
-        callback_context.state["generation_time"] = duration
-        logger.info(f"STAR generation completed in {duration:.3f}s")
-
-# Define the STAR Answer Generator Agent
-star_generator = LlmAgent(
-    name="STARAnswerGenerator",
-    model=STAR_GENERATOR_MODEL,
-    instruction="""You are an expert career coach helping someone prepare for their interview.
+GENERATOR_INSTRUCTION = """You are an expert career coach helping someone prepare for their interview.
 They are applying for a {role} position in {industry}.
 
 ## CONTEXT
 Question: {question}
-{% if resume %}Background: Review {resume} and choose appropriate background information to include in your answer.{% endif %}
-{% if jobDescription %}Job Details: Picked situation should be relevant to {jobDescription}.{% endif %}
+{% if resume %}Background: Review {resume_context} and choose appropriate background information to include in your answer.{% endif %}
+{% if jobDescription %}Job Details: Picked situation should be relevant to {jobDescription_context}.{% endif %}
 
 ## YOUR TASK
 Create a compelling STAR format answer (Situation, Task, Action, Result) that showcases the candidate's qualifications for this {role} role.
 Make it specific, professional, and tailored to {industry}.
 
-Respond using the STARResponse schema format with JSON output only.""",
+Respond using the STARResponse schema format with JSON output only."""
+
+def build_candidate_generator(index: int, temperature: float) -> LlmAgent:
+    """A generator clone for parallel candidate generation, writing to its own state key"""
+    return LlmAgent(
+        name=f"STARCandidateGenerator_{index}",
+        model=STAR_GENERATOR_MODEL,
+        instruction=GENERATOR_INSTRUCTION,
+        description=f"Generates STAR answer candidate {index}",
+        output_key=f"candidate_{index}_answer",
+        output_schema=STARResponse,
+        generate_content_config=types.GenerateContentConfig(temperature=temperature),
+        before_model_callback=with_context_cache(model_tier_callback("generate")),
+        after_model_callback=[record_model_latency, record_token_usage],
+        disallow_transfer_to_parent=True,
+        disallow_transfer_to_peers=True
+    )
+
+# Define the STAR Answer Generator Agent
+star_generator = LlmAgent(
+    name="STARAnswerGenerator",
+    model=STAR_GENERATOR_MODEL,
+    instruction=GENERATOR_INSTRUCTION,
     description="Generates initial STAR format answers for interview questions",
     output_key="current_star_answer",
     output_schema=STARResponse,  # Added output_schema
-    before_agent_callback=generation_before_callback,
-    after_agent_callback=generation_after_callback,
+    before_model_callback=with_context_cache(generation_seed_callback, model_tier_callback("generate")),
+    after_model_callback=[record_model_latency, record_token_usage],
     disallow_transfer_to_parent=True,
     disallow_transfer_to_peers=True
 )
\ No newline at end of file
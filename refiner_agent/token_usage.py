@@ -0,0 +1,84 @@
+"""
+Per-stage token and cost accounting
+
+Every model call's usage metadata (prompt, cached, output and thinking
+tokens) is added to the run totals and to the totals of the iteration in
+progress, by pipeline stage. iteration_history_callback moves the iteration
+totals into IterationData.tokenUsage; final_formatting_callback reports the
+run totals in PerformanceMetrics. Costs use the MODEL_PRICES table.
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmResponse
+
+from .config import MODEL_PRICES
+from .metrics import LLM_TOKENS, LLM_COST_USD, agent_stage
+
+logger = logging.getLogger(__name__)
+
+TOKEN_FIELDS = ("calls", "promptTokens", "cachedTokens", "outputTokens", "thoughtsTokens", "costUsd")
+
+
+def call_usage(llm_response: LlmResponse, model_name: str) -> Optional[Dict[str, Any]]:
+    """Token counts and cost of one model call, or None if the model reported no usage"""
+    metadata = llm_response.usage_metadata
+    if metadata is None:
+        return None
+    usage = {
+        "calls": 1,
+        "promptTokens": metadata.prompt_token_count or 0,
+        "cachedTokens": metadata.cached_content_token_count or 0,
+        "outputTokens": metadata.candidates_token_count or 0,
+        "thoughtsTokens": metadata.thoughts_token_count or 0,
+        "costUsd": 0.0,
+    }
+    prices = MODEL_PRICES.get(model_name)
+    if prices:
+        input_price, cached_price, output_price = prices
+        # Cached tokens are part of the prompt count but billed at the cached rate
+        usage["costUsd"] = (
+            (usage["promptTokens"] - usage["cachedTokens"]) * input_price
+            + usage["cachedTokens"] * cached_price
+            + (usage["outputTokens"] + usage["thoughtsTokens"]) * output_price
+        ) / 1_000_000
+    return usage
+
+
+def add_usage(totals: Optional[Dict[str, Dict[str, Any]]], stage: str, usage: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """A copy of per-stage totals with usage added to the stage"""
+    totals = dict(totals or {})
+    current = totals.get(stage) or {}
+    totals[stage] = {field: current.get(field, 0) + usage.get(field, 0) for field in TOKEN_FIELDS}
+    return totals
+
+
+def total_usage(totals: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Sum of per-stage totals"""
+    return {field: sum(usage.get(field, 0) for usage in totals.values()) for field in TOKEN_FIELDS}
+
+
+def record_token_usage(callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+    """After-model callback adding the call's tokens to the run and iteration totals"""
+    if llm_response.partial:
+        return None
+    state = callback_context.state
+    agent_name = callback_context.agent_name
+    model_name = state.get(f"model_name_{agent_name}") or "unknown"
+    usage = call_usage(llm_response, model_name)
+    if usage is None:
+        return None
+
+    stage = agent_stage(agent_name)
+    state["token_usage"] = add_usage(state.get("token_usage"), stage, usage)
+    state["iteration_token_usage"] = add_usage(state.get("iteration_token_usage"), stage, usage)
+
+    LLM_TOKENS.labels(stage, model_name, "prompt").inc(usage["promptTokens"])
+    LLM_TOKENS.labels(stage, model_name, "cached").inc(usage["cachedTokens"])
+    LLM_TOKENS.labels(stage, model_name, "output").inc(usage["outputTokens"])
+    LLM_TOKENS.labels(stage, model_name, "thoughts").inc(usage["thoughtsTokens"])
+    LLM_COST_USD.labels(stage, model_name).inc(usage["costUsd"])
+    logger.debug(f"[TOKENS] {agent_name} ({model_name}): {usage}")
+    return None
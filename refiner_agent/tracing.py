@@ -0,0 +1,148 @@
+"""
+Span tracing of the agent tree
+
+instrument_agent_tree wraps the agent and model callbacks of every agent
+below the orchestrator so that each run's trace (shared_utils.tracing)
+records:
+
+- an "agent" span per agent run, nested under its parent agent's span
+- an "llm" span per model call, from the last before-model callback to the
+  final (non-partial) response, with the model it used
+- a "callback" span per callback invocation, under its agent's span
+
+Callbacks keep ADK's chaining: a before-agent or before-model callback that
+returns a value skips the rest (and the agent or model call), and an
+after-agent or after-model callback that returns a value replaces the output.
+"""
+
+import inspect
+import logging
+from typing import Any, Dict, List, Optional
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+
+from shared_utils.tracing import RunTrace, Span, current_trace
+
+logger = logging.getLogger(__name__)
+
+# Agents whose spans make up the stage times in PerformanceMetrics
+GENERATION_AGENTS = ("candidate_generation", "STARAnswerGenerator")
+CRITIQUE_AGENTS = ("STARAnswerCritic", "STARAnswerCritiqueRefiner")
+REFINEMENT_AGENTS = ("STARAnswerRefiner",)
+
+
+def _callback_list(callbacks: Any) -> List[Any]:
+    if not callbacks:
+        return []
+    return list(callbacks) if isinstance(callbacks, list) else [callbacks]
+
+
+def _callback_name(callback: Any) -> str:
+    return getattr(callback, "__name__", None) or type(callback).__name__
+
+
+async def _run_callbacks(trace: Optional[RunTrace], parent: Optional[Span], callbacks: List[Any], **kwargs) -> Any:
+    """Run callbacks in order until one returns a value, each in its own span"""
+    for callback in callbacks:
+        if trace is None:
+            result = callback(**kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+        else:
+            with trace.span("callback", _callback_name(callback), parent):
+                result = callback(**kwargs)
+                if inspect.isawaitable(result):
+                    result = await result
+        if result is not None:
+            return result
+    return None
+
+
+def _agent_span(trace: RunTrace, agent: BaseAgent) -> Optional[Span]:
+    return trace.open_span("agent", agent.name)
+
+
+def _traced_agent_callbacks(agent: BaseAgent):
+    before = _callback_list(agent.before_agent_callback)
+    after = _callback_list(agent.after_agent_callback)
+
+    async def before_agent(callback_context: CallbackContext):
+        trace = current_trace(callback_context.invocation_id)
+        span = None
+        if trace is not None:
+            parent = _agent_span(trace, agent.parent_agent) if agent.parent_agent else None
+            span = trace.start("agent", agent.name, parent)
+        result = await _run_callbacks(trace, span, before, callback_context=callback_context)
+        if result is not None and span is not None:
+            trace.end(span)  # The agent is skipped; its after-agent callbacks will not run
+        return result
+
+    async def after_agent(callback_context: CallbackContext):
+        trace = current_trace(callback_context.invocation_id)
+        span = _agent_span(trace, agent) if trace is not None else None
+        try:
+            return await _run_callbacks(trace, span, after, callback_context=callback_context)
+        finally:
+            if span is not None:
+                trace.end(span)
+
+    return before_agent, after_agent
+
+
+def _traced_model_callbacks(agent: LlmAgent):
+    before = _callback_list(agent.before_model_callback)
+    after = _callback_list(agent.after_model_callback)
+
+    async def before_model(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        trace = current_trace(callback_context.invocation_id)
+        parent = _agent_span(trace, agent) if trace is not None else None
+        result = await _run_callbacks(trace, parent, before, callback_context=callback_context, llm_request=llm_request)
+        if result is None and trace is not None:
+            # Started after the callbacks, so it covers only the model call itself
+            trace.start("llm", agent.name, parent, model=str(llm_request.model))
+        return result
+
+    async def after_model(callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+        trace = current_trace(callback_context.invocation_id)
+        if llm_response.partial or trace is None:
+            return await _run_callbacks(None, None, after, callback_context=callback_context, llm_response=llm_response)
+        llm_span = trace.open_span("llm", agent.name)
+        if llm_span is not None:
+            trace.end(llm_span)
+        return await _run_callbacks(
+            trace, _agent_span(trace, agent), after, callback_context=callback_context, llm_response=llm_response
+        )
+
+    return before_model, after_model
+
+
+def instrument_agent_tree(agent: BaseAgent) -> None:
+    """Wrap the callbacks of agent and all its sub-agents (once) to record spans"""
+    if not getattr(agent.before_agent_callback, "_traced", False):
+        before_agent, after_agent = _traced_agent_callbacks(agent)
+        before_agent._traced = True
+        agent.before_agent_callback = before_agent
+        agent.after_agent_callback = after_agent
+        if isinstance(agent, LlmAgent):
+            agent.before_model_callback, agent.after_model_callback = _traced_model_callbacks(agent)
+    for sub_agent in agent.sub_agents:
+        instrument_agent_tree(sub_agent)
+
+
+def stage_times(trace: Optional[RunTrace]) -> Dict[str, Any]:
+    """Generation, critique and refinement times of a run, from its agent spans"""
+    if trace is None:
+        return {"generation_time": 0.0, "critique_times": [], "refinement_times": []}
+    generation_time = 0.0
+    for name in GENERATION_AGENTS:
+        durations = trace.durations("agent", name)
+        if durations:
+            generation_time = sum(durations)
+            break
+    return {
+        "generation_time": generation_time,
+        "critique_times": [d for name in CRITIQUE_AGENTS for d in trace.durations("agent", name)],
+        "refinement_times": [d for name in REFINEMENT_AGENTS for d in trace.durations("agent", name)],
+    }
@@ -28,11 +28,28 @@ class Critique(BaseModel):
     rawCritiqueText: Optional[str] = Field(default=None, description="Internal field for full critique text.")
     feedback: Optional[str] = Field(default=None, description="Overall feedback summary.")
 
+class CritiqueAndRefinement(BaseModel):
+    """Fused critique-and-refine output: the critique of the current answer plus the improved answer"""
+    critique: Critique = Field(..., description="Critique of the current STAR answer.")
+    refinedAnswer: STARResponse = Field(..., description="The STAR answer rewritten to address the critique.")
+
+class TokenUsage(BaseModel):
+    """LLM token counts (from the models' usage metadata) and their estimated cost"""
+    calls: int = Field(default=0, description="Number of LLM calls counted")
+    promptTokens: int = Field(default=0, description="Input tokens, including cached ones")
+    cachedTokens: int = Field(default=0, description="Input tokens served from a context cache")
+    outputTokens: int = Field(default=0, description="Generated tokens, excluding thinking tokens")
+    thoughtsTokens: int = Field(default=0, description="Thinking tokens (billed as output)")
+    costUsd: float = Field(default=0.0, description="Estimated cost from MODEL_PRICES; 0 for unpriced models")
+
 class IterationData(BaseModel):
     """Data for a single iteration of the STAR answer generation process"""
     iterationNumber: int = Field(..., description="The iteration number, starting from 1")
     starAnswer: STARResponse = Field(..., description="The STAR format answer for this iteration")
     critique: Critique = Field(..., description="The critique feedback for this iteration")
+    answerModel: Optional[str] = Field(default=None, description="Model that produced this iteration's STAR answer")
+    critiqueModel: Optional[str] = Field(default=None, description="Model that produced this iteration's critique")
+    tokenUsage: Dict[str, TokenUsage] = Field(default_factory=dict, description="Tokens of the LLM calls made for this iteration, by stage (generator, critique, refiner, critique_refiner)")
     timestamp: str = Field(default_factory=lambda: datetime.datetime.now(datetime.timezone.utc).isoformat(), description="The timestamp when this iteration was created (UTC)")
 
 class PerformanceMetrics(BaseModel):
@@ -41,6 +58,12 @@ class PerformanceMetrics(BaseModel):
     generationTime: float = Field(..., description="Time taken for initial generation")
     critiqueTimes: List[float] = Field(default_factory=list, description="Times taken for each critique iteration")
     refinementTimes: List[float] = Field(default_factory=list, description="Times taken for each refinement iteration")
+    llmCallsSaved: int = Field(default=0, description="LLM calls skipped by the iteration planner compared to running every iteration")
+    stopReason: Optional[str] = Field(default=None, description="Why refinement stopped: threshold, max_iterations, plateau or unchanged")
+    modelLatencies: Dict[str, List[float]] = Field(default_factory=dict, description="LLM call latencies by model tier (default, fast, strong)")
+    tokenUsage: Dict[str, TokenUsage] = Field(default_factory=dict, description="Tokens of all LLM calls in the run, by stage")
+    totalTokenUsage: TokenUsage = Field(default_factory=TokenUsage, description="Tokens of all LLM calls in the run")
+    trace: Optional[Dict[str, Any]] = Field(default=None, description="Span tree of the run (agents, LLM calls, callbacks, state writes) with start and duration in ms")
 
 class ResponseMetadata(BaseModel):
     """Metadata for the STAR answer generation response"""
@@ -0,0 +1,29 @@
+"""
+Recognising the critic's own critiques in a model conversation.
+
+Used by the stand-in models (refiner_agent/local_model.py and
+benchmarks/fake_gemini.py) to pick the nth rating of a run. Other agents'
+output reaches the critic as user turns ("For context: ..."), and the
+iteration events emitted after each critique are {"type": "iteration", ...},
+so neither counts as another critique.
+"""
+
+import json
+from typing import Iterable, Optional
+
+
+def is_critique_turn(role: Optional[str], texts: Iterable[Optional[str]]) -> bool:
+    """True for a model turn with a part holding a Critique or CritiqueAndRefinement object"""
+    if role != "model":
+        return False
+    for text in texts:
+        text = (text or "").strip()
+        if not text.startswith("{"):
+            continue
+        try:
+            value = json.loads(text)
+        except ValueError:
+            continue
+        if isinstance(value, dict) and ("rating" in value or "critique" in value) and "type" not in value:
+            return True
+    return False
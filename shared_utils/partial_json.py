@@ -0,0 +1,297 @@
+"""
+Incremental, tolerant parser for a growing JSON object.
+
+Turns the text deltas of a streamed STARResponse/Critique JSON object into
+field-level updates as soon as each field appears:
+
+    parser = PartialJSONParser()
+    parser.feed('{"situation": "Our clin')   # [{"field": "situation", "delta": "Our clin", "done": False}]
+    parser.feed('ic...", "task"')             # [{"field": "situation", "delta": "ic...", "done": True, ...}]
+
+Only the top-level object is tracked. String values are streamed as deltas;
+any other value (numbers, arrays, nested objects) is reported once, decoded,
+when it is complete. Each character is scanned once, and string runs are
+copied as slices, so the cost per chunk is proportional to the chunk size.
+"""
+
+import json
+import re
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Parser states
+_START = 0        # Before the opening '{'
+_KEY_OR_END = 1   # Expecting a key, ',' or '}'
+_KEY = 2          # Inside a key string
+_COLON = 3        # Expecting ':'
+_VALUE_START = 4  # Expecting the start of a value
+_STRING = 5       # Inside a top-level string value
+_RAW = 6          # Inside a non-string value (number, literal, array, object)
+_DONE = 7         # Closing '}' seen
+_FAILED = 8       # Input is not a JSON object; ignore the rest
+
+_WHITESPACE = " \t\r\n"
+_FENCE_CHARS = "`jsonJSON"  # Tolerated before the object, e.g. a ```json fence
+_SIMPLE_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_STRING_SPECIAL = re.compile(r'["\\]')
+_RAW_SPECIAL = re.compile(r'["\\\[\]{},]')
+
+
+def _is_high_surrogate(hex_digits: str) -> bool:
+    try:
+        return 0xD800 <= int(hex_digits, 16) <= 0xDBFF
+    except ValueError:
+        return False
+
+
+class PartialJSONParser:
+    """Stream field updates out of a JSON object that arrives in pieces"""
+
+    __slots__ = (
+        "_state", "_key_parts", "_key", "_escape", "_raw_parts", "_raw_depth",
+        "_raw_in_string", "_raw_escape", "_value_parts", "values"
+    )
+
+    def __init__(self):
+        self._state = _START
+        self._key_parts: List[str] = []
+        self._key = ""
+        self._escape: Optional[str] = None  # Pending escape sequence inside a string
+        self._raw_parts: List[str] = []
+        self._raw_depth = 0
+        self._raw_in_string = False
+        self._raw_escape = False
+        self._value_parts: List[str] = []
+        self.values: Dict[str, Any] = {}  # Completed field values
+
+    @property
+    def done(self) -> bool:
+        """True once the closing brace of the object has been seen"""
+        return self._state == _DONE
+
+    @property
+    def failed(self) -> bool:
+        """True if the input turned out not to be a JSON object"""
+        return self._state == _FAILED
+
+    @property
+    def current_field(self) -> Optional[str]:
+        """The field whose value is currently being received"""
+        return self._key if self._state in (_STRING, _RAW) else None
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Consume the next piece of JSON text and return the field updates it produces.
+
+        Each update is {"field", "delta", "done"} for string values, or
+        {"field", "value", "done": True} for other values once complete.
+        """
+        updates: List[Dict[str, Any]] = []
+        pos = 0
+        n = len(text)
+
+        while pos < n:
+            state = self._state
+
+            if state == _STRING:
+                pos = self._feed_string(text, pos, updates)
+                continue
+
+            if state == _RAW:
+                pos = self._feed_raw(text, pos, updates)
+                continue
+
+            if state == _KEY:
+                pos = self._feed_key(text, pos)
+                continue
+
+            if state in (_DONE, _FAILED):
+                break
+
+            ch = text[pos]
+            pos += 1
+            if ch in _WHITESPACE:
+                continue
+
+            if state == _START:
+                if ch == "{":
+                    self._state = _KEY_OR_END
+                elif ch not in _FENCE_CHARS:
+                    self._fail(ch)
+            elif state == _KEY_OR_END:
+                if ch == '"':
+                    self._key_parts = []
+                    self._state = _KEY
+                elif ch == "}":
+                    self._state = _DONE
+                elif ch != ",":
+                    self._fail(ch)
+            elif state == _COLON:
+                if ch == ":":
+                    self._state = _VALUE_START
+                else:
+                    self._fail(ch)
+            elif state == _VALUE_START:
+                if ch == '"':
+                    self._value_parts = []
+                    self._state = _STRING
+                else:
+                    self._raw_parts = [ch]
+                    self._raw_depth = 1 if ch in "[{" else 0
+                    self._raw_in_string = False
+                    self._raw_escape = False
+                    self._state = _RAW
+
+        return updates
+
+    def _fail(self, ch: str) -> None:
+        logger.debug(f"PartialJSONParser: unexpected character {ch!r}; ignoring rest of input")
+        self._state = _FAILED
+
+    def _feed_key(self, text: str, pos: int) -> int:
+        if self._escape == "":
+            # Character after a backslash in a key - keep it verbatim
+            self._key_parts.append(text[pos])
+            self._escape = None
+            return pos + 1
+        match = _STRING_SPECIAL.search(text, pos)
+        if match is None:
+            self._key_parts.append(text[pos:])
+            return len(text)
+        end = match.start()
+        if end > pos:
+            self._key_parts.append(text[pos:end])
+        if text[end] == '"':
+            self._key = "".join(self._key_parts)
+            self._state = _COLON
+        else:
+            self._escape = ""
+        return end + 1
+
+    def _feed_string(self, text: str, pos: int, updates: List[Dict[str, Any]]) -> int:
+        n = len(text)
+        delta_parts: List[str] = []
+        done = False
+
+        while pos < n:
+            if self._escape is not None:
+                pos = self._continue_escape(text, pos, delta_parts)
+                continue
+            match = _STRING_SPECIAL.search(text, pos)
+            if match is None:
+                delta_parts.append(text[pos:])
+                pos = n
+                break
+            end = match.start()
+            if end > pos:
+                delta_parts.append(text[pos:end])
+            pos = end + 1
+            if text[end] == '"':
+                done = True
+                break
+            self._escape = ""
+
+        delta = delta_parts[0] if len(delta_parts) == 1 else "".join(delta_parts)
+        if delta:
+            self._value_parts.append(delta)
+        if delta or done:
+            update = {"field": self._key, "delta": delta, "done": done}
+            updates.append(update)
+        if done:
+            self.values[self._key] = "".join(self._value_parts)
+            self._value_parts = []
+            self._state = _KEY_OR_END
+        return pos
+
+    def _continue_escape(self, text: str, pos: int, out: List[str]) -> int:
+        """Advance a pending escape sequence; append the decoded character once complete"""
+        escape = self._escape
+        if escape == "":
+            ch = text[pos]
+            if ch != "u":
+                out.append(_SIMPLE_ESCAPES.get(ch, ch))
+                self._escape = None
+                return pos + 1
+            escape = "\\u"
+            pos += 1
+
+        # \uXXXX, or \uXXXX\uXXXX when the first one is a high surrogate
+        while True:
+            target = 12 if len(escape) >= 6 and _is_high_surrogate(escape[2:6]) else 6
+            if len(escape) >= target:
+                break
+            take = text[pos:pos + target - len(escape)]
+            if not take:
+                self._escape = escape
+                return pos
+            escape += take
+            pos += len(take)
+
+        try:
+            out.append(json.loads(f'"{escape}"'))
+        except ValueError:
+            out.append("\ufffd")
+        self._escape = None
+        return pos
+
+    def _feed_raw(self, text: str, pos: int, updates: List[Dict[str, Any]]) -> int:
+        n = len(text)
+        while pos < n:
+            if self._raw_escape:
+                # The character after a backslash that ended the previous chunk
+                self._raw_parts.append(text[pos])
+                self._raw_escape = False
+                pos += 1
+                continue
+            match = _RAW_SPECIAL.search(text, pos)
+            if match is None:
+                self._raw_parts.append(text[pos:])
+                return n
+            end = match.start()
+            ch = text[end]
+
+            if self._raw_in_string:
+                if ch == "\\":
+                    # Keep the escape verbatim (json.loads decodes it) and skip the escaped character
+                    self._raw_parts.append(text[pos:end + 2])
+                    pos = end + 2
+                    self._raw_escape = pos > n
+                    continue
+                self._raw_parts.append(text[pos:end + 1])
+                pos = end + 1
+                if ch == '"':
+                    self._raw_in_string = False
+                continue
+
+            if ch in ",}" and self._raw_depth == 0:
+                # End of a top-level non-string value
+                self._raw_parts.append(text[pos:end])
+                self._finish_raw(updates)
+                self._state = _DONE if ch == "}" else _KEY_OR_END
+                return end + 1
+
+            self._raw_parts.append(text[pos:end + 1])
+            pos = end + 1
+            if ch == '"':
+                self._raw_in_string = True
+            elif ch in "[{":
+                self._raw_depth += 1
+            elif ch in "]}":
+                self._raw_depth -= 1
+                if self._raw_depth == 0:
+                    self._finish_raw(updates)
+                    self._state = _KEY_OR_END
+                    return pos
+        return pos
+
+    def _finish_raw(self, updates: List[Dict[str, Any]]) -> None:
+        raw = "".join(self._raw_parts).strip()
+        self._raw_parts = []
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            logger.debug(f"PartialJSONParser: could not decode value for {self._key!r}: {raw[:50]!r}")
+            value = raw
+        self.values[self._key] = value
+        updates.append({"field": self._key, "value": value, "done": True})
@@ -0,0 +1,180 @@
+"""
+Query-relevant compression of long documents.
+
+Splits a resume or job description into passages (bullets, lines, or
+sentence groups of long paragraphs), ranks them against a short query with
+Okapi BM25, and keeps the best passages that fit a token budget, in their
+original order:
+
+    compressed = compress_text(resume, "conflict with a stakeholder Product Manager Healthcare",
+                               token_budget=600, top_k=8)
+
+Pure Python and in-process; a 25k-character input takes a few milliseconds.
+"""
+
+import re
+import math
+import logging
+from collections import Counter
+from functools import lru_cache
+from typing import List, Sequence
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4  # Rough estimate used for budgets
+MAX_PASSAGE_CHARS = 400
+HEADING_CHARS = 40  # Shorter lines are treated as headings and joined to the next passage
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+_SENTENCE_RE = re.compile(r"(?<=[.!?;])\s+")
+
+_STOPWORDS = frozenset("""
+a an the and or but if of to in on at by for with from into about as is are was were be been being
+do did does have has had i me my you your we our they their he she it its this that these those
+what when where which who how can could would should will may must tell describe give share time
+example situation also such than then so not no all any each more most other some very just
+""".split())
+
+_SUFFIXES = ("ing", "ed", "es", "s")
+
+
+@lru_cache(maxsize=65536)
+def _stem(token: str) -> str:
+    for suffix in _SUFFIXES:
+        if len(token) > len(suffix) + 3 and token.endswith(suffix):
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased, stemmed content words"""
+    return [_stem(token) for token in _TOKEN_RE.findall(text.lower()) if token not in _STOPWORDS]
+
+
+def _wrap(text: str, max_chars: int) -> List[str]:
+    """Split text with no usable sentence boundary into pieces of at most max_chars, at word boundaries"""
+    pieces: List[str] = []
+    piece = ""
+    for word in text.split():
+        while len(word) > max_chars:  # A single unbroken token, e.g. a URL
+            if piece:
+                pieces.append(piece)
+                piece = ""
+            pieces.append(word[:max_chars])
+            word = word[max_chars:]
+        if piece and len(piece) + len(word) + 1 > max_chars:
+            pieces.append(piece)
+            piece = word
+        else:
+            piece = f"{piece} {word}" if piece else word
+    if piece:
+        pieces.append(piece)
+    return pieces
+
+
+def split_passages(text: str, max_chars: int = MAX_PASSAGE_CHARS) -> List[str]:
+    """Split a document into passages of at most max_chars.
+
+    One passage per line; long lines are split on sentence boundaries (or word
+    boundaries, for sentences longer than max_chars). Short lines are joined
+    to the next line as its heading, and a run of short lines (skills, dates,
+    bullets) is emitted as its own passages once it reaches max_chars.
+    """
+    passages: List[str] = []
+    heading = ""
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if len(line) < HEADING_CHARS:
+            if heading and len(heading) + len(line) + 1 > max_chars:
+                passages.append(heading)
+                heading = ""
+            heading = f"{heading} {line}" if heading else line
+            continue
+
+        if heading:
+            if len(heading) + len(line) + 2 <= max_chars:
+                line = f"{heading}: {line}"
+            else:
+                passages.append(heading)
+            heading = ""
+        if len(line) <= max_chars:
+            passages.append(line)
+            continue
+
+        chunk = ""
+        for sentence in _SENTENCE_RE.split(line):
+            if chunk and len(chunk) + len(sentence) + 1 > max_chars:
+                passages.append(chunk)
+                chunk = ""
+            if len(sentence) > max_chars:
+                pieces = _wrap(sentence, max_chars)
+                passages.extend(pieces[:-1])
+                sentence = pieces[-1]
+            chunk = f"{chunk} {sentence}" if chunk else sentence
+        if chunk:
+            passages.append(chunk)
+    if heading:
+        passages.append(heading)
+    return passages
+
+
+def bm25_scores(passages: Sequence[str], query: str, k1: float = 1.5, b: float = 0.75) -> List[float]:
+    """Okapi BM25 score of each passage for the query, with IDF taken over the passages themselves"""
+    query_terms = set(tokenize(query))
+    if not query_terms or not passages:
+        return [0.0] * len(passages)
+
+    docs = [Counter(tokenize(passage)) for passage in passages]
+    n = len(docs)
+    avg_len = sum(sum(doc.values()) for doc in docs) / n or 1.0
+    doc_freq = Counter(term for doc in docs for term in query_terms if term in doc)
+    idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+    scores = []
+    for doc in docs:
+        length = sum(doc.values())
+        norm = k1 * (1 - b + b * length / avg_len)
+        score = 0.0
+        for term, term_idf in idf.items():
+            tf = doc.get(term)
+            if tf:
+                score += term_idf * tf * (k1 + 1) / (tf + norm)
+        scores.append(score)
+    return scores
+
+
+def compress_text(text: str, query: str, token_budget: int, top_k: int) -> str:
+    """Keep the top-k most relevant passages that fit the token budget, in document order.
+
+    Text already within the budget is returned unchanged. If nothing matches the
+    query, the leading passages are kept; non-empty text never compresses to an
+    empty string.
+    """
+    char_budget = token_budget * CHARS_PER_TOKEN
+    if len(text) <= char_budget:
+        return text
+
+    passages = split_passages(text)
+    scores = bm25_scores(passages, query)
+    # Highest score first; earlier passages win ties (and all-zero scores keep the document's start)
+    ranked = sorted(range(len(passages)), key=lambda i: (-scores[i], i))
+
+    selected = []
+    used = 0
+    for i in ranked:
+        if len(selected) >= top_k:
+            break
+        size = len(passages[i]) + 1
+        if used + size > char_budget:
+            continue
+        selected.append(i)
+        used += size
+
+    if not selected:
+        logger.warning(f"No passage fits {token_budget} tokens; keeping the start of the document")
+        return _wrap(text, max(char_budget, 1))[0] if text.strip() else text
+
+    selected.sort()
+    return "\n".join(passages[i] for i in selected)
@@ -0,0 +1,180 @@
+"""
+Incremental Server-Sent Events parser.
+
+Parses an SSE byte stream chunk by chunk following the WHATWG event-stream
+rules: CRLF/CR/LF line endings, multi-line ``data:`` fields, ``event``/``id``/
+``retry`` fields, comments and frames split across network chunks. The one
+deliberate difference: close() dispatches a final event that lacks its
+terminating blank line instead of discarding it.
+
+Event data is kept as bytes so large JSON payloads are decoded exactly once,
+with orjson when it is installed.
+"""
+
+import json
+import logging
+from typing import Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+
+    def json_loads(data: Any) -> Any:
+        """Decode JSON from bytes or str using orjson"""
+        return orjson.loads(data)
+
+    JSON_DECODE_ERRORS = (orjson.JSONDecodeError, ValueError)
+    JSON_BACKEND = "orjson"
+except ImportError:  # pragma: no cover - depends on the environment
+    def json_loads(data: Any) -> Any:
+        """Decode JSON from bytes or str using the standard library"""
+        return json.loads(data)
+
+    JSON_DECODE_ERRORS = (json.JSONDecodeError, ValueError)
+    JSON_BACKEND = "json"
+
+_BOM = b"\xef\xbb\xbf"
+
+
+class SSEEvent:
+    """A single dispatched SSE event"""
+
+    __slots__ = ("event", "data", "id", "retry")
+
+    def __init__(self, event: str, data: bytes, id: Optional[str] = None, retry: Optional[int] = None):
+        self.event = event
+        self.data = data
+        self.id = id
+        self.retry = retry
+
+    @property
+    def text(self) -> str:
+        """Event data decoded as UTF-8"""
+        return self.data.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        """Event data decoded as JSON"""
+        return json_loads(self.data)
+
+    def __repr__(self) -> str:
+        return f"SSEEvent(event={self.event!r}, id={self.id!r}, retry={self.retry!r}, data={self.data[:60]!r})"
+
+
+class SSEParser:
+    """Incremental SSE parser working on a bytearray buffer.
+
+    Feed raw chunks as they arrive; each call returns the events completed by that chunk.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._data_lines: List[bytes] = []
+        self._event_type = ""
+        self._last_event_id: Optional[str] = None
+        self._retry: Optional[int] = None
+        self._started = False
+
+    @property
+    def last_event_id(self) -> Optional[str]:
+        """The last event ID seen on the stream (for reconnects)"""
+        return self._last_event_id
+
+    @property
+    def retry(self) -> Optional[int]:
+        """The last reconnection time (ms) announced by the server"""
+        return self._retry
+
+    def feed(self, chunk: bytes) -> List[SSEEvent]:
+        """Add a chunk of the stream and return any events it completes"""
+        if not chunk:
+            return []
+
+        buffer = self._buffer
+        buffer += chunk
+
+        if not self._started:
+            if len(buffer) < len(_BOM) and _BOM.startswith(bytes(buffer)):
+                return []
+            if buffer.startswith(_BOM):
+                del buffer[:len(_BOM)]
+            self._started = True
+
+        # Fast path: a chunk without any line terminator cannot complete a line
+        if b"\n" not in chunk and b"\r" not in chunk:
+            return []
+
+        # bytes.splitlines only splits on \n, \r and \r\n - exactly the SSE line terminators
+        lines = buffer.splitlines(keepends=True)
+        if not lines:
+            return []
+
+        # The last line is incomplete unless terminated. A trailing \r may be the first
+        # half of a \r\n split across chunks, so hold it back until more data arrives.
+        tail = lines[-1]
+        if tail.endswith(b"\n"):
+            consumed = len(buffer)
+        else:
+            lines.pop()
+            consumed = len(buffer) - len(tail)
+        if consumed == 0:
+            return []
+        del buffer[:consumed]
+
+        events: List[SSEEvent] = []
+        for line in lines:
+            event = self._process_line(line.rstrip(b"\r\n"))
+            if event is not None:
+                events.append(event)
+        return events
+
+    def close(self) -> List[SSEEvent]:
+        """Signal end of stream and return the events still buffered.
+
+        Unlike a browser EventSource, which discards a trailing event without its
+        terminating blank line, the final frame is dispatched: an agent service
+        that closes the stream right after its last frame loses nothing.
+        """
+        events: List[SSEEvent] = []
+        for line in bytes(self._buffer).splitlines():
+            event = self._process_line(line)
+            if event is not None:
+                events.append(event)
+        self._buffer.clear()
+        event = self._dispatch()
+        if event is not None:
+            events.append(event)
+        return events
+
+    def _process_line(self, line: bytes) -> Optional[SSEEvent]:
+        if not line:
+            return self._dispatch()
+        if line[0] == 0x3A:  # ':' - comment / keep-alive
+            return None
+
+        field, sep, value = line.partition(b":")
+        if sep and value[:1] == b" ":
+            value = value[1:]
+
+        if field == b"data":
+            self._data_lines.append(value)
+        elif field == b"event":
+            self._event_type = value.decode("utf-8", errors="replace")
+        elif field == b"id":
+            if b"\x00" not in value:
+                self._last_event_id = value.decode("utf-8", errors="replace")
+        elif field == b"retry":
+            if value.isdigit():
+                self._retry = int(value)
+        # Unknown fields are ignored
+        return None
+
+    def _dispatch(self) -> Optional[SSEEvent]:
+        data_lines = self._data_lines
+        event_type = self._event_type
+        self._event_type = ""
+        if not data_lines:
+            return None
+        self._data_lines = []
+        data = bytes(data_lines[0]) if len(data_lines) == 1 else b"\n".join(data_lines)
+        return SSEEvent(event_type or "message", data, self._last_event_id, self._retry)
@@ -0,0 +1,165 @@
+"""
+Per-run span tracing.
+
+A RunTrace records nested spans (agent runs, LLM calls, callbacks, state
+writes) timed with time.perf_counter. The trace of the run in progress lives
+in a ContextVar, so concurrent runs in one worker never share timing state:
+each request task sees its own trace, and tasks the run spawns (parallel
+agents) inherit it.
+
+Spans that start in one callback and end in another are opened with
+start() and closed with end(); spans around a block of code use span():
+
+    trace, token = start_trace(invocation_id)
+    with trace.span("callback", "final_formatting_callback"):
+        ...
+    duration = end_trace(trace, token)
+
+Every finished span is observed in the star_span_seconds histogram, and
+tree() returns the span tree for attaching to a response.
+"""
+
+import time
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from shared_utils.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+SPAN_SECONDS = Histogram("star_span_seconds", "Traced span durations by kind and name", ["kind", "name"])
+
+_current_trace: ContextVar[Optional["RunTrace"]] = ContextVar("star_run_trace", default=None)
+
+
+class Span:
+    """A timed operation within a run"""
+
+    __slots__ = ("kind", "name", "parent", "started", "ended", "attributes", "children")
+
+    def __init__(self, kind: str, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.kind = kind
+        self.name = name
+        self.parent = parent
+        self.started = time.perf_counter()
+        self.ended: Optional[float] = None
+        self.attributes = attributes
+        self.children: List["Span"] = []
+
+    @property
+    def duration(self) -> float:
+        """Seconds from start to end, or to now while the span is open"""
+        return (self.ended if self.ended is not None else time.perf_counter()) - self.started
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        node: Dict[str, Any] = {
+            "kind": self.kind,
+            "name": self.name,
+            "startMs": round((self.started - origin) * 1000, 3),
+            "durationMs": round(self.duration * 1000, 3),
+        }
+        if self.ended is None:
+            node["open"] = True
+        if self.attributes:
+            node["attributes"] = self.attributes
+        if self.children:
+            node["children"] = [child.to_dict(origin) for child in self.children]
+        return node
+
+
+class RunTrace:
+    """The span tree of one agent run"""
+
+    def __init__(self, invocation_id: str):
+        self.invocation_id = invocation_id
+        self.root = Span("run", "run", None, {"invocationId": invocation_id})
+        self._latest: Dict[Tuple[str, str], Span] = {}  # Most recently started span per kind and name
+
+    def start(self, kind: str, name: str, parent: Optional[Span] = None, **attributes: Any) -> Span:
+        span = Span(kind, name, parent or self.root, attributes)
+        span.parent.children.append(span)
+        self._latest[(kind, name)] = span
+        return span
+
+    def end(self, span: Span) -> float:
+        if span.ended is None:
+            span.ended = time.perf_counter()
+            SPAN_SECONDS.labels(span.kind, span.name).observe(span.ended - span.started)
+        return span.ended - span.started
+
+    @contextmanager
+    def span(self, kind: str, name: str, parent: Optional[Span] = None, **attributes: Any) -> Iterator[Span]:
+        span = self.start(kind, name, parent, **attributes)
+        try:
+            yield span
+        finally:
+            self.end(span)
+
+    def latest(self, kind: str, name: str) -> Optional[Span]:
+        """The most recently started span of this kind and name, open or not"""
+        return self._latest.get((kind, name))
+
+    def open_span(self, kind: str, name: str) -> Optional[Span]:
+        span = self._latest.get((kind, name))
+        return span if span is not None and span.ended is None else None
+
+    def durations(self, kind: str, name: str) -> List[float]:
+        """Durations of the finished spans of this kind and name, in start order"""
+        found: List[float] = []
+        stack = [self.root]
+        while stack:
+            span = stack.pop()
+            if span.kind == kind and span.name == name and span.ended is not None:
+                found.append((span.started, span.ended - span.started))
+            stack.extend(span.children)
+        return [duration for _, duration in sorted(found)]
+
+    def tree(self) -> Dict[str, Any]:
+        return self.root.to_dict(self.root.started)
+
+    def finish(self) -> float:
+        """End the run and any span left open (e.g. an agent whose callbacks ended the invocation)"""
+        spans, stack = [], [self.root]
+        while stack:
+            span = stack.pop()
+            spans.append(span)
+            stack.extend(span.children)
+        for span in reversed(spans):  # Children before their parents
+            self.end(span)
+        return self.root.ended - self.root.started
+
+
+def current_trace(invocation_id: Optional[str] = None) -> Optional[RunTrace]:
+    """The trace of the run in progress, if it belongs to invocation_id (when given)"""
+    trace = _current_trace.get()
+    if trace is None or (invocation_id is not None and trace.invocation_id != invocation_id):
+        return None
+    return trace
+
+
+def start_trace(invocation_id: str) -> Tuple[RunTrace, Token]:
+    trace = RunTrace(invocation_id)
+    return trace, _current_trace.set(trace)
+
+
+def end_trace(trace: RunTrace, token: Token) -> float:
+    """Finish the trace and stop it being current; returns the run duration"""
+    duration = trace.finish()
+    try:
+        _current_trace.reset(token)
+    except ValueError:
+        # Generator closed from another context; the run's own context ends with its request
+        pass
+    return duration
+
+
+@contextmanager
+def use_trace(trace: RunTrace) -> Iterator[RunTrace]:
+    """Make an existing trace current for the block"""
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
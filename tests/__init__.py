@@ -0,0 +1,5 @@
+"""
+Unit tests for the STAR Answer Generation system.
+
+Run from the repository root with ``python -m pytest tests``.
+"""
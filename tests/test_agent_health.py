@@ -0,0 +1,170 @@
+import asyncio
+
+import pytest
+
+from fastapi_backend import agent_health
+from fastapi_backend.agent_health import AgentHealthMonitor, CircuitBreaker
+
+
+class FakeClock:
+    """Stands in for the time module so breaker and monitor timings are deterministic"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(agent_health, "time", fake)
+    return fake
+
+
+def _breaker(**kwargs):
+    kwargs.setdefault("failure_threshold", 3)
+    kwargs.setdefault("recovery_timeout", 30)
+    kwargs.setdefault("trial_timeout", 60)
+    return CircuitBreaker(**kwargs)
+
+
+def _open(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = _breaker()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.retry_after() == 30
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = _breaker()
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_allows_one_trial(clock):
+    breaker = _breaker()
+    _open(breaker)
+    clock.advance(29)
+    assert not breaker.allow_request()
+    clock.advance(1)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.retry_after() == 0
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_trial_success_closes(clock):
+    breaker = _breaker()
+    _open(breaker)
+    clock.advance(30)
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request() and breaker.allow_request()
+
+
+def test_trial_failure_reopens(clock):
+    breaker = _breaker()
+    _open(breaker)
+    clock.advance(30)
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.retry_after() == 30
+    assert not breaker.allow_request()
+
+
+def test_released_trial_lets_the_next_request_try(clock):
+    breaker = _breaker()
+    _open(breaker)
+    clock.advance(30)
+    assert breaker.allow_request()
+    breaker.release_trial()  # e.g. the trial's caller was cancelled
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+
+
+def test_unreported_trial_times_out(clock):
+    breaker = _breaker()
+    _open(breaker)
+    clock.advance(30)
+    assert breaker.allow_request()
+    clock.advance(59)
+    assert not breaker.allow_request()
+    clock.advance(1)
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_release_does_not_affect_other_states(clock):
+    breaker = _breaker()
+    breaker.release_trial()
+    assert breaker.state == CircuitBreaker.CLOSED
+    _open(breaker)
+    breaker.release_trial()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow_request()
+
+
+class FakeAgent:
+    base_url = "http://agent"
+
+    def __init__(self, clock, results):
+        self.clock = clock
+        self.results = list(results)  # (latency seconds, ok)
+        self.circuit_breaker = _breaker(failure_threshold=2)
+
+    async def health_check(self):
+        latency, ok = self.results.pop(0)
+        self.clock.advance(latency)
+        return ok, None if ok else "connection refused"
+
+
+def test_monitor_latency_ewma(clock):
+    agent = FakeAgent(clock, [(0.1, True), (0.2, True), (0.4, True)])
+    monitor = AgentHealthMonitor(agent, alpha=0.5)
+    for _ in range(3):
+        asyncio.run(monitor.probe())
+    assert monitor.healthy is True
+    assert monitor.last_latency == pytest.approx(0.4)
+    assert monitor.latency_ewma == pytest.approx(0.5 * 0.4 + 0.5 * (0.5 * 0.2 + 0.5 * 0.1))
+    assert monitor.status()["latency_ewma_ms"] == pytest.approx(275.0)
+
+
+def test_monitor_failures_feed_the_breaker(clock):
+    agent = FakeAgent(clock, [(0.1, True), (1.0, False), (1.0, False), (0.1, True)])
+    monitor = AgentHealthMonitor(agent, alpha=0.5)
+    asyncio.run(monitor.probe())
+    asyncio.run(monitor.probe())
+    asyncio.run(monitor.probe())
+    assert monitor.healthy is False
+    assert monitor.last_error == "connection refused"
+    assert monitor.latency_ewma == pytest.approx(0.1)  # Failed probes do not move the latency average
+    assert agent.circuit_breaker.state == CircuitBreaker.OPEN
+    assert (monitor.probes_total, monitor.probes_failed) == (3, 2)
+
+    asyncio.run(monitor.probe())
+    assert monitor.healthy is True and monitor.last_error is None
+    assert agent.circuit_breaker.state == CircuitBreaker.CLOSED
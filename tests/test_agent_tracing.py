@@ -0,0 +1,176 @@
+import json
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("google.adk")
+
+from google.adk.agents import LlmAgent, SequentialAgent
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+from shared_utils.tracing import RunTrace, use_trace
+
+
+class Context(SimpleNamespace):
+    """What the traced callbacks use of ADK's CallbackContext"""
+
+
+def test_wrappers_chain_existing_callbacks_in_order():
+    from refiner_agent.tracing import instrument_agent_tree
+
+    calls = []
+
+    def recorder(name, result=None):
+        def callback(**kwargs):
+            calls.append(name)
+            return result
+        callback.__name__ = name
+        return callback
+
+    async def async_before(**kwargs):
+        calls.append("async_before")
+
+    agent = LlmAgent(
+        name="probe", model="local-stand-in",
+        before_agent_callback=[recorder("before_1"), async_before],
+        after_agent_callback=recorder("after_agent"),
+        before_model_callback=[recorder("before_model_1"), recorder("before_model_2")],
+        after_model_callback=[recorder("after_model_1", "replaced"), recorder("after_model_2")],
+    )
+    flow = SequentialAgent(name="flow", sub_agents=[agent])
+    instrument_agent_tree(flow)
+    instrument_agent_tree(flow)  # Wrapping is idempotent
+
+    trace = RunTrace("inv")
+    ctx = Context(invocation_id="inv", state={})
+
+    async def run():
+        with use_trace(trace):
+            await flow.before_agent_callback(callback_context=ctx)
+            assert await agent.before_agent_callback(callback_context=ctx) is None
+            assert await agent.before_model_callback(callback_context=ctx, llm_request=LlmRequest(model="m")) is None
+            result = await agent.after_model_callback(callback_context=ctx, llm_response=LlmResponse())
+            await agent.after_agent_callback(callback_context=ctx)
+            await flow.after_agent_callback(callback_context=ctx)
+            return result
+
+    assert asyncio.run(run()) == "replaced"
+    # after_model_2 is skipped: a callback that returns a value ends the chain, as in ADK
+    assert calls == ["before_1", "async_before", "before_model_1", "before_model_2", "after_model_1", "after_agent"]
+
+    [flow_node] = trace.tree()["children"]
+    [probe_node] = flow_node["children"]
+    assert probe_node["name"] == "probe"
+    kinds = [(child["kind"], child["name"]) for child in probe_node["children"]]
+    assert kinds == [
+        ("callback", "before_1"), ("callback", "async_before"), ("callback", "before_model_1"),
+        ("callback", "before_model_2"), ("llm", "probe"), ("callback", "after_model_1"), ("callback", "after_agent"),
+    ]
+    assert "open" not in probe_node
+
+
+def test_before_agent_callback_that_skips_the_agent_closes_its_span():
+    from refiner_agent.tracing import instrument_agent_tree
+
+    skip = types.Content(parts=[types.Part(text="skipped")])
+    agent = LlmAgent(name="skipper", model="local-stand-in", before_agent_callback=lambda callback_context: skip)
+    instrument_agent_tree(agent)
+    trace = RunTrace("inv")
+
+    async def run():
+        with use_trace(trace):
+            return await agent.before_agent_callback(callback_context=Context(invocation_id="inv", state={}))
+
+    assert asyncio.run(run()) is skip
+    assert trace.open_span("agent", "skipper") is None
+    assert len(trace.durations("agent", "skipper")) == 1
+
+
+SLOW_MARKER = "(slow run)"
+SLOW_CALL_SECONDS = 0.15
+
+
+def _llm_agents(agent):
+    if isinstance(agent, LlmAgent):
+        yield agent
+    for sub_agent in agent.sub_agents:
+        yield from _llm_agents(sub_agent)
+
+
+def test_overlapping_runs_keep_separate_traces_and_timings(monkeypatch):
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from refiner_agent import callbacks
+    from refiner_agent.agent import root_agent
+    from refiner_agent.local_model import LocalStandInLlm, _request_text
+
+    # Every agent on the offline stand-in; calls of the slow run take SLOW_CALL_SECONDS, the other run's none
+    for agent in _llm_agents(root_agent.sequential_agent):
+        monkeypatch.setattr(agent, "model", "local-stand-in")
+    generate = LocalStandInLlm.generate_content_async
+
+    async def paced(self, llm_request, stream=False):
+        if SLOW_MARKER in _request_text(llm_request):
+            await asyncio.sleep(SLOW_CALL_SECONDS)
+        async for response in generate(self, llm_request, stream):
+            yield response
+
+    monkeypatch.setattr(LocalStandInLlm, "generate_content_async", paced)
+    monkeypatch.setattr(callbacks, "TRACE_IN_RESPONSE", True)
+
+    session_service = InMemorySessionService()
+    runner = Runner(agent=root_agent, app_name="refiner_agent", session_service=session_service)
+
+    async def run(question):
+        session = await session_service.create_session(
+            app_name="refiner_agent", user_id="u", session_id=str(uuid.uuid4()),
+            state={"role": "Product Manager", "industry": "Healthcare", "question": question}
+        )
+        final = None
+        started = asyncio.get_running_loop().time()
+        async for event in runner.run_async(
+            user_id="u", session_id=session.id, new_message=types.Content(role="user", parts=[types.Part(text="Start")])
+        ):
+            for part in (event.content.parts if event.content else None) or []:
+                if part.text and '"performanceMetrics"' in part.text:
+                    final = json.loads(part.text)
+        return final, asyncio.get_running_loop().time() - started
+
+    async def main():
+        return await asyncio.gather(
+            run(f"Tell me about a time you resolved a conflict {SLOW_MARKER}"),
+            run("Tell me about a time you led a launch"),
+        )
+
+    (slow, slow_wall), (fast, fast_wall) = asyncio.run(main())
+
+    for response, wall in ((slow, slow_wall), (fast, fast_wall)):
+        metrics = response["performanceMetrics"]
+        assert 0 < metrics["totalWorkflowTime"] <= wall
+        # One critique per recorded iteration, one refinement between consecutive critiques
+        assert len(metrics["critiqueTimes"]) == len(response["iterations"])
+        assert len(metrics["refinementTimes"]) == len(response["iterations"]) - 1
+        assert metrics["trace"]["kind"] == "run"
+
+    slow_metrics, fast_metrics = slow["performanceMetrics"], fast["performanceMetrics"]
+    assert slow_metrics["trace"]["attributes"]["invocationId"] != fast_metrics["trace"]["attributes"]["invocationId"]
+    assert all(t >= SLOW_CALL_SECONDS for t in slow_metrics["critiqueTimes"] + slow_metrics["refinementTimes"])
+    assert slow_metrics["generationTime"] >= SLOW_CALL_SECONDS
+    assert all(t < SLOW_CALL_SECONDS for t in fast_metrics["critiqueTimes"] + fast_metrics["refinementTimes"])
+    assert fast_metrics["generationTime"] < SLOW_CALL_SECONDS
+    assert fast_metrics["totalWorkflowTime"] < slow_metrics["totalWorkflowTime"]
+
+    def llm_spans(node):
+        if node["kind"] == "llm":
+            yield node
+        for child in node.get("children", []):
+            yield from llm_spans(child)
+
+    slow_calls = list(llm_spans(slow_metrics["trace"]))
+    fast_calls = list(llm_spans(fast_metrics["trace"]))
+    assert slow_calls and fast_calls
+    assert all(span["durationMs"] >= SLOW_CALL_SECONDS * 1000 for span in slow_calls)
+    assert all(span["durationMs"] < SLOW_CALL_SECONDS * 1000 for span in fast_calls)
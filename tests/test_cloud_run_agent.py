@@ -0,0 +1,127 @@
+import json
+import asyncio
+from collections import Counter
+
+import pytest
+
+pytest.importorskip("pydantic")  # error responses are built with shared_utils.error_utils
+pytest.importorskip("aiohttp")
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from fastapi_backend.cloud_run_agent import CloudRunAgent, FUSED_RUN_PATH
+
+
+def frame(author, payload):
+    event = {"author": author, "content": {"parts": [{"text": json.dumps(payload)}]}}
+    return f"data: {json.dumps(event)}\n\n".encode()
+
+
+class Agent:
+    """Agent service answering the fused route with a fixed status and streaming from /run_sse"""
+
+    def __init__(self, fused_status=200, frames=3, hold: asyncio.Event = None):
+        self.fused_status = fused_status
+        self.frames = frames
+        self.hold = hold  # Stream stalls after the first frame until set
+        self.calls: Counter = Counter()
+
+    async def stream(self, request):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for i in range(self.frames):
+            await response.write(frame("STARAnswerCritic", {"type": "status", "message": f"step {i}"}))
+            if self.hold is not None:
+                await self.hold.wait()
+        return response
+
+    async def fused(self, request):
+        self.calls["fused"] += 1
+        await request.read()
+        if self.fused_status != 200:
+            return web.Response(status=self.fused_status, text="no")
+        return await self.stream(request)
+
+    async def create_session(self, request):
+        self.calls["create_session"] += 1
+        return web.json_response({"id": request.match_info["session_id"]})
+
+    async def run_sse(self, request):
+        self.calls["run_sse"] += 1
+        await request.read()
+        return await self.stream(request)
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post(FUSED_RUN_PATH, self.fused)
+        app.router.add_post("/apps/refiner_agent/users/{user_id}/sessions/{session_id}", self.create_session)
+        app.router.add_post("/run_sse", self.run_sse)
+        return app
+
+
+async def _run(agent, consume):
+    server = TestServer(agent.app())
+    await server.start_server()
+    client = CloudRunAgent(str(server.make_url("")))
+    await client.start()
+    try:
+        result = await consume(client)
+        await asyncio.sleep(0)
+        return result, client.pool_stats()
+    finally:
+        await client.close()
+        await server.close()
+
+
+async def _collect(client):
+    return [event async for event in client.stream_query("u", "s", {"question": "q"})]
+
+
+@pytest.mark.parametrize("fused_status, calls", [
+    (200, {"fused": 1}),
+    (404, {"fused": 1, "create_session": 1, "run_sse": 1}),
+    (409, {"fused": 1, "run_sse": 1}),
+])
+def test_fused_route_outcomes_release_their_connections(fused_status, calls):
+    agent = Agent(fused_status)
+    events, stats = asyncio.run(_run(agent, _collect))
+    assert [event["message"] for event in events] == ["step 0", "step 1", "step 2"]
+    assert agent.calls == Counter(calls)
+    assert stats["active_connections"] == 0
+    assert stats["requests_in_flight"] == 0
+
+
+def test_closing_the_stream_early_releases_the_connection():
+    async def first_event(client):
+        stream = client.stream_query("u", "s", {"question": "q"})
+        event = await stream.__anext__()
+        await stream.aclose()
+        return event
+
+    event, stats = asyncio.run(_run(Agent(frames=10), first_event))
+    assert event["message"] == "step 0"
+    assert stats["active_connections"] == 0
+    assert stats["requests_in_flight"] == 0
+
+
+def test_cancelling_a_stalled_stream_releases_the_connection():
+    async def cancel_while_waiting(client):
+        received = []
+
+        async def consume():
+            async for event in client.stream_query("u", "s", {"question": "q"}):
+                received.append(event)
+
+        task = asyncio.create_task(consume())
+        while not received:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return received
+
+    received, stats = asyncio.run(_run(Agent(hold=asyncio.Event()), cancel_while_waiting))
+    assert len(received) == 1
+    assert stats["active_connections"] == 0
+    assert stats["requests_in_flight"] == 0
@@ -0,0 +1,26 @@
+import json
+
+import pytest
+
+from shared_utils.critique_turns import is_critique_turn
+
+CRITIQUE = json.dumps({"rating": 4.2, "suggestions": ["a", "b"]})
+FUSED = json.dumps({"critique": {"rating": 4.2}, "refinedAnswer": {"situation": "s"}})
+ITERATION = json.dumps({"type": "iteration", "data": {"critique": {"rating": 4.2}}, "highestRating": 4.2})
+ANSWER = json.dumps({"situation": "s", "task": "t", "action": "a", "result": "r"})
+
+
+@pytest.mark.parametrize("role, texts, expected", [
+    ("model", [CRITIQUE], True),
+    ("model", [FUSED], True),
+    ("model", [None, "thinking...", CRITIQUE], True),
+    ("model", [ITERATION], False),
+    ("model", [ANSWER], False),
+    ("model", ['{"rating": 4.2'], False),
+    ("model", [], False),
+    ("user", [CRITIQUE], False),
+    ("user", ["For context:", f"[STARAnswerCritic] said: {CRITIQUE}"], False),
+    (None, [CRITIQUE], False),
+])
+def test_is_critique_turn(role, texts, expected):
+    assert is_critique_turn(role, texts) is expected
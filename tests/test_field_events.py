@@ -0,0 +1,46 @@
+from fastapi_backend.field_events import FieldEventStream
+
+
+def partial(text, author="STARAnswerGenerator"):
+    return {"type": "partial", "author": author, "text": text}
+
+
+def test_json_output_becomes_field_events():
+    stream = FieldEventStream()
+    events = stream.feed(partial('{"situation": "Our cl')) + stream.feed(partial('inic", "task": "t"}'))
+    assert [e["type"] for e in events] == ["field", "field", "field"]
+    assert "".join(e["delta"] for e in events if e["field"] == "situation") == "Our clinic"
+    assert events[-1] == {"field": "task", "delta": "t", "done": True, "type": "field", "author": "STARAnswerGenerator"}
+
+
+def test_failure_after_fields_resets_drafts_and_resends_all_text():
+    stream = FieldEventStream()
+    assert [e["type"] for e in stream.feed(partial('{"situation": "Our clinic", '))] == ["field"]
+    events = stream.feed(partial('oops "task": "t"}'))
+    assert events[0] == {"type": "field_reset", "author": "STARAnswerGenerator"}
+    assert events[-1] == partial('{"situation": "Our clinic", oops "task": "t"}')
+    # Later chunks from the same author are forwarded unchanged, not re-sent
+    assert stream.feed(partial(" more")) == [partial(" more")]
+
+
+def test_plain_text_is_forwarded_whole_without_reset():
+    stream = FieldEventStream()
+    assert stream.feed(partial("Here is")) == [partial("Here is")]
+    assert stream.feed(partial(" the answer")) == [partial(" the answer")]
+
+
+def test_text_held_back_before_failure_is_forwarded():
+    stream = FieldEventStream()
+    assert stream.feed(partial("```json\n")) == []
+    assert stream.feed(partial("Sorry, ")) == [partial("```json\nSorry, ")]
+
+
+def test_new_author_and_reset_start_a_new_parser():
+    stream = FieldEventStream()
+    stream.feed(partial("not json", author="A"))
+    events = stream.feed(partial('{"rating": 4.2}', author="B"))
+    assert events == [{"field": "rating", "value": 4.2, "done": True, "type": "field", "author": "B"}]
+
+    stream.feed(partial("not json", author="B"))
+    stream.reset()
+    assert stream.feed(partial('{"rating": 4', author="B")) == []
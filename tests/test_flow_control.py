@@ -0,0 +1,133 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("google.adk")
+
+from refiner_agent.callbacks import iteration_history_callback, same_star_answer
+from refiner_agent.flow_control import RatingChecker
+
+ANSWER = {"situation": "S", "task": "T", "action": "A", "result": "R"}
+
+
+def _history(*ratings):
+    return [{"starAnswer": ANSWER, "critique": {"rating": rating}} for rating in ratings]
+
+
+def _plan(state, **settings):
+    """Run the planner once; returns its single event's state delta and whether it escalated"""
+    checker = RatingChecker(name="rating_checker", **settings)
+    ctx = SimpleNamespace(session=SimpleNamespace(state=state), invocation_id="test")
+
+    async def run():
+        return [event async for event in checker._run_async_impl(ctx)]
+
+    events = asyncio.run(run())
+    assert len(events) == 1
+    return events[0].actions.state_delta, bool(events[0].actions.escalate)
+
+
+# (case, settings, state, stop reason or None to continue, LLM calls saved)
+PLAN_CASES = [
+    ("threshold met", {}, {"current_critique": {"rating": 4.6}}, "threshold", 0),
+    ("threshold met in a later round", {}, {"planner_round": 1, "current_critique": {"rating": 4.9},
+                                            "fullIterationHistory": _history(4.0, 4.9)}, "threshold", 0),
+    ("below threshold, first round", {}, {"current_critique": {"rating": 4.0},
+                                          "fullIterationHistory": _history(4.0)}, None, 0),
+    ("last round skips its refine", {}, {"planner_round": 2, "current_critique": {"rating": 4.2},
+                                         "fullIterationHistory": _history(3.8, 4.0, 4.2)}, "max_iterations", 1),
+    ("last round, fused", {"fused": True}, {"planner_round": 2, "current_critique": {"rating": 4.2}},
+     "max_iterations", 0),
+    ("unchanged answer", {}, {"answer_unchanged": True, "current_critique": {"rating": 4.0}}, "unchanged", 5),
+    ("unchanged answer, fused", {"fused": True}, {"answer_unchanged": True}, "unchanged", 2),
+    ("unchanged beats threshold", {}, {"answer_unchanged": True, "current_critique": {"rating": 5.0}},
+     "unchanged", 5),
+    ("plateau", {}, {"planner_round": 1, "current_critique": {"rating": 4.05}, "planner_best_rating": 4.0,
+                     "fullIterationHistory": _history(4.0, 4.05)}, "plateau", 3),
+    ("plateau, this round not in the history", {}, {"planner_round": 1, "current_critique": {"rating": 4.05},
+                                                    "planner_best_rating": 4.0, "fullIterationHistory": _history(4.0)},
+     "plateau", 3),
+    ("history ignored for plateau", {}, {"planner_round": 1, "current_critique": {"rating": 4.3},
+                                         "planner_best_rating": 4.0, "fullIterationHistory": _history(4.5, 4.3)}, None, 0),
+    ("rating dropped", {"max_iterations": 5}, {"planner_round": 1, "current_critique": {"rating": 3.5},
+                                               "planner_best_rating": 4.0}, "plateau", 7),
+    ("improving", {}, {"planner_round": 1, "current_critique": {"rating": 4.3}, "planner_best_rating": 4.0}, None, 0),
+    ("plateau within patience", {"plateau_patience": 2, "max_iterations": 5},
+     {"planner_round": 1, "current_critique": {"rating": 4.0}, "planner_best_rating": 4.0}, None, 0),
+    ("plateau after patience", {"plateau_patience": 2, "max_iterations": 5},
+     {"planner_round": 2, "stalled_rounds": 1, "current_critique": {"rating": 4.0}, "planner_best_rating": 4.0},
+     "plateau", 5),
+    ("plateau detection disabled", {"plateau_patience": 0}, {"planner_round": 1, "current_critique": {"rating": 4.0},
+                                                             "planner_best_rating": 4.0}, None, 0),
+    ("missing critique", {}, {}, None, 0),
+    ("unreadable rating", {}, {"current_critique": {"rating": "n/a"}}, None, 0),
+    ("savings accumulate", {}, {"llm_calls_saved": 2, "answer_unchanged": True}, "unchanged", 7),
+]
+
+
+@pytest.mark.parametrize("settings, state, reason, saved", [case[1:] for case in PLAN_CASES],
+                         ids=[case[0] for case in PLAN_CASES])
+def test_planner(settings, state, reason, saved):
+    delta, escalated = _plan(dict(state), **settings)
+    round_number = state.get("planner_round", 0) + 1
+    assert delta["planner_round"] == round_number
+    if reason is None:
+        assert not escalated
+        assert "stop_reason" not in delta
+    else:
+        assert escalated
+        assert delta["stop_reason"] == reason
+        assert delta["llm_calls_saved"] == saved
+
+
+@pytest.mark.parametrize("state, best", [
+    ({"current_critique": {"rating": 4.0}}, 4.0),
+    ({"current_critique": {"rating": 4.3}, "planner_best_rating": 4.0}, 4.3),
+    ({"current_critique": {"rating": 3.9}, "planner_best_rating": 4.0}, 4.0),
+])
+def test_planner_keeps_the_best_rating(state, best):
+    delta, escalated = _plan(dict(state), plateau_patience=2)
+    assert not escalated
+    assert delta["planner_best_rating"] == best
+
+
+def test_planner_without_rating_keeps_best_rating_unchanged():
+    delta, _ = _plan({"current_critique": {"rating": "n/a"}, "planner_best_rating": 4.0})
+    assert "planner_best_rating" not in delta
+
+
+@pytest.mark.parametrize("a, b, expected", [
+    (ANSWER, dict(ANSWER), True),
+    (ANSWER, {"situation": " S\n", "task": "T ", "action": "A", "result": "R"}, True),
+    (ANSWER, dict(ANSWER, result="R2"), False),
+    (ANSWER, {"situation": "S", "task": "T", "action": "A"}, False),
+    (ANSWER, None, False),
+    (None, None, False),
+    (ANSWER, "S T A R", False),
+])
+def test_same_star_answer(a, b, expected):
+    assert same_star_answer(a, b) is expected
+
+
+def _context(state):
+    return SimpleNamespace(state=state, invocation_id="test", agent_name="refinement_loop")
+
+
+def test_unchanged_answer_is_not_recorded():
+    state = {"current_star_answer": dict(ANSWER), "current_critique": {"rating": 4.0}}
+    assert iteration_history_callback(_context(state)) is not None
+    assert state["answer_unchanged"] is False
+    assert state["currentIteration"] == 1
+
+    state["current_critique"] = {"rating": 4.1}
+    state["current_star_answer"] = dict(ANSWER, action=" A ")
+    assert iteration_history_callback(_context(state)) is None
+    assert state["answer_unchanged"] is True
+    assert state["currentIteration"] == 1
+    assert len(state["fullIterationHistory"]) == 1
+
+    state["current_star_answer"] = dict(ANSWER, action="A, then B")
+    assert iteration_history_callback(_context(state)).iterationNumber == 2
+    assert state["answer_unchanged"] is False
+    assert state["highestRating"] == 4.1
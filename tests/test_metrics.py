@@ -0,0 +1,128 @@
+import math
+
+import pytest
+
+from shared_utils.metrics import Counter, Gauge, Histogram, Registry, stats_collector
+
+
+@pytest.fixture
+def registry():
+    return Registry()
+
+
+def _lines(registry):
+    text = registry.render()
+    assert text.endswith("\n")
+    return text.splitlines()
+
+
+def _samples(registry):
+    """Sample lines as {name+labels: value}"""
+    samples = {}
+    for line in _lines(registry):
+        if line.startswith("#"):
+            continue
+        series, value = line.rsplit(" ", 1)
+        samples[series] = value
+    return samples
+
+
+def test_help_and_type_lines_precede_the_samples(registry):
+    requests = Counter("app_requests_total", "Requests served", ["route"], registry=registry)
+    requests.labels("/chat").inc()
+    Gauge("app_in_flight", "Requests in flight", registry=registry).set(3)
+    assert _lines(registry) == [
+        "# HELP app_requests_total Requests served",
+        "# TYPE app_requests_total counter",
+        'app_requests_total{route="/chat"} 1',
+        "# HELP app_in_flight Requests in flight",
+        "# TYPE app_in_flight gauge",
+        "app_in_flight 3",
+    ]
+
+
+def test_help_text_escapes_backslash_and_newline_only(registry):
+    Gauge("app_g", 'Path C:\\tmp\nsecond "line"', registry=registry)
+    assert _lines(registry)[0] == '# HELP app_g Path C:\\\\tmp\\nsecond "line"'
+
+
+def test_label_values_are_escaped(registry):
+    counter = Counter("app_c", "c", ["value"], registry=registry)
+    counter.labels('back\\slash "quoted"\nnewline').inc(2)
+    assert _lines(registry)[2] == 'app_c{value="back\\\\slash \\"quoted\\"\\nnewline"} 2'
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    histogram = Histogram("app_seconds", "Latency", ["stage"], buckets=(0.1, 1.0, 5.0), registry=registry)
+    child = histogram.labels("critique")
+    for value in (0.05, 0.1, 0.5, 1.0, 2.0, 7.5):
+        child.observe(value)
+    samples = _samples(registry)
+    # Bucket bounds are inclusive: 0.1 falls in le="0.1", 1.0 in le="1"
+    assert samples['app_seconds_bucket{stage="critique",le="0.1"}'] == "2"
+    assert samples['app_seconds_bucket{stage="critique",le="1"}'] == "4"
+    assert samples['app_seconds_bucket{stage="critique",le="5"}'] == "5"
+    assert samples['app_seconds_bucket{stage="critique",le="+Inf"}'] == "6"
+    assert samples['app_seconds_count{stage="critique"}'] == "6"
+    assert float(samples['app_seconds_sum{stage="critique"}']) == pytest.approx(11.15)
+
+
+def test_histogram_sample_order_and_inf_bucket_equal_count(registry):
+    histogram = Histogram("app_tokens", "Tokens", buckets=(500, 100, 1000), registry=registry)
+    for value in (50, 700, 700, 5000):
+        histogram.observe(value)
+    assert _lines(registry) == [
+        "# HELP app_tokens Tokens",
+        "# TYPE app_tokens histogram",
+        'app_tokens_bucket{le="100"} 1',
+        'app_tokens_bucket{le="500"} 1',
+        'app_tokens_bucket{le="1000"} 3',
+        'app_tokens_bucket{le="+Inf"} 4',
+        "app_tokens_sum 6450",
+        "app_tokens_count 4",
+    ]
+
+
+def test_empty_histogram_renders_zero_buckets(registry):
+    Histogram("app_h", "h", buckets=(1.0,), registry=registry)
+    assert _samples(registry) == {'app_h_bucket{le="1"}': "0", 'app_h_bucket{le="+Inf"}': "0", "app_h_sum": "0", "app_h_count": "0"}
+
+
+def test_histogram_timer_observes_once(registry):
+    histogram = Histogram("app_t", "t", registry=registry)
+    with histogram.time():
+        pass
+    assert _samples(registry)["app_t_count"] == "1"
+
+
+@pytest.mark.parametrize("value, expected", [
+    (3, "3"), (2.5, "2.5"), (1e-7, "1e-07"), (math.inf, "+Inf"), (-math.inf, "-Inf"), (math.nan, "NaN"),
+])
+def test_sample_values(registry, value, expected):
+    Gauge("app_v", "v", registry=registry).set(value)
+    assert _lines(registry)[-1] == f"app_v {expected}"
+
+
+def test_labels_are_checked_and_names_unique(registry):
+    counter = Counter("app_c", "c", ["a", "b"], registry=registry)
+    with pytest.raises(ValueError):
+        counter.labels("only-one")
+    with pytest.raises(ValueError):
+        Gauge("app_c", "duplicate", registry=registry)
+
+
+def test_stats_collector_families(registry):
+    stats = {"hits": 3, "misses": 1, "size": 7}
+    registry.register_collector(stats_collector("app_cache", "Cache", lambda: stats, counters=("hits", "misses"), gauges=("size",)))
+    stats["hits"] = 4  # Read at scrape time
+    assert _lines(registry) == [
+        "# HELP app_cache_hits_total Cache: hits",
+        "# TYPE app_cache_hits_total counter",
+        "app_cache_hits_total 4",
+        "# HELP app_cache_misses_total Cache: misses",
+        "# TYPE app_cache_misses_total counter",
+        "app_cache_misses_total 1",
+        "# HELP app_cache_size Cache: size",
+        "# TYPE app_cache_size gauge",
+        "app_cache_size 7",
+    ]
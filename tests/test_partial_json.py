@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from shared_utils.partial_json import PartialJSONParser
+
+DOCUMENTS = [
+    {"rating": 4.2, "suggestions": ["line1\nline2", "b"], "situation": "x\ty"},
+    {"suggestions": ['say "hi"', "back\\slash\\", "tab\tend"], "situation": "after"},
+    {"critique": {"note": "a \"quoted\" }, and ] brackets", "path": "C:\\dir\\"}, "task": "done"},
+    {"rating": 3, "suggestions": ["caf\u00e9 \U0001F600", "\\u not an escape"], "result": "r\\n"},
+    {"situation": "top \"level\" \\ escapes\n", "action": ["[", "{", "\\\""]},
+]
+
+
+def _feed_all(chunks):
+    parser = PartialJSONParser()
+    deltas = {}
+    for chunk in chunks:
+        for update in parser.feed(chunk):
+            if "delta" in update:
+                deltas[update["field"]] = deltas.get(update["field"], "") + update["delta"]
+    return parser, deltas
+
+
+def _check(parser, deltas, document):
+    assert parser.done
+    assert parser.values == document
+    for field, value in document.items():
+        if isinstance(value, str):
+            assert deltas[field] == value
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+def test_split_at_every_offset(document):
+    text = json.dumps(document)
+    for cut in range(len(text) + 1):
+        parser, deltas = _feed_all([text[:cut], text[cut:]])
+        _check(parser, deltas, document)
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+def test_one_character_at_a_time(document):
+    text = json.dumps(document, ensure_ascii=False)
+    parser, deltas = _feed_all(list(text))
+    _check(parser, deltas, document)
+
+
+def test_backslash_at_chunk_end_inside_array():
+    parser, _ = _feed_all(['{"suggestions": ["a\\', 'nb", "c"], "situation": "x"}'])
+    assert parser.values == {"suggestions": ["a\nb", "c"], "situation": "x"}
+
+
+def test_not_an_object_fails():
+    parser = PartialJSONParser()
+    assert parser.feed("Sorry, I cannot") == []
+    assert parser.failed
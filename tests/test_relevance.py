@@ -0,0 +1,56 @@
+from shared_utils.relevance import CHARS_PER_TOKEN, MAX_PASSAGE_CHARS, compress_text, split_passages
+
+QUERY = "conflict with a stakeholder"
+
+
+def test_short_lines_are_bounded_passages():
+    text = "\n".join(f"Skill {i:03d}: Python, SQL, Go" for i in range(200))
+    passages = split_passages(text)
+    assert len(passages) > 1
+    assert all(len(passage) <= MAX_PASSAGE_CHARS for passage in passages)
+    assert " ".join(passages) == " ".join(line for line in text.splitlines())
+
+
+def test_heading_joins_the_next_line():
+    passages = split_passages("Experience\nLed a migration of the billing platform to a new provider.")
+    assert passages == ["Experience: Led a migration of the billing platform to a new provider."]
+
+
+def test_oversized_sentence_is_split_on_words():
+    line = " ".join(["stakeholder"] * 400)  # No sentence boundary
+    passages = split_passages(line)
+    assert len(passages) > 1
+    assert all(len(passage) <= MAX_PASSAGE_CHARS for passage in passages)
+    assert " ".join(passages) == line
+
+
+def test_unbroken_token_is_cut():
+    passages = split_passages("x" * 1000)
+    assert [len(passage) for passage in passages] == [400, 400, 200]
+
+
+def test_short_line_resume_compresses_to_non_empty():
+    text = "\n".join(f"Skill {i:03d}: Python, SQL, Go" for i in range(200))
+    compressed = compress_text(text, QUERY, 800, 10)
+    assert compressed
+    assert len(compressed) <= 800 * CHARS_PER_TOKEN
+
+
+def test_relevant_passages_are_kept_in_order():
+    filler = [f"Maintained reporting pipeline number {i} for the finance team every quarter." for i in range(60)]
+    text = "\n".join(filler[:30] + ["Resolved a conflict with a stakeholder over launch scope."] + filler[30:])
+    compressed = compress_text(text, QUERY, 100, 3)
+    assert "Resolved a conflict with a stakeholder" in compressed
+    assert len(compressed) <= 100 * CHARS_PER_TOKEN
+
+
+def test_nothing_fits_falls_back_to_a_prefix():
+    text = "Led the platform migration " * 40
+    compressed = compress_text(text, QUERY, 10, 5)
+    assert compressed
+    assert text.startswith(compressed)
+    assert len(compressed) <= 10 * CHARS_PER_TOKEN
+
+
+def test_text_within_budget_is_unchanged():
+    assert compress_text("Short resume.", QUERY, 100, 3) == "Short resume."
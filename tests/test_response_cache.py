@@ -0,0 +1,130 @@
+import pytest
+
+pytest.importorskip("pydantic")
+
+from fastapi_backend import response_cache as cache_module
+from fastapi_backend.response_cache import ResponseCache, is_cacheable, make_cache_key, normalize_text
+from schemas import (
+    Critique, FinalResponse, IterationData, PerformanceMetrics, ResponseMetadata, STARResponse
+)
+
+REQUEST = {
+    "role": "Product Manager",
+    "industry": "Healthcare",
+    "question": "Tell me about a time you handled conflict",
+    "resume": "Led the EHR rollout",
+    "jobDescription": "",
+}
+
+
+class FakeClock:
+    """Stands in for the time module so TTL expiry is deterministic"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache_module, "time", fake)
+    return fake
+
+
+def response(question="q", iterations=1, status="COMPLETED"):
+    return FinalResponse(
+        metadata=ResponseMetadata(role="PM", industry="Healthcare", question=question, status=status),
+        iterations=[
+            IterationData(iterationNumber=i + 1, starAnswer=STARResponse(), critique=Critique(rating=4.0))
+            for i in range(iterations)
+        ],
+        performanceMetrics=PerformanceMetrics(totalWorkflowTime=1.0, generationTime=0.5)
+    )
+
+
+def test_normalize_text():
+    assert normalize_text("  Product\n\tMANAGER  ") == "product manager"
+    assert normalize_text(None) == ""
+
+
+def test_cache_key_ignores_case_whitespace_and_other_fields():
+    variant = dict(
+        REQUEST,
+        role=" product   manager ",
+        question="TELL me about a time\nyou handled conflict",
+        userId="someone-else",
+        session_id="s-2",
+    )
+    assert make_cache_key(variant) == make_cache_key(REQUEST)
+    assert make_cache_key({k: v for k, v in REQUEST.items() if k != "jobDescription"}) == make_cache_key(REQUEST)
+
+
+@pytest.mark.parametrize("field", ["role", "industry", "question", "resume", "jobDescription"])
+def test_cache_key_changes_with_each_input(field):
+    assert make_cache_key(dict(REQUEST, **{field: "something else"})) != make_cache_key(REQUEST)
+
+
+def test_cache_key_changes_with_agent_config(monkeypatch):
+    key = make_cache_key(REQUEST)
+    monkeypatch.setattr(cache_module, "AGENT_CONFIG_VERSION", "2")
+    assert make_cache_key(REQUEST) != key
+    monkeypatch.setattr(cache_module, "AGENT_CONFIG_VERSION", "1")
+    monkeypatch.setenv("AGENT_CLOUD_RUN_URL", "https://agent-2.example")
+    assert make_cache_key(REQUEST) != key
+
+
+def test_entry_expires_after_ttl(clock):
+    cache = ResponseCache(max_entries=10, ttl=60)
+    cache.put("k", response())
+    clock.now += 60
+    assert cache.get("k") is not None
+    clock.now += 0.1
+    assert cache.get("k") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["size"] == 0
+
+
+def test_put_refreshes_the_ttl(clock):
+    cache = ResponseCache(max_entries=10, ttl=60)
+    cache.put("k", response("old"))
+    clock.now += 50
+    cache.put("k", response("new"))
+    clock.now += 50
+    assert cache.get("k").metadata.question == "new"
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = ResponseCache(max_entries=2, ttl=60)
+    cache.put("a", response("a"))
+    cache.put("b", response("b"))
+    assert cache.get("a") is not None  # "b" is now the least recently used
+    cache.put("c", response("c"))
+    assert cache.get("b") is None
+    assert cache.get("a").metadata.question == "a"
+    assert cache.get("c").metadata.question == "c"
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size"] == 2
+
+
+def test_stats_count_hits_and_misses(clock):
+    cache = ResponseCache(max_entries=10, ttl=60)
+    assert cache.stats()["hit_rate"] == 0.0
+    cache.get("k")
+    cache.put("k", response())
+    cache.get("k")
+    cache.get("k")
+    cache.get("other")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 2)
+    assert stats["hit_rate"] == 0.5
+    cache.clear()
+    assert cache.stats()["size"] == 0
+
+
+def test_only_complete_runs_are_cacheable():
+    assert is_cacheable(response())
+    assert not is_cacheable(response(iterations=0))
+    assert not is_cacheable(response(status="ERROR"))
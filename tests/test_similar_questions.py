@@ -0,0 +1,92 @@
+import pytest
+
+from fastapi_backend.similar_questions import (
+    NUM_PERM, QuestionIndex, jaccard, minhash_signature, question_terms
+)
+
+QUESTION = "Tell me about a time you handled a conflict with a stakeholder"
+
+
+def test_question_terms_drop_framing_and_stem():
+    assert question_terms(QUESTION) == question_terms("Describe a situation handling conflicts with stakeholders.")
+    assert question_terms(QUESTION) == frozenset({"handl", "conflict", "stakeholder"})
+
+
+@pytest.mark.parametrize("a, b, expected", [
+    (frozenset(), frozenset(), 1.0),
+    (frozenset({"x"}), frozenset(), 0.0),
+    (frozenset({"x", "y"}), frozenset({"x", "y"}), 1.0),
+    (frozenset({"x", "y"}), frozenset({"y", "z"}), 1 / 3),
+    (frozenset({"a", "b", "c", "d"}), frozenset({"a", "b", "c"}), 0.75),
+])
+def test_jaccard(a, b, expected):
+    assert jaccard(a, b) == pytest.approx(expected)
+
+
+def test_minhash_signature_is_deterministic_and_order_free():
+    terms = question_terms(QUESTION)
+    signature = minhash_signature(terms)
+    assert len(signature) == NUM_PERM
+    assert signature == minhash_signature(frozenset(sorted(terms, reverse=True)))
+    assert signature != minhash_signature(question_terms("Describe your greatest failure"))
+
+
+def test_rephrased_question_matches():
+    index = QuestionIndex(threshold=0.75)
+    index.add("Product Manager", "Healthcare", QUESTION, "answer")
+    match = index.query("product manager ", "HEALTHCARE", "Describe how you handled conflicts with stakeholders")
+    assert match is not None
+    assert match.question == QUESTION
+    assert match.similarity == 1.0
+    assert match.payload == "answer"
+
+
+def test_partial_overlap_below_threshold_misses():
+    index = QuestionIndex(threshold=0.75)
+    index.add("PM", "Healthcare", "conflict stakeholder roadmap launch", "answer")
+    # 3 of 5 terms shared: Jaccard 0.6
+    assert index.query("PM", "Healthcare", "conflict stakeholder roadmap budget") is None
+    assert index.query("PM", "Healthcare", "conflict stakeholder roadmap launch deadline") is not None
+    assert (index.hits, index.misses) == (1, 1)
+
+
+def test_other_role_or_industry_never_matches():
+    index = QuestionIndex()
+    index.add("PM", "Healthcare", QUESTION, "answer")
+    assert index.query("Engineer", "Healthcare", QUESTION) is None
+    assert index.query("PM", "Finance", QUESTION) is None
+
+
+def test_best_match_wins():
+    index = QuestionIndex(threshold=0.5)
+    index.add("PM", "Tech", "conflict stakeholder roadmap launch", "close")
+    index.add("PM", "Tech", "conflict stakeholder roadmap launch budget deadline", "far")
+    match = index.query("PM", "Tech", "conflict stakeholder roadmap launch budget")
+    assert match.payload in ("close", "far")
+    assert match.similarity == pytest.approx(max(4 / 5, 5 / 6))
+    assert match.payload == "far"
+
+
+def test_readding_a_question_replaces_it():
+    index = QuestionIndex()
+    index.add("PM", "Tech", QUESTION, "old")
+    index.add("PM", "Tech", QUESTION, "new")
+    assert len(index) == 1
+    assert index.query("PM", "Tech", QUESTION).payload == "new"
+
+
+def test_oldest_entries_are_evicted():
+    index = QuestionIndex(max_entries=2)
+    questions = ["conflict stakeholder", "failure deadline", "mentoring junior engineer"]
+    for i, question in enumerate(questions):
+        index.add("PM", "Tech", question, i)
+    assert len(index) == 2
+    assert index.query("PM", "Tech", questions[0]) is None
+    assert index.query("PM", "Tech", questions[2]).payload == 2
+
+
+def test_question_without_content_terms_is_ignored():
+    index = QuestionIndex()
+    index.add("PM", "Tech", "Tell me about a time", "answer")
+    assert len(index) == 0
+    assert index.query("PM", "Tech", "Tell me about a time") is None
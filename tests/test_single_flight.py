@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("pydantic")  # single_flight imports the backend's response schemas
+
+from fastapi_backend.single_flight import SingleFlight
+
+
+class Upstream:
+    """An upstream run that emits events when told to and records cancellation"""
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.started = 0
+        self.cancelled = False
+
+    async def run(self):
+        self.started += 1
+        try:
+            while True:
+                event = await self.queue.get()
+                if event is None:
+                    return
+                if isinstance(event, Exception):
+                    raise event
+                yield event
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+async def _collect(stream, into):
+    async for event in stream:
+        into.append(event)
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_late_joiner_replays_from_the_start():
+    async def scenario():
+        flight, upstream = SingleFlight(), Upstream()
+        first, late = [], []
+        first_task = asyncio.create_task(_collect(flight.stream("key", upstream.run), first))
+        await _settle()
+        upstream.queue.put_nowait({"n": 1})
+        upstream.queue.put_nowait({"n": 2})
+        await _settle()
+
+        late_task = asyncio.create_task(_collect(flight.stream("key", upstream.run), late))
+        await _settle()
+        upstream.queue.put_nowait({"n": 3})
+        upstream.queue.put_nowait(None)
+        await asyncio.gather(first_task, late_task)
+
+        assert first == late == [{"n": 1}, {"n": 2}, {"n": 3}]
+        assert upstream.started == 1
+        assert (flight.started, flight.coalesced, flight.cancelled) == (1, 1, 0)
+        assert flight.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_run_continues_while_a_subscriber_remains():
+    async def scenario():
+        flight, upstream = SingleFlight(), Upstream()
+        kept = []
+        leaving = asyncio.create_task(_collect(flight.stream("key", upstream.run), []))
+        staying = asyncio.create_task(_collect(flight.stream("key", upstream.run), kept))
+        await _settle()
+
+        leaving.cancel()
+        await _settle()
+        assert not upstream.cancelled
+
+        upstream.queue.put_nowait({"n": 1})
+        upstream.queue.put_nowait(None)
+        await staying
+        assert kept == [{"n": 1}]
+        assert flight.cancelled == 0
+
+    asyncio.run(scenario())
+
+
+def test_last_subscriber_leaving_cancels_the_run():
+    async def scenario():
+        flight, upstream = SingleFlight(), Upstream()
+        tasks = [asyncio.create_task(_collect(flight.stream("key", upstream.run), [])) for _ in range(2)]
+        await _settle()
+
+        for task in tasks:
+            task.cancel()
+        await _settle()
+        assert upstream.cancelled
+        assert flight.cancelled == 1
+        assert flight.stats()["in_flight"] == 0
+
+        # A new request starts a fresh run rather than joining the cancelled one
+        fresh, events = Upstream(), []
+        task = asyncio.create_task(_collect(flight.stream("key", fresh.run), events))
+        await _settle()
+        fresh.queue.put_nowait({"n": 1})
+        fresh.queue.put_nowait(None)
+        await task
+        assert events == [{"n": 1}]
+        assert flight.started == 2
+
+    asyncio.run(scenario())
+
+
+def test_upstream_failure_reaches_every_subscriber():
+    async def scenario():
+        flight, upstream = SingleFlight(), Upstream()
+        results = [[], []]
+        tasks = [asyncio.create_task(_collect(flight.stream("key", upstream.run), into)) for into in results]
+        await _settle()
+        upstream.queue.put_nowait(RuntimeError("agent down"))
+        await asyncio.gather(*tasks)
+
+        for events in results:
+            assert len(events) == 1
+            assert "agent down" in str(events[0])
+
+    asyncio.run(scenario())
+
+
+def test_different_keys_do_not_share_a_run():
+    async def scenario():
+        flight = SingleFlight()
+        upstreams = [Upstream(), Upstream()]
+        tasks = [
+            asyncio.create_task(_collect(flight.stream(key, upstream.run), []))
+            for key, upstream in zip(("a", "b"), upstreams)
+        ]
+        await _settle()
+        for upstream in upstreams:
+            upstream.queue.put_nowait(None)
+        await asyncio.gather(*tasks)
+        assert [upstream.started for upstream in upstreams] == [1, 1]
+        assert flight.coalesced == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,124 @@
+import pytest
+
+from shared_utils.sse_parser import SSEParser
+
+STREAM = (
+    b"\xef\xbb\xbf"
+    b": keep-alive\r\n"
+    b"retry: 3000\r\n"
+    b"event: status\r\n"
+    b"id: 1\r\n"
+    b"data: first line\r\n"
+    b"data: second line\r\n"
+    b"\r\n"
+    b"data: {\"type\": \"iteration\"}\n"
+    b"\n"
+    b"id: 2\r"
+    b"data:no space\r"
+    b"\r"
+    b"data: unterminated"
+)
+
+
+def _events(chunks):
+    parser = SSEParser()
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    events.extend(parser.close())
+    return [(e.event, e.data, e.id, e.retry) for e in events]
+
+
+EXPECTED = [
+    ("status", b"first line\nsecond line", "1", 3000),
+    ("message", b'{"type": "iteration"}', "1", 3000),
+    ("message", b"no space", "2", 3000),
+    ("message", b"unterminated", "2", 3000),
+]
+
+
+def test_whole_stream():
+    assert _events([STREAM]) == EXPECTED
+
+
+def test_one_byte_chunks_match_a_single_chunk():
+    assert _events([STREAM[i:i + 1] for i in range(len(STREAM))]) == EXPECTED
+
+
+@pytest.mark.parametrize("split", range(1, len(STREAM)))
+def test_any_two_chunk_split_matches_a_single_chunk(split):
+    assert _events([STREAM[:split], STREAM[split:]]) == EXPECTED
+
+
+def test_crlf_split_across_chunks_is_one_line_ending():
+    parser = SSEParser()
+    assert parser.feed(b"data: a\r") == []
+    assert parser.feed(b"\n\r") == []
+    events = parser.feed(b"\n")
+    assert [e.data for e in events] == [b"a"]
+    assert parser.close() == []
+
+
+def test_lone_cr_line_endings():
+    parser = SSEParser()
+    events = parser.feed(b"data: a\r\rdata: b\r\r") + parser.close()
+    assert [e.data for e in events] == [b"a", b"b"]
+
+
+def test_multi_line_data_keeps_empty_lines():
+    parser = SSEParser()
+    events = parser.feed(b"data: {\ndata\ndata:  \"x\": 1}\n\n")
+    assert [e.data for e in events] == [b'{\n\n "x": 1}']
+
+
+def test_event_id_and_retry_fields():
+    parser = SSEParser()
+    events = parser.feed(b"event: done\nid: 42\nretry: 1500\ndata: x\n\ndata: y\n\n")
+    assert [(e.event, e.id, e.retry) for e in events] == [("done", "42", 1500), ("message", "42", 1500)]
+    assert (parser.last_event_id, parser.retry) == ("42", 1500)
+
+
+def test_invalid_id_and_retry_are_ignored():
+    parser = SSEParser()
+    events = parser.feed(b"id: 1\nretry: 10\n\nid: a\x00b\nretry: soon\ndata: x\n\n")
+    assert [(e.id, e.retry) for e in events] == [("1", 10)]
+
+
+def test_comments_and_unknown_fields_are_ignored():
+    parser = SSEParser()
+    events = parser.feed(b": ping\n:\nfoo: bar\ndata: x\n: trailing comment\n\n")
+    assert [(e.event, e.data) for e in events] == [("message", b"x")]
+
+
+def test_blank_lines_without_data_dispatch_nothing():
+    parser = SSEParser()
+    assert parser.feed(b"event: status\n\n\n") == []
+    # The event type does not carry over to the next event
+    assert [e.event for e in parser.feed(b"data: x\n\n")] == ["message"]
+
+
+def test_leading_bom_split_across_chunks():
+    parser = SSEParser()
+    assert parser.feed(b"\xef") == []
+    assert parser.feed(b"\xbb") == []
+    events = parser.feed(b"\xbfdata: x\n\n")
+    assert [e.data for e in events] == [b"x"]
+
+
+def test_bom_is_only_stripped_at_the_start():
+    parser = SSEParser()
+    events = parser.feed(b"data: x\n\n\xef\xbb\xbfdata: y\n\n")
+    # A BOM after the start is part of the field name, so the line is an unknown field
+    assert [e.data for e in events] == [b"x"]
+
+
+def test_close_flushes_a_final_frame_without_blank_line():
+    parser = SSEParser()
+    assert parser.feed(b"data: {\"final\": true}\n") == []
+    events = parser.close()
+    assert [e.json() for e in events] == [{"final": True}]
+    assert parser.close() == []
+
+
+def test_close_on_an_empty_stream():
+    assert SSEParser().close() == []
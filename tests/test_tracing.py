@@ -0,0 +1,37 @@
+import asyncio
+
+from shared_utils.tracing import RunTrace, current_trace, end_trace, start_trace, use_trace
+
+
+def test_concurrent_tasks_see_their_own_trace():
+    async def run(invocation_id, delay):
+        trace, token = start_trace(invocation_id)
+        with trace.span("agent", "step"):
+            await asyncio.sleep(delay)
+            assert current_trace() is trace
+        assert current_trace("other") is None
+        end_trace(trace, token)
+        assert current_trace() is None
+        return trace
+
+    async def main():
+        return await asyncio.gather(run("a", 0.05), run("b", 0.0))
+
+    slow, fast = asyncio.run(main())
+    assert (slow.invocation_id, fast.invocation_id) == ("a", "b")
+    assert slow.durations("agent", "step")[0] >= 0.05
+    assert fast.durations("agent", "step")[0] < 0.05
+
+
+def test_finish_closes_open_spans_and_tree_nests_them():
+    trace = RunTrace("inv")
+    agent = trace.start("agent", "critic")
+    trace.start("llm", "critic", agent, model="m")
+    with use_trace(trace):
+        assert current_trace("inv") is trace
+    trace.finish()
+    tree = trace.tree()
+    assert tree["name"] == "run" and "open" not in tree
+    [agent_node] = tree["children"]
+    assert agent_node["children"][0]["attributes"] == {"model": "m"}
+    assert trace.open_span("agent", "critic") is None